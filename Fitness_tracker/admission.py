@@ -0,0 +1,153 @@
+"""
+Admission control for CPU-bound API endpoints.
+
+AdmissionLimiter bounds concurrent work per endpoint and keeps a short,
+bounded wait queue; anything beyond that is rejected immediately with a
+retry hint instead of piling up behind the busy workers.
+
+LatestFrameGate serializes frames per session and lets a newer frame
+replace one that is still waiting, so a client sending faster than we
+can process always gets results for its freshest frame.
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when a limiter is saturated; carries a Retry-After hint in seconds."""
+    def __init__(self, limiter_name: str, retry_after: int, reason: str = "overloaded"):
+        super().__init__(f"{limiter_name} {reason}, retry after {retry_after}s")
+        self.limiter_name = limiter_name
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionLimiter:
+    """
+    Async context manager: at most max_concurrent holders, at most max_queue
+    waiters, and waiters give up after max_wait seconds.
+    Must be used from a single event loop.
+    """
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float = 2.0):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._started: Dict[asyncio.Task, float] = {}
+        # EWMA of time spent holding a slot, used for Retry-After
+        self._service_time = 0.05
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's running loop
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrent)
+        return self._sem
+
+    def retry_after(self) -> int:
+        backlog = self.waiting + self.in_flight + 1
+        return max(1, math.ceil(self._service_time * backlog / self.max_concurrent))
+
+    async def __aenter__(self):
+        sem = self._semaphore()
+        if self.in_flight + self.waiting >= self.max_concurrent + self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.name, self.retry_after())
+        self.waiting += 1
+        # The acquire runs as its own task, so a timeout (or our cancellation) that races
+        # with it being granted can hand the permit back instead of leaking it
+        acquire = asyncio.ensure_future(sem.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquire), timeout=self.max_wait)
+        except BaseException as e:
+            acquire.cancel()
+            acquire.add_done_callback(self._release_if_acquired)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise AdmissionRejected(self.name, self.retry_after(), reason="queue wait exceeded")
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self._started[asyncio.current_task()] = time.perf_counter()
+        return self
+
+    def _release_if_acquired(self, acquire: asyncio.Future) -> None:
+        if not acquire.cancelled() and acquire.exception() is None:
+            self._semaphore().release()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started.pop(asyncio.current_task(), time.perf_counter())
+        self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self.in_flight -= 1
+        self._semaphore().release()
+        return False
+
+
+class _GateState:
+    __slots__ = ("busy", "pending")
+
+    def __init__(self):
+        self.busy = False
+        self.pending: Optional[asyncio.Future] = None
+
+
+class LatestFrameGate:
+    """
+    One frame in processing and at most one waiting per key. A new arrival
+    replaces the waiting frame; the replaced caller is told it was superseded.
+    Must be used from a single event loop.
+    """
+    def __init__(self):
+        self._states: Dict[str, _GateState] = {}
+        self.superseded = 0
+
+    async def acquire(self, key: str) -> bool:
+        """Return True when it is this frame's turn, False if a newer frame replaced it."""
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _GateState()
+        if not state.busy:
+            state.busy = True
+            return True
+        if state.pending is not None and not state.pending.done():
+            state.pending.set_result(False)
+            self.superseded += 1
+        fut = asyncio.get_running_loop().create_future()
+        state.pending = fut
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            if state.pending is fut:
+                state.pending = None
+            if fut.done() and not fut.cancelled() and fut.result():
+                # Turn was handed to us as we were cancelled; pass it on
+                self.release(key)
+            raise
+
+    def release(self, key: str) -> None:
+        state = self._states.get(key)
+        if state is None:
+            return
+        fut, state.pending = state.pending, None
+        if fut is not None and not fut.done():
+            fut.set_result(True)  # hand the slot straight to the newest frame
+            return
+        state.busy = False
+        del self._states[key]
+
+    def discard(self, key: str) -> None:
+        """Forget a key (e.g. its session ended); a waiting frame is told it was superseded."""
+        state = self._states.pop(key, None)
+        if state is not None and state.pending is not None and not state.pending.done():
+            state.pending.set_result(False)
+            self.superseded += 1
+
+    def __len__(self) -> int:
+        return len(self._states)
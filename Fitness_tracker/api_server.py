@@ -6,9 +6,9 @@ allowing external applications to interact with the exercise analysis, feedback,
 and session management features.
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Tuple
 import numpy as np
@@ -22,24 +22,34 @@ import uuid
 from collections import deque
 import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+from collections import OrderedDict
 from fastapi import Body
 import base64
-# Import existing modules
-from exercise import (
-    run_live_session, extract_pose_sequence, RepDetector, 
-    derive_angle_thresholds, extract_landmarks
-)
+import hashlib
+# Import existing modules. Only NumPy, OpenCV and MediaPipe are loaded at startup;
+# torch, CLIP, tkinter and matplotlib stay behind lazy imports in the modules that need them.
+from exercise import extract_pose_sequence
 from scoring import (
     compute_angles_for_seq, smooth_angles, resample_to_length,
     dtw_distance_l1, masked_motion_amplitude, build_priority_mask,
-    total_motion_amplitude
+    total_motion_amplitude, REP_SCORE_DEFAULTS
 )
 from feedback_system import create_feedback_system, ExerciseFeedbackSystem
 from ui_priority import build_weights_from_priority
 from orientation import average_forward_vector
-from weights_detection import detect_weights
-from summary_window import show_exercise_summary
+from template_cache import TrainerTemplateCache, hash_landmarks
+from template_store import TemplateStore
+from progressive_extract import ProgressivePoseExtractor
+from video_analysis import VideoAnalysisJob
+from metrics import REGISTRY, CONTENT_TYPE_LATEST
+from admission import AdmissionLimiter, AdmissionRejected, LatestFrameGate
+from pose_workers import PoseWorkerPool
+from session_expiry import SessionExpiryIndex
+from inference_scheduler import InferenceScheduler
+from roi_tracker import RoiTracker
+from motion_gate import MotionGate
 import mediapipe as mp
 
 # Initialize FastAPI app
@@ -62,6 +72,91 @@ app.add_middleware(
 active_sessions: Dict[str, Dict[str, Any]] = {}
 session_lock = threading.Lock()
 
+# Sessions idle longer than this are evicted by expire_sessions()
+SESSION_TTL_SECONDS = float(os.environ.get("FITNESS_SESSION_TTL_SECONDS", 3600))
+session_expiry = SessionExpiryIndex(SESSION_TTL_SECONDS)
+
+# Derived trainer features for /analysis/pose, keyed by content hash
+trainer_cache = TrainerTemplateCache(max_entries=64)
+
+# Extracted trainer templates persisted across restarts, keyed by landmark hash.
+# The store only touches TEMPLATE_DIR on first use, so importing this module has no
+# filesystem side effects
+TEMPLATE_DIR = os.environ.get("FITNESS_TEMPLATE_DIR", os.path.expanduser("~/.fitness_tracker/templates"))
+TEMPLATE_MAX_UPLOAD_BYTES = int(float(os.environ.get("FITNESS_TEMPLATE_MAX_UPLOAD_MB", 512)) * 1024 * 1024)
+template_store = TemplateStore(TEMPLATE_DIR)
+# Trainer frames are downscaled to this longer side before Pose; it resizes to its
+# own small input anyway, so full-HD decode output only costs conversion time
+TEMPLATE_MAX_FRAME_SIZE = 640
+
+# Trainer video pose extraction runs off the event loop
+template_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="trainer-template")
+
+# Admission control: bounded concurrency and wait queue per CPU-bound endpoint group.
+# Overridable from the environment for capacity tuning.
+POSE_MAX_CONCURRENCY = int(os.environ.get("FITNESS_POSE_MAX_CONCURRENCY", os.cpu_count() or 2))
+POSE_MAX_QUEUE = int(os.environ.get("FITNESS_POSE_MAX_QUEUE", 2 * POSE_MAX_CONCURRENCY))
+ANALYSIS_MAX_CONCURRENCY = int(os.environ.get("FITNESS_ANALYSIS_MAX_CONCURRENCY", os.cpu_count() or 2))
+ANALYSIS_MAX_QUEUE = int(os.environ.get("FITNESS_ANALYSIS_MAX_QUEUE", 4 * ANALYSIS_MAX_CONCURRENCY))
+ADMISSION_MAX_WAIT = float(os.environ.get("FITNESS_ADMISSION_MAX_WAIT", 2.0))
+
+pose_executor = ThreadPoolExecutor(max_workers=POSE_MAX_CONCURRENCY, thread_name_prefix="pose")
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_MAX_CONCURRENCY, thread_name_prefix="analysis")
+pose_limiter = AdmissionLimiter("pose_inference", POSE_MAX_CONCURRENCY, POSE_MAX_QUEUE, ADMISSION_MAX_WAIT)
+analysis_limiter = AdmissionLimiter("analysis", ANALYSIS_MAX_CONCURRENCY, ANALYSIS_MAX_QUEUE, ADMISSION_MAX_WAIT)
+# Newest-frame-wins gate for /analysis/base64_frame, keyed by client session_id
+frame_gate = LatestFrameGate()
+
+# Optional pose worker processes (one warm Pose graph each, shared-memory frame
+# handoff). 0 keeps inference in-process on pose_executor threads.
+POSE_WORKERS = int(os.environ.get("FITNESS_POSE_WORKERS", 0))
+pose_pool: Optional[PoseWorkerPool] = None
+
+# Offline user-video analysis: segments are pose-extracted in a process pool,
+# created on first use; each job is driven by a thread on video_job_executor
+VIDEO_WORKERS = int(os.environ.get("FITNESS_VIDEO_WORKERS", os.cpu_count() or 2))
+VIDEO_MAX_JOBS = 32  # finished jobs beyond this are forgotten, oldest first
+video_process_pool: Optional[ProcessPoolExecutor] = None
+video_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="video-job")
+video_jobs: "OrderedDict[str, VideoAnalysisJob]" = OrderedDict()
+
+# Metrics exposed on /metrics
+REQUEST_LATENCY = REGISTRY.histogram(
+    "fitness_api_request_duration_seconds", "HTTP request latency by endpoint", ("method", "endpoint"))
+REQUESTS_TOTAL = REGISTRY.counter(
+    "fitness_api_requests_total", "HTTP requests by endpoint and status code", ("method", "endpoint", "status"))
+STAGE_LATENCY = REGISTRY.histogram(
+    "fitness_api_stage_duration_seconds", "Latency of individual pipeline stages", ("stage",))
+EXECUTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "fitness_api_executor_queue_depth", "Tasks waiting for a worker thread", ("executor",))
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "fitness_api_active_sessions", "Sessions currently held in memory")
+TEMPLATE_EXTRACTIONS = REGISTRY.counter(
+    "fitness_api_trainer_template_extractions_total", "Trainer videos run through pose extraction")
+POSE_GRAPH_CONSTRUCTIONS = REGISTRY.counter(
+    "fitness_api_pose_graph_constructions_total", "MediaPipe Pose graphs constructed (use rate() for per second)")
+POSE_MOTION_SKIPPED = REGISTRY.counter(
+    "fitness_api_pose_motion_skipped_total", "Session frames answered with the previous landmarks because nothing moved")
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "fitness_api_admission_in_flight", "Requests holding an admission slot", ("limiter",))
+ADMISSION_WAITING = REGISTRY.gauge(
+    "fitness_api_admission_waiting", "Requests waiting for an admission slot", ("limiter",))
+ADMISSION_REJECTED = REGISTRY.counter(
+    "fitness_api_admission_rejected_total", "Requests rejected with 429", ("limiter",))
+FRAMES_SUPERSEDED = REGISTRY.counter(
+    "fitness_api_frames_superseded_total", "Frames dropped because a newer frame from the same session arrived")
+
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: template_executor._work_queue.qsize(), executor="trainer_template")
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: pose_executor._work_queue.qsize(), executor="pose")
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: analysis_executor._work_queue.qsize(), executor="analysis")
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: pose_pool.in_flight if pose_pool else 0, executor="pose_workers")
+EXECUTOR_QUEUE_DEPTH.set_function(lambda: video_job_executor._work_queue.qsize(), executor="video_jobs")
+for _limiter in (pose_limiter, analysis_limiter):
+    ADMISSION_IN_FLIGHT.set_function(lambda l=_limiter: l.in_flight, limiter=_limiter.name)
+    ADMISSION_WAITING.set_function(lambda l=_limiter: l.waiting, limiter=_limiter.name)
+ACTIVE_SESSIONS.set_function(lambda: len(active_sessions))
+
 # Pydantic models for API schemas
 class ExerciseConfig(BaseModel):
     priority_joints: List[str] = Field(default=[], description="List of joints to prioritize")
@@ -69,9 +164,19 @@ class ExerciseConfig(BaseModel):
     nonpriority_weight: float = Field(default=0.2, ge=0.0, le=1.0, description="Weight for non-priority joints")
     require_weights: bool = Field(default=False, description="Whether to require weights detection")
     device: str = Field(default="cpu", description="Device to use for processing")
+    # Frame pacing / Pose model selection for frames sent with this session_id
+    target_fps: float = Field(default=30.0, gt=0.0, le=120.0, description="Frame rate the client aims to display")
+    latency_budget_ms: float = Field(default=150.0, gt=0.0, le=5000.0, description="Per-frame server latency budget (queue + decode + pose)")
+    max_inference_fps: float = Field(default=30.0, gt=0.0, le=120.0, description="Upper bound on frames per second worth sending")
+    min_inference_fps: float = Field(default=10.0, gt=0.0, le=120.0, description="Lower bound on the recommended frame rate")
+    model_complexity: Optional[int] = Field(default=None, ge=0, le=2, description="Pose model complexity; omit to adapt it to the latency budget")
+    roi_tracking: bool = Field(default=False, description="Run Pose on a crop around the previous pose for this session's frames")
+    motion_gating: bool = Field(default=False, description="Reuse the previous landmarks for frames that barely differ from the last inferred one")
+    motion_threshold: float = Field(default=1.0, gt=0.0, le=255.0, description="Mean gray-level change (0-255, on a 64x48 thumbnail) that counts as motion")
 
 class SessionStartRequest(BaseModel):
-    trainer_video_path: str = Field(..., description="Path to trainer video file")
+    trainer_video_path: Optional[str] = Field(default=None, description="Path to trainer video file on the server")
+    trainer_template_id: Optional[str] = Field(default=None, description="Id returned by /templates/upload")
     config: ExerciseConfig = Field(default_factory=ExerciseConfig, description="Exercise configuration")
 
 class RepScore(BaseModel):
@@ -88,11 +193,13 @@ class SessionStatus(BaseModel):
     average_score: float
     start_time: datetime
     last_activity: datetime
+    inference: Optional[Dict[str, Any]] = None  # scheduler state for frames sent with this session_id
 
 class FeedbackRequest(BaseModel):
     session_id: str
     user_landmarks: List[List[List[float]]]  # [T, 33, 3] - sequence of pose landmarks
-    trainer_landmarks: List[List[List[float]]]  # [T, 33, 3] - trainer template landmarks
+    trainer_landmarks: Optional[List[List[List[float]]]] = None  # [T, 33, 3] - trainer template landmarks
+    trainer_template_id: Optional[str] = None  # id returned by a previous /analysis/pose call
 
 class AnalysisResult(BaseModel):
     score: float
@@ -100,6 +207,7 @@ class AnalysisResult(BaseModel):
     joint_analysis: Dict[str, float]
     motion_amplitude: float
     rep_detected: bool
+    trainer_template_id: Optional[str] = None
 
 class SummaryStats(BaseModel):
     total_reps: int
@@ -115,6 +223,31 @@ class SummaryStats(BaseModel):
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-endpoint latency and status for every request."""
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        REQUEST_LATENCY.observe(time.perf_counter() - t0, method=request.method, endpoint=endpoint)
+        REQUESTS_TOTAL.inc(method=request.method, endpoint=endpoint, status=str(status))
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed load early with 429 and a Retry-After hint."""
+    ADMISSION_REJECTED.inc(limiter=exc.limiter_name)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Server busy ({exc.reason}), retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -125,7 +258,8 @@ async def root():
             "sessions": "/sessions",
             "analysis": "/analysis",
             "feedback": "/feedback",
-            "health": "/health"
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -134,14 +268,24 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "timestamp": datetime.now()}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage and resource metrics."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/sessions/start")
 async def start_session(request: SessionStartRequest) -> Dict[str, str]:
     """Start a new exercise session."""
     session_id = str(uuid.uuid4())
     
     try:
+        if request.trainer_template_id:
+            if request.trainer_template_id not in template_store:
+                raise HTTPException(status_code=404, detail="Unknown trainer_template_id")
+        elif not request.trainer_video_path:
+            raise HTTPException(status_code=400, detail="Either trainer_video_path or trainer_template_id is required")
         # Validate trainer video exists
-        if not os.path.exists(request.trainer_video_path):
+        elif not os.path.exists(request.trainer_video_path):
             raise HTTPException(status_code=404, detail="Trainer video file not found")
         
         # Initialize session
@@ -150,23 +294,33 @@ async def start_session(request: SessionStartRequest) -> Dict[str, str]:
                 "status": "starting",
                 "config": request.config,
                 "trainer_video_path": request.trainer_video_path,
+                "trainer_template_id": request.trainer_template_id,
                 "rep_scores": [],
                 "start_time": datetime.now(),
                 "last_activity": datetime.now(),
                 "feedback_system": None,
-                "trainer_template": None
+                "trainer_template": None,
+                "inference_scheduler": InferenceScheduler.from_config(request.config),
+                "roi_tracker": RoiTracker() if request.config.roi_tracking else None,
+                "motion_gate": MotionGate(threshold=request.config.motion_threshold) if request.config.motion_gating else None,
             }
+        session_expiry.touch(session_id)
         
         # Load trainer template in background
-        asyncio.create_task(load_trainer_template(session_id, request.trainer_video_path, request.config))
+        asyncio.create_task(load_trainer_template(
+            session_id, request.trainer_video_path, request.config, request.trainer_template_id
+        ))
         
         return {"session_id": session_id, "status": "starting"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start session: {str(e)}")
 
-async def load_trainer_template(session_id: str, trainer_video_path: str, config: ExerciseConfig):
-    """Load trainer template and initialize feedback system."""
+async def load_trainer_template(session_id: str, trainer_video_path: Optional[str], config: ExerciseConfig,
+                                trainer_template_id: Optional[str] = None):
+    """Load trainer template (from the store or by extracting the video) and initialize feedback system."""
     try:
         with session_lock:
             if session_id not in active_sessions:
@@ -175,8 +329,21 @@ async def load_trainer_template(session_id: str, trainer_video_path: str, config
             session = active_sessions[session_id]
             session["status"] = "loading"
         
-        # Extract trainer sequence
-        trainer_seq = extract_pose_sequence(trainer_video_path)
+        loop = asyncio.get_running_loop()
+        if trainer_template_id:
+            stored = await loop.run_in_executor(template_executor, template_store.load, trainer_template_id)
+            if stored is None:
+                raise Exception("Trainer template no longer available")
+            trainer_seq = list(stored)
+        else:
+            # Extract trainer sequence
+            TEMPLATE_EXTRACTIONS.inc()
+            POSE_GRAPH_CONSTRUCTIONS.inc()
+            with STAGE_LATENCY.time(stage="template_extraction"):
+                trainer_seq = await loop.run_in_executor(
+                    template_executor,
+                    lambda: extract_pose_sequence(trainer_video_path, max_size=TEMPLATE_MAX_FRAME_SIZE)
+                )
         if len(trainer_seq) == 0:
             raise Exception("Could not extract trainer landmarks")
         
@@ -194,8 +361,10 @@ async def load_trainer_template(session_id: str, trainer_video_path: str, config
         feedback_system = create_feedback_system(config.priority_joints, weights)
         
         # Compute trainer angles
-        trainer_angles = compute_angles_for_seq(trainer_seq)
-        trainer_angles = smooth_angles(trainer_angles, window=5)
+        with STAGE_LATENCY.time(stage="angles"):
+            trainer_angles = compute_angles_for_seq(trainer_seq)
+        with STAGE_LATENCY.time(stage="smooth_resample"):
+            trainer_angles = smooth_angles(trainer_angles, window=5)
         
         # Store in session
         with session_lock:
@@ -217,34 +386,233 @@ async def load_trainer_template(session_id: str, trainer_video_path: str, config
                 active_sessions[session_id]["status"] = "error"
                 active_sessions[session_id]["error"] = str(e)
 
+async def _stream_body_to_file(request: Request, fd: int, max_bytes: int, on_chunk=None) -> Tuple[int, str]:
+    """
+    Write the raw request body to an open temp file descriptor chunk by chunk.
+    Returns (bytes written, SHA-1 of the body); raises 413 past max_bytes and 400 if empty.
+    on_chunk(total_bytes) is called after each chunk is flushed.
+    """
+    body_hash = hashlib.sha1()
+    total = 0
+    with os.fdopen(fd, "wb") as f:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            total += len(chunk)
+            if total > max_bytes:
+                raise HTTPException(status_code=413, detail="Upload too large")
+            f.write(chunk)
+            f.flush()
+            body_hash.update(chunk)
+            if on_chunk is not None:
+                on_chunk(total)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Empty request body")
+    return total, body_hash.hexdigest()
+
+@app.post("/templates/upload")
+async def upload_trainer_template(request: Request, filename: str = "trainer.mp4") -> Dict[str, Any]:
+    """
+    Stream a trainer video in the raw request body and extract its pose template.
+
+    The body is written to a temp file chunk by chunk and pose extraction runs
+    on the part already received while the rest is still uploading. Returns a
+    template id usable as trainer_template_id in /sessions/start and
+    /analysis/pose. Re-uploading an identical video returns the stored template.
+    """
+    suffix = os.path.splitext(filename)[1] or ".mp4"
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix, prefix="trainer_upload_")
+    extractor = ProgressivePoseExtractor(tmp_path, max_size=TEMPLATE_MAX_FRAME_SIZE)
+    loop = asyncio.get_running_loop()
+    TEMPLATE_EXTRACTIONS.inc()
+    POSE_GRAPH_CONSTRUCTIONS.inc()
+    t_start = time.perf_counter()
+    extraction = loop.run_in_executor(template_executor, extractor.run)
+    try:
+        total, video_sha1 = await _stream_body_to_file(request, fd, TEMPLATE_MAX_UPLOAD_BYTES, extractor.notify)
+        upload_seconds = time.perf_counter() - t_start
+
+        template_id = template_store.find_by_video(video_sha1)
+        reused = template_id is not None
+        if reused:
+            extractor.cancel()
+            landmarks = await loop.run_in_executor(template_executor, template_store.load, template_id)
+        else:
+            extractor.finish()
+            seq = await extraction
+            if not seq:
+                raise HTTPException(status_code=422, detail="Could not extract trainer landmarks")
+            landmarks = np.stack(seq).astype(np.float32)
+            template_id = hash_landmarks(landmarks)
+            await loop.run_in_executor(
+                template_executor,
+                lambda: template_store.save(template_id, landmarks, video_sha1=video_sha1,
+                                            filename=filename, upload_bytes=total)
+            )
+        total_seconds = time.perf_counter() - t_start
+        if not reused:
+            STAGE_LATENCY.observe(total_seconds, stage="template_extraction")
+        return {
+            "template_id": template_id,
+            "num_frames": int(len(landmarks)),
+            "reused": reused,
+            "upload_bytes": total,
+            "upload_seconds": round(upload_seconds, 3),
+            "total_seconds": round(total_seconds, 3),
+            # Seconds of extraction left after the last byte arrived
+            "extraction_tail_seconds": round(total_seconds - upload_seconds, 3),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Template upload failed: {str(e)}")
+    finally:
+        extractor.cancel()
+        # The extractor may still have the file open; wait before deleting it
+        try:
+            await extraction
+        except Exception:
+            pass
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+# cv2.imdecode flags for decoding at 1/2, 1/4 or 1/8 resolution; the pose
+# model downsamples internally, so reduced decode saves time without hurting results
+IMDECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def _pose_landmarks(pose, frame_bgr: np.ndarray) -> Optional[np.ndarray]:
+    results = pose.process(cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB))
+    if not results.pose_landmarks:
+        return None
+    return np.array([[lm.x, lm.y, lm.z] for lm in results.pose_landmarks.landmark], dtype=np.float64)
+
+def _extract_image_landmarks(img_data: bytes, scale: int = 1, model_complexity: Optional[int] = None,
+                             roi_tracker: Optional[RoiTracker] = None,
+                             motion_gate: Optional[MotionGate] = None) -> Tuple[Optional[List[List[float]]], Dict[str, Any], Tuple[int, int]]:
+    """
+    Decode encoded image bytes (optionally at reduced scale) and run Pose
+    (model_complexity None = default model). With a roi_tracker, Pose runs on a
+    crop around the client's previous pose and the full frame only when that
+    misses; landmarks are always full-frame normalized. With a motion_gate, a
+    frame that barely differs from the last inferred one gets that frame's
+    landmarks back without running Pose (timings["motion_skipped"]).
+    Returns (landmarks or None, stage timings in seconds, decoded (width, height)).
+    Runs on pose_executor.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    np_arr = np.frombuffer(img_data, np.uint8)
+    frame = cv2.imdecode(np_arr, IMDECODE_FLAGS[scale])
+    timings["decode"] = time.perf_counter() - t0
+    STAGE_LATENCY.observe(timings["decode"], stage="imdecode")
+    if frame is None:
+        raise HTTPException(status_code=400, detail="Failed to decode image")
+
+    if motion_gate is not None:
+        t0 = time.perf_counter()
+        infer = motion_gate.should_infer(frame)
+        STAGE_LATENCY.observe(time.perf_counter() - t0, stage="motion_gate")
+        if not infer:
+            timings["pose"] = 0.0
+            timings["motion_skipped"] = True
+            return motion_gate.last_result, timings, (frame.shape[1], frame.shape[0])
+
+    crop, box = roi_tracker.crop(frame) if roi_tracker is not None else (frame, None)
+    if pose_pool is not None:
+        # Warm graph in a worker process; landmarks come back as [33, 3] float32
+        t0 = time.perf_counter()
+        lmk_arr = pose_pool.process(crop, model_complexity=model_complexity)
+        if lmk_arr is None and box is not None:
+            roi_tracker.lost()
+            box = None
+            lmk_arr = pose_pool.process(frame, model_complexity=model_complexity)
+        timings["pose"] = time.perf_counter() - t0
+        STAGE_LATENCY.observe(timings["pose"], stage="pose_inference")
+    else:
+        # Process frame with Mediapipe
+        POSE_GRAPH_CONSTRUCTIONS.inc()
+        try:
+            pose_graph = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5,
+                                      model_complexity=1 if model_complexity is None else model_complexity)
+        except Exception:
+            if model_complexity in (None, 1):
+                raise
+            # Models other than 1 are downloaded on first use; fall back if that fails
+            timings["model_unavailable"] = True
+            pose_graph = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+        with pose_graph as pose:
+            t0 = time.perf_counter()
+            lmk_arr = _pose_landmarks(pose, crop)
+            if lmk_arr is None and box is not None:
+                roi_tracker.lost()
+                box = None
+                lmk_arr = _pose_landmarks(pose, frame)
+            timings["pose"] = time.perf_counter() - t0
+            STAGE_LATENCY.observe(timings["pose"], stage="pose_inference")
+
+    if roi_tracker is not None:
+        if lmk_arr is not None and box is not None:
+            lmk_arr = RoiTracker.to_frame(lmk_arr, box, frame.shape)
+        roi_tracker.update(lmk_arr, frame.shape)
+        timings["roi"] = box
+    landmarks = lmk_arr.tolist() if lmk_arr is not None else None
+    if motion_gate is not None:
+        motion_gate.inferred(landmarks)
+    return landmarks, timings, (frame.shape[1], frame.shape[0])
+
+def _extract_frame_landmarks(frame_b64: str) -> Optional[List[List[float]]]:
+    """Decode a base64 image and run Pose on it. Runs on pose_executor."""
+    # Decode base64 to image
+    with STAGE_LATENCY.time(stage="base64_decode"):
+        img_data = base64.b64decode(frame_b64)
+    landmarks, _, _ = _extract_image_landmarks(img_data)
+    return landmarks
+
+def _session_inference(session_id: Optional[str]) -> Tuple[Optional[InferenceScheduler], Optional[RoiTracker], Optional[MotionGate]]:
+    """Inference scheduler, ROI tracker and motion gate of an active session; all None for plain gate keys."""
+    if not session_id:
+        return None, None, None
+    with session_lock:
+        session = active_sessions.get(session_id)
+        if not session:
+            return None, None, None
+        return session.get("inference_scheduler"), session.get("roi_tracker"), session.get("motion_gate")
+
+SUPERSEDED_FRAME_RESPONSE = {"message": "Frame superseded by a newer frame", "dropped": True, "landmarks": []}
 
 @app.post("/analysis/base64_frame")
 async def analyze_base64_frame(data: Dict[str, str] = Body(...)):
     """
     Accepts a base64-encoded image, extracts pose landmarks using MediaPipe,
     and returns the list of (x, y, z) coordinates for each landmark.
-    """
-    try:
-        frame_b64 = data.get("frame_b64")
-        if not frame_b64:
-            raise HTTPException(status_code=400, detail="Missing 'frame_b64' field")
 
-        # Decode base64 to image
-        img_data = base64.b64decode(frame_b64)
-        np_arr = np.frombuffer(img_data, np.uint8)
-        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Failed to decode image")
+    With an optional "session_id", frames from the same client are processed
+    one at a time and only the newest waiting frame is kept; older waiting
+    frames return immediately with "dropped": true.
+    """
+    frame_b64 = data.get("frame_b64")
+    if not frame_b64:
+        raise HTTPException(status_code=400, detail="Missing 'frame_b64' field")
 
-        # Process frame with Mediapipe
-        with mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5) as pose:
-            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            if not results.pose_landmarks:
-                return {"message": "No pose detected", "landmarks": []}
+    gate_key = data.get("session_id")
+    if gate_key and not await frame_gate.acquire(gate_key):
+        FRAMES_SUPERSEDED.inc()
+        return SUPERSEDED_FRAME_RESPONSE
 
-            landmarks = [
-                [lm.x, lm.y, lm.z] for lm in results.pose_landmarks.landmark
-            ]
+    try:
+        loop = asyncio.get_running_loop()
+        async with pose_limiter:
+            landmarks = await loop.run_in_executor(pose_executor, _extract_frame_landmarks, frame_b64)
+        if landmarks is None:
+            return {"message": "No pose detected", "landmarks": []}
 
         return {
             "message": "Pose extracted successfully",
@@ -252,8 +620,198 @@ async def analyze_base64_frame(data: Dict[str, str] = Body(...)):
             "landmarks": landmarks
         }
 
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Frame analysis failed: {str(e)}")
+    finally:
+        if gate_key:
+            frame_gate.release(gate_key)
+
+async def _analyze_image_bytes(img_data: bytes, scale: int, session_id: Optional[str]) -> JSONResponse:
+    """Shared path for the binary frame endpoints; adds timing headers to the response."""
+    if not img_data:
+        raise HTTPException(status_code=400, detail="Empty image body")
+    if scale not in IMDECODE_FLAGS:
+        raise HTTPException(status_code=400, detail=f"scale must be one of {sorted(IMDECODE_FLAGS)}")
+
+    if session_id and not await frame_gate.acquire(session_id):
+        FRAMES_SUPERSEDED.inc()
+        return JSONResponse(content=SUPERSEDED_FRAME_RESPONSE)
+
+    try:
+        loop = asyncio.get_running_loop()
+        # Session frames are serialized by frame_gate, so the tracker and gate are never shared
+        scheduler, roi_tracker, motion_gate = _session_inference(session_id)
+        complexity = scheduler.complexity if scheduler else None
+        t_wait = time.perf_counter()
+        async with pose_limiter:
+            queue_s = time.perf_counter() - t_wait
+            landmarks, timings, (width, height) = await loop.run_in_executor(
+                pose_executor, _extract_image_landmarks, img_data, scale, complexity, roi_tracker,
+                motion_gate
+            )
+        headers = {
+            "Server-Timing": (
+                f"queue;dur={queue_s * 1000:.1f}, "
+                f"decode;dur={timings['decode'] * 1000:.1f}, "
+                f"pose;dur={timings['pose'] * 1000:.1f}"
+            ),
+            "X-Decoded-Size": f"{width}x{height}",
+            "X-Upload-Bytes": str(len(img_data)),
+        }
+        skipped = timings.get("motion_skipped", False)
+        if motion_gate is not None:
+            headers["X-Pose-Skipped"] = "1" if skipped else "0"
+            if skipped:
+                POSE_MOTION_SKIPPED.inc()
+        if scheduler is not None and not skipped:
+            # Session frames steer the session's model choice and pacing hint
+            if timings.get("model_unavailable"):
+                scheduler.reject(complexity)
+            scheduler.record("inference", timings["pose"])
+            scheduler.record("e2e", queue_s + timings["decode"] + timings["pose"])
+            scheduler.update()
+        if scheduler is not None:
+            headers["X-Model-Complexity"] = str(complexity)
+            headers["X-Frame-Interval-Ms"] = f"{scheduler.interval * 1000:.0f}"
+        if roi_tracker is not None and not skipped:
+            roi = timings.get("roi")
+            headers["X-Pose-Roi"] = ",".join(str(v) for v in roi) if roi else "full"
+        if landmarks is None:
+            return JSONResponse(content={"message": "No pose detected", "landmarks": []}, headers=headers)
+        return JSONResponse(content={
+            "message": "Pose extracted successfully",
+            "num_landmarks": len(landmarks),
+            "landmarks": landmarks
+        }, headers=headers)
+
+    except (HTTPException, AdmissionRejected):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Frame analysis failed: {str(e)}")
+    finally:
+        if session_id:
+            frame_gate.release(session_id)
+
+@app.post("/analysis/frame")
+async def analyze_raw_frame(request: Request, scale: int = 1, session_id: Optional[str] = None):
+    """
+    Accepts a raw encoded image body (Content-Type: image/jpeg or image/png) and
+    returns pose landmarks. Avoids the base64 and JSON overhead of
+    /analysis/base64_frame. `scale` of 2, 4 or 8 decodes at reduced resolution.
+    Per-stage timings are returned in the Server-Timing header.
+    """
+    img_data = await request.body()
+    return await _analyze_image_bytes(img_data, scale, session_id)
+
+@app.post("/analysis/frame_upload")
+async def analyze_uploaded_frame(file: UploadFile = File(...), scale: int = Form(1),
+                                 session_id: Optional[str] = Form(None)):
+    """Multipart variant of /analysis/frame for clients that send form uploads."""
+    img_data = await file.read()
+    return await _analyze_image_bytes(img_data, scale, session_id)
+
+def _get_video_process_pool() -> ProcessPoolExecutor:
+    global video_process_pool
+    # A worker killed mid-job (e.g. OOM) leaves the pool unusable; start a fresh one
+    if video_process_pool is None or video_process_pool._broken:
+        # spawn: workers import only video_analysis' dependencies, never this server
+        video_process_pool = ProcessPoolExecutor(
+            max_workers=VIDEO_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return video_process_pool
+
+def _run_video_job(job: VideoAnalysisJob):
+    """Runs on video_job_executor."""
+    if not job.trainer_seq:
+        TEMPLATE_EXTRACTIONS.inc()
+        POSE_GRAPH_CONSTRUCTIONS.inc()
+    with STAGE_LATENCY.time(stage="video_job"):
+        job.run(_get_video_process_pool(), VIDEO_WORKERS)
+
+def _get_video_job(job_id: str) -> VideoAnalysisJob:
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/analysis/video_jobs", status_code=202)
+async def create_video_job(request: Request, filename: str = "workout.mp4",
+                           trainer_template_id: Optional[str] = None,
+                           trainer_video_path: Optional[str] = None,
+                           priority_joints: str = "",
+                           priority_weight: float = 1.8,
+                           nonpriority_weight: float = 0.2) -> Dict[str, Any]:
+    """
+    Upload a recorded workout (raw request body) for offline per-rep scoring.
+
+    The video is split into segments that are pose-extracted in parallel worker
+    processes; reps are detected and scored as segments complete. Poll
+    /analysis/video_jobs/{job_id} or stream /analysis/video_jobs/{job_id}/reps.
+    priority_joints is a comma-separated list, e.g. "elbow,shoulder".
+    """
+    trainer_seq = None
+    if trainer_template_id:
+        stored = await asyncio.get_running_loop().run_in_executor(
+            template_executor, template_store.load, trainer_template_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Unknown trainer_template_id")
+        trainer_seq = list(stored)
+    elif not trainer_video_path:
+        raise HTTPException(status_code=400, detail="Either trainer_template_id or trainer_video_path is required")
+    elif not os.path.exists(trainer_video_path):
+        raise HTTPException(status_code=404, detail="Trainer video file not found")
+
+    suffix = os.path.splitext(filename)[1] or ".mp4"
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix, prefix="user_video_")
+    try:
+        await _stream_body_to_file(request, fd, TEMPLATE_MAX_UPLOAD_BYTES)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    job = VideoAnalysisJob(
+        str(uuid.uuid4()), tmp_path, trainer_seq, trainer_video_path,
+        priority=[t.strip() for t in priority_joints.split(",") if t.strip()],
+        priority_weight=priority_weight, nonpriority_weight=nonpriority_weight,
+    )
+    video_jobs[job.job_id] = job
+    # Forget the oldest finished jobs once over the cap
+    for old_id in [jid for jid, j in video_jobs.items() if j.done][:max(0, len(video_jobs) - VIDEO_MAX_JOBS)]:
+        del video_jobs[old_id]
+    asyncio.get_running_loop().run_in_executor(video_job_executor, _run_video_job, job)
+    return {"job_id": job.job_id, "status": job.status}
+
+@app.get("/analysis/video_jobs/{job_id}")
+async def get_video_job(job_id: str) -> Dict[str, Any]:
+    """Job progress, timing and every rep scored so far."""
+    job = _get_video_job(job_id)
+    result = job.snapshot()
+    result["reps"] = list(job.reps)
+    return result
+
+@app.get("/analysis/video_jobs/{job_id}/reps")
+async def stream_video_job_reps(job_id: str):
+    """
+    Newline-delimited JSON: one line per rep as soon as it is scored, then a
+    final line with the job summary ("done": true).
+    """
+    job = _get_video_job(job_id)
+
+    async def rep_lines():
+        sent = 0
+        while True:
+            done = job.done
+            reps = job.reps[sent:]
+            for rep in reps:
+                yield json.dumps(rep) + "\n"
+            sent += len(reps)
+            if done:
+                yield json.dumps(dict(job.snapshot(), done=True)) + "\n"
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(rep_lines(), media_type="application/x-ndjson")
 
 @app.get("/sessions/{session_id}/status")
 async def get_session_status(session_id: str) -> SessionStatus:
@@ -282,55 +840,55 @@ async def get_session_status(session_id: str) -> SessionStatus:
             current_rep_scores=rep_scores,
             average_score=average_score,
             start_time=session["start_time"],
-            last_activity=session["last_activity"]
+            last_activity=session["last_activity"],
+            inference=_inference_snapshot(session),
         )
 
-@app.post("/sessions/{session_id}/analyze")
-async def analyze_pose(session_id: str, request: FeedbackRequest) -> AnalysisResult:
-    """Analyze user pose and provide feedback."""
-    with session_lock:
-        if session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session = active_sessions[session_id]
-        if session["status"] != "ready":
-            raise HTTPException(status_code=400, detail="Session not ready")
-    
-    try:
-        # Convert landmarks to numpy arrays
-        user_landmarks = np.array(request.user_landmarks, dtype=np.float32)
-        trainer_landmarks = np.array(request.trainer_landmarks, dtype=np.float32)
-        
-        # Get session data
-        trainer_template = session["trainer_template"]
-        feedback_system = session["feedback_system"]
-        
-        # Compute user angles
-        user_angles = compute_angles_for_seq([user_landmarks])
+def _inference_snapshot(session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Scheduler state plus motion-gate counts for SessionStatus.inference."""
+    scheduler = session.get("inference_scheduler")
+    if scheduler is None:
+        return None
+    snapshot = scheduler.snapshot()
+    motion_gate = session.get("motion_gate")
+    if motion_gate is not None:
+        snapshot["motion_skipped_frames"] = motion_gate.skipped
+        snapshot["motion_skip_ratio"] = round(motion_gate.skip_ratio, 3)
+    return snapshot
+
+def _run_session_analysis(user_landmarks: np.ndarray, trainer_template: Dict[str, Any],
+                          feedback_system: ExerciseFeedbackSystem) -> AnalysisResult:
+    """Score a user window against a session's trainer template. Runs on analysis_executor."""
+    # Compute user angles
+    with STAGE_LATENCY.time(stage="angles"):
+        user_angles = compute_angles_for_seq(list(user_landmarks))
+    with STAGE_LATENCY.time(stage="smooth_resample"):
         user_angles = smooth_angles(user_angles, window=5)
         user_angles = resample_to_length(user_angles, len(trainer_template["angles"]))
-        
-        # Calculate DTW distance
+    
+    # Calculate DTW distance
+    with STAGE_LATENCY.time(stage="dtw"):
         dist = dtw_distance_l1(
             user_angles, 
             trainer_template["angles"], 
             weights=trainer_template["weights"]
         )
-        
-        # Calculate similarity score
-        score = np.exp(-0.03 * dist)
-        
-        # Calculate motion amplitude
-        user_motion_amp = masked_motion_amplitude(
-            user_angles, 
-            trainer_template["priority_mask"]
-        )
-        trainer_motion_amp = masked_motion_amplitude(
-            trainer_template["angles"], 
-            trainer_template["priority_mask"]
-        )
-        
-        # Generate feedback
+    
+    # Calculate similarity score
+    score = np.exp(-REP_SCORE_DEFAULTS.dist_scale * dist)
+    
+    # Calculate motion amplitude
+    user_motion_amp = masked_motion_amplitude(
+        user_angles, 
+        trainer_template["priority_mask"]
+    )
+    trainer_motion_amp = masked_motion_amplitude(
+        trainer_template["angles"], 
+        trainer_template["priority_mask"]
+    )
+    
+    # Generate feedback
+    with STAGE_LATENCY.time(stage="feedback"):
         feedback = feedback_system.analyze_rep_performance(
             user_angles, 
             trainer_template["angles"],
@@ -339,31 +897,59 @@ async def analyze_pose(session_id: str, request: FeedbackRequest) -> AnalysisRes
             score,
             trainer_template["priority_mask"]
         )
+    
+    # Joint analysis
+    joint_analysis = {}
+    joint_names = ['elbow_l', 'elbow_r', 'shoulder_l', 'shoulder_r', 
+                  'hip_l', 'hip_r', 'knee_l', 'knee_r']
+    
+    for i, joint_name in enumerate(joint_names):
+        if i < user_angles.shape[1]:
+            user_joint = user_angles[:, i]
+            trainer_joint = trainer_template["angles"][:, i]
+            joint_diff = np.mean(np.abs(user_joint - trainer_joint))
+            joint_analysis[joint_name] = float(joint_diff)
+    
+    return AnalysisResult(
+        score=float(score),
+        feedback=feedback,
+        joint_analysis=joint_analysis,
+        motion_amplitude=float(user_motion_amp),
+        rep_detected=False  # This would need more sophisticated rep detection
+    )
+
+@app.post("/sessions/{session_id}/analyze")
+async def analyze_pose(session_id: str, request: FeedbackRequest) -> AnalysisResult:
+    """Analyze user pose and provide feedback."""
+    with session_lock:
+        if session_id not in active_sessions:
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        # Joint analysis
-        joint_analysis = {}
-        joint_names = ['elbow_l', 'elbow_r', 'shoulder_l', 'shoulder_r', 
-                      'hip_l', 'hip_r', 'knee_l', 'knee_r']
+        session = active_sessions[session_id]
+        if session["status"] != "ready":
+            raise HTTPException(status_code=400, detail="Session not ready")
+    
+    try:
+        # Convert landmarks to numpy arrays
+        user_landmarks = np.array(request.user_landmarks, dtype=np.float32)
         
-        for i, joint_name in enumerate(joint_names):
-            if i < user_angles.shape[1]:
-                user_joint = user_angles[:, i]
-                trainer_joint = trainer_template["angles"][:, i]
-                joint_diff = np.mean(np.abs(user_joint - trainer_joint))
-                joint_analysis[joint_name] = float(joint_diff)
+        loop = asyncio.get_running_loop()
+        async with analysis_limiter:
+            result = await loop.run_in_executor(
+                analysis_executor, _run_session_analysis,
+                user_landmarks, session["trainer_template"], session["feedback_system"]
+            )
         
         # Update session
         with session_lock:
-            active_sessions[session_id]["last_activity"] = datetime.now()
+            if session_id in active_sessions:
+                active_sessions[session_id]["last_activity"] = datetime.now()
+                session_expiry.touch(session_id)
         
-        return AnalysisResult(
-            score=float(score),
-            feedback=feedback,
-            joint_analysis=joint_analysis,
-            motion_amplitude=float(user_motion_amp),
-            rep_detected=False  # This would need more sophisticated rep detection
-        )
+        return result
     
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -377,6 +963,7 @@ async def complete_rep(session_id: str, score: float = Form(...)) -> Dict[str, A
         session = active_sessions[session_id]
         session["rep_scores"].append(score)
         session["last_activity"] = datetime.now()
+        session_expiry.touch(session_id)
         
         return {
             "rep_number": len(session["rep_scores"]),
@@ -410,9 +997,9 @@ async def get_session_summary(session_id: str) -> SummaryStats:
     # Calculate statistics
     total_reps = len(rep_scores)
     average_score = np.mean(rep_scores)
-    excellent_reps = sum(1 for s in rep_scores if s >= 0.8)
-    good_reps = sum(1 for s in rep_scores if s >= 0.5)
-    poor_reps = sum(1 for s in rep_scores if s < 0.5)
+    excellent_reps = sum(1 for s in rep_scores if s >= REP_SCORE_DEFAULTS.excellent)
+    good_reps = sum(1 for s in rep_scores if s >= REP_SCORE_DEFAULTS.good)
+    poor_reps = sum(1 for s in rep_scores if s < REP_SCORE_DEFAULTS.good)
     best_score = max(rep_scores)
     worst_score = min(rep_scores)
     
@@ -449,74 +1036,113 @@ async def end_session(session_id: str) -> Dict[str, Any]:
         
         session = active_sessions[session_id]
         session["status"] = "completed"
-        
-        # Get final summary
-        summary = await get_session_summary(session_id)
-        
-        # Clean up session (optional - you might want to keep for history)
-        # del active_sessions[session_id]
-        
-        return {
-            "session_id": session_id,
-            "status": "completed",
-            "summary": summary
-        }
+    
+    # Get final summary (takes session_lock itself)
+    summary = await get_session_summary(session_id)
+    
+    # Clean up session (optional - you might want to keep for history)
+    # del active_sessions[session_id]
+    
+    return {
+        "session_id": session_id,
+        "status": "completed",
+        "summary": summary
+    }
+
+def _run_standalone_analysis(user_landmarks: np.ndarray, trainer_template_id: str,
+                             trainer_features: Dict[str, Any]) -> AnalysisResult:
+    """Score a user window against cached trainer features. Runs on analysis_executor."""
+    # Compute angles for the user; trainer angles come from the cache
+    with STAGE_LATENCY.time(stage="angles"):
+        user_angles = compute_angles_for_seq(list(user_landmarks))
+    trainer_angles = trainer_features["angles"]
+    
+    # Calculate DTW distance
+    with STAGE_LATENCY.time(stage="dtw"):
+        dist = dtw_distance_l1(user_angles, trainer_angles)
+    score = np.exp(-REP_SCORE_DEFAULTS.dist_scale * dist)
+    
+    # Calculate motion amplitude
+    user_motion_amp = total_motion_amplitude(user_angles)
+    trainer_motion_amp = trainer_features["motion_amplitude"]
+    
+    # Simple feedback based on score
+    if score >= 0.8:
+        feedback = "Excellent form!"
+    elif score >= 0.6:
+        feedback = "Good form, keep it up!"
+    elif score >= 0.4:
+        feedback = "Not bad, try to improve your form"
+    else:
+        feedback = "Focus on matching the trainer's movement"
+    
+    # Joint analysis
+    joint_analysis = {}
+    joint_names = ['elbow_l', 'elbow_r', 'shoulder_l', 'shoulder_r', 
+                  'hip_l', 'hip_r', 'knee_l', 'knee_r']
+    # Windows rarely match the trainer length; compare joints frame-for-frame after resampling
+    user_aligned = resample_to_length(user_angles, len(trainer_angles))
+    
+    for i, joint_name in enumerate(joint_names):
+        if i < user_angles.shape[1] and i < trainer_angles.shape[1]:
+            user_joint = user_aligned[:, i]
+            trainer_joint = trainer_angles[:, i]
+            joint_diff = np.mean(np.abs(user_joint - trainer_joint))
+            joint_analysis[joint_name] = float(joint_diff)
+    
+    return AnalysisResult(
+        score=float(score),
+        feedback=feedback,
+        joint_analysis=joint_analysis,
+        motion_amplitude=float(user_motion_amp),
+        rep_detected=False,
+        trainer_template_id=trainer_template_id
+    )
 
 @app.post("/analysis/pose")
 async def analyze_pose_standalone(request: FeedbackRequest) -> AnalysisResult:
-    """Analyze pose without a session (standalone analysis)."""
+    """
+    Analyze pose without a session (standalone analysis).
+
+    Trainer features are cached by content hash; the returned
+    trainer_template_id can be sent instead of trainer_landmarks next time.
+    """
+    trainer_template_id = request.trainer_template_id
+    trainer_features = trainer_cache.get(trainer_template_id) if trainer_template_id else None
+    trainer_arr = None
+    if trainer_features is None and request.trainer_landmarks is not None:
+        trainer_arr = np.array(request.trainer_landmarks, dtype=np.float32)
+    elif trainer_features is None and trainer_template_id:
+        # Uploaded templates share the id scheme; load from disk on a cache miss
+        trainer_arr = await asyncio.get_running_loop().run_in_executor(
+            template_executor, template_store.load, trainer_template_id)
+    if trainer_features is None and trainer_arr is None:
+        if trainer_template_id:
+            raise HTTPException(status_code=404, detail="Trainer template not found, resend trainer_landmarks")
+        raise HTTPException(status_code=400, detail="Either trainer_landmarks or trainer_template_id is required")
+
     try:
         # Convert landmarks to numpy arrays
         user_landmarks = np.array(request.user_landmarks, dtype=np.float32)
-        trainer_landmarks = np.array(request.trainer_landmarks, dtype=np.float32)
-        
-        # Compute angles for both
-        user_angles = compute_angles_for_seq([user_landmarks])
-        trainer_angles = compute_angles_for_seq([trainer_landmarks])
-        
-        # Calculate DTW distance
-        dist = dtw_distance_l1(user_angles, trainer_angles)
-        score = np.exp(-0.03 * dist)
-        
-        # Calculate motion amplitude
-        user_motion_amp = total_motion_amplitude(user_angles)
-        trainer_motion_amp = total_motion_amplitude(trainer_angles)
-        
-        # Simple feedback based on score
-        if score >= 0.8:
-            feedback = "Excellent form!"
-        elif score >= 0.6:
-            feedback = "Good form, keep it up!"
-        elif score >= 0.4:
-            feedback = "Not bad, try to improve your form"
-        else:
-            feedback = "Focus on matching the trainer's movement"
-        
-        # Joint analysis
-        joint_analysis = {}
-        joint_names = ['elbow_l', 'elbow_r', 'shoulder_l', 'shoulder_r', 
-                      'hip_l', 'hip_r', 'knee_l', 'knee_r']
         
-        for i, joint_name in enumerate(joint_names):
-            if i < user_angles.shape[1] and i < trainer_angles.shape[1]:
-                user_joint = user_angles[:, i]
-                trainer_joint = trainer_angles[:, i]
-                joint_diff = np.mean(np.abs(user_joint - trainer_joint))
-                joint_analysis[joint_name] = float(joint_diff)
-        
-        return AnalysisResult(
-            score=float(score),
-            feedback=feedback,
-            joint_analysis=joint_analysis,
-            motion_amplitude=float(user_motion_amp),
-            rep_detected=False
-        )
+        loop = asyncio.get_running_loop()
+        async with analysis_limiter:
+            if trainer_features is None:
+                trainer_template_id, trainer_features = await loop.run_in_executor(
+                    analysis_executor, trainer_cache.get_or_compute, trainer_arr
+                )
+            return await loop.run_in_executor(
+                analysis_executor, _run_standalone_analysis,
+                user_landmarks, trainer_template_id, trainer_features
+            )
     
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.get("/sessions")
-async def list_sessions() -> Dict[str, List[str]]:
+async def list_sessions() -> Dict[str, Any]:
     """List all active sessions."""
     with session_lock:
         return {
@@ -531,29 +1157,65 @@ async def delete_session(session_id: str) -> Dict[str, str]:
         if session_id not in active_sessions:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        del active_sessions[session_id]
+        _release_session(session_id, active_sessions.pop(session_id))
+        session_expiry.discard(session_id)
         return {"message": "Session deleted successfully"}
 
 # Background task to clean up old sessions
 @app.on_event("startup")
 async def startup_event():
     """Initialize background tasks."""
-    asyncio.create_task(cleanup_old_sessions())
+    global pose_pool
+    if POSE_WORKERS > 0:
+        pose_pool = PoseWorkerPool(POSE_WORKERS)
+        POSE_GRAPH_CONSTRUCTIONS.inc(POSE_WORKERS)
+        # Don't accept frames until every worker's graph is warm
+        await asyncio.get_running_loop().run_in_executor(None, pose_pool.wait_ready, 60.0)
+    asyncio.create_task(expire_sessions())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop pose worker processes and release shared memory."""
+    global pose_pool
+    if pose_pool is not None:
+        pose_pool.close()
+        pose_pool = None
+    if video_process_pool is not None:
+        video_process_pool.shutdown(wait=False, cancel_futures=True)
+
+def _release_session(session_id: str, session: Dict[str, Any]) -> None:
+    """
+    Drop heavy per-session state (template, feedback, scheduler, ROI tracker and motion
+    gate with its thumbnail and last landmarks) so it is freed even if a request still
+    holds the dict, and forget the session's frame gate entry. Call on the event loop.
+    """
+    for key in ("trainer_template", "feedback_system", "inference_scheduler", "roi_tracker", "motion_gate"):
+        session[key] = None
+    frame_gate.discard(session_id)
 
-async def cleanup_old_sessions():
-    """Clean up sessions older than 1 hour."""
+async def expire_sessions():
+    """
+    Evict sessions idle for longer than SESSION_TTL_SECONDS.
+
+    Sleeps until the earliest deadline in the expiry heap rather than polling,
+    and only touches the sessions that actually expired.
+    """
     while True:
-        await asyncio.sleep(300)  # Check every 5 minutes
-        current_time = datetime.now()
+        next_deadline = session_expiry.next_deadline()
+        # New sessions get deadlines at least one TTL away, so never sleeping
+        # longer than the TTL means none of them is missed while we wait
+        max_sleep = min(60.0, SESSION_TTL_SECONDS)
+        delay = max_sleep if next_deadline is None else next_deadline - time.monotonic()
+        await asyncio.sleep(min(max(delay, 0.0), max_sleep))
         
-        with session_lock:
-            sessions_to_remove = []
-            for session_id, session in active_sessions.items():
-                if (current_time - session["last_activity"]).seconds > 3600:  # 1 hour
-                    sessions_to_remove.append(session_id)
-            
-            for session_id in sessions_to_remove:
-                del active_sessions[session_id]
+        for session_id in session_expiry.pop_expired():
+            with session_lock:
+                # Touched again between pop and now: keep it
+                if session_id in session_expiry:
+                    continue
+                session = active_sessions.pop(session_id, None)
+            if session is not None:
+                _release_session(session_id, session)
 
 if __name__ == "__main__":
     import uvicorn
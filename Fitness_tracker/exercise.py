@@ -1,12 +1,15 @@
 # live_side_by_side.py
 import argparse
+import os
+import queue
+import threading
 import time
 from collections import deque
 
 import cv2
 import mediapipe as mp
 import numpy as np
-import torch
+from mediapipe.framework.formats import landmark_pb2
 from ui_priority import show_priority_ui, show_setup_ui, build_weights_from_priority
 from scoring import (
     preprocess_for_gcn,
@@ -22,11 +25,24 @@ from scoring import (
     build_priority_mask,
     smooth_angles,
     resample_to_length,
+    resample_by_time,
+    rep_window_angles,
+    rep_features,
+    rep_scores_from_features,
+    REP_SCORE_DEFAULTS,
 )
 from orientation import compute_forward_vector_3d, average_forward_vector
 from weights_detection import detect_weights
 from feedback_system import create_feedback_system
-from summary_window import show_exercise_summary
+from trainer_playback import TrainerFrameCache
+from live_pipeline import CameraSource, CaptureThread, LatestSlot, SyntheticSource, VideoFileSource
+from feature_store import PoseFeatureStore
+from inference_scheduler import InferenceScheduler
+from roi_tracker import RoiTracker
+from motion_gate import MotionGate
+from landmark_filter import OneEuroFilter, PoseUpsampler
+from live_stats import EventLog, RateLimitedLog, StageStats, draw_stats_hud
+from session_recording import SessionRecorder
 
 # SimpleGCN no longer used (angle-based scoring)
 
@@ -47,19 +63,134 @@ def extract_landmarks(frame_bgr, pose_model):
         return result.pose_landmarks, arr
     return None, None
 
-def extract_pose_sequence(video_path):
-    cap = cv2.VideoCapture(video_path)
-    seq = []
-    with mp_pose.Pose() as pose_trainer:
-        while cap.isOpened():
+def extract_landmarks_roi(frame_bgr, pose_model, tracker):
+    """
+    extract_landmarks on the RoiTracker's crop of the frame; the proto and array come
+    back in full-frame normalized coordinates. Retries on the full frame if the crop
+    lost the person.
+    """
+    crop, box = tracker.crop(frame_bgr)
+    lmk_obj, lmk_arr = extract_landmarks(crop, pose_model)
+    if box is not None:
+        if lmk_arr is None:
+            tracker.lost()
+            lmk_obj, lmk_arr = extract_landmarks(frame_bgr, pose_model)
+        else:
+            lmk_arr = tracker.to_frame(lmk_arr, box, frame_bgr.shape)
+            for lm, (x, y, z) in zip(lmk_obj.landmark, lmk_arr):
+                lm.x, lm.y, lm.z = float(x), float(y), float(z)
+    tracker.update(lmk_arr, frame_bgr.shape)
+    return lmk_obj, lmk_arr
+
+def landmarks_to_proto(lmk_arr):
+    """Wrap a [33,3] landmark array as a NormalizedLandmarkList so mp_drawing can render it."""
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in lmk_arr
+    ])
+
+def downscale_frame(frame, max_size):
+    """Shrink a frame so its longer side is at most max_size (no-op when it already fits or max_size is None)."""
+    h, w = frame.shape[:2]
+    if not max_size or max(h, w) <= max_size:
+        return frame
+    s = max_size / float(max(h, w))
+    return cv2.resize(frame, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+
+_DECODE_DONE = object()
+
+def _decode_frames(cap, frame_q, stop, stride, max_size):
+    """Decoder thread: read every `stride`-th frame, downscale, convert to RGB, enqueue (index, rgb)."""
+    try:
+        idx = 0
+        while not stop.is_set():
+            if idx % stride:
+                # grab() skips the BGR copy-out for frames we drop
+                if not cap.grab():
+                    break
+                idx += 1
+                continue
             ok, frame = cap.read()
             if not ok:
                 break
-            lmk_obj, lmk_arr = extract_landmarks(frame, pose_trainer)
-            if lmk_arr is not None and lmk_arr.shape == (33, 3):
-                seq.append(lmk_arr)
-    cap.release()
-    return seq  # list of [33,3]
+            item = (idx, cv2.cvtColor(downscale_frame(frame, max_size), cv2.COLOR_BGR2RGB))
+            while not stop.is_set():
+                try:
+                    frame_q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            idx += 1
+    except Exception as e:
+        item = e
+    else:
+        item = _DECODE_DONE
+    while not stop.is_set():
+        try:
+            frame_q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+def extract_pose_sequence(video_path, stride=1, target_fps=None, max_size=None, as_array=False,
+                          return_frame_indices=False, queue_size=8):
+    """
+    Landmarks for every frame of a video where a pose is found.
+
+    Decoding (plus resize and RGB conversion) runs on a separate thread feeding a
+    bounded queue, so it overlaps with Pose inference on the calling thread.
+      stride: process every stride-th frame; target_fps overrides it from the source fps
+      max_size: downscale frames whose longer side exceeds this before inference
+                (landmarks are normalized, so results stay in the same coordinates)
+      as_array: return one [T,33,3] float32 array instead of a list of [33,3] arrays
+      return_frame_indices: also return the source frame index of each row
+    """
+    cap = cv2.VideoCapture(video_path)
+    if target_fps:
+        src_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if src_fps > 0:
+            stride = max(1, int(round(src_fps / float(target_fps))))
+    stride = max(1, int(stride))
+    # Preallocate from the container's frame count; grown if the header under-reports
+    est = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) // stride + 1
+    out = np.empty((max(est, 16), 33, 3), dtype=np.float32)
+    indices = np.empty((len(out),), dtype=np.int32)
+    n = 0
+
+    frame_q = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    decoder = threading.Thread(target=_decode_frames, args=(cap, frame_q, stop, stride, max_size),
+                               name="pose-seq-decoder", daemon=True)
+    decoder.start()
+    try:
+        with mp_pose.Pose() as pose_trainer:
+            while True:
+                item = frame_q.get()
+                if item is _DECODE_DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                idx, rgb = item
+                result = pose_trainer.process(rgb)
+                if not result.pose_landmarks:
+                    continue
+                if n == len(out):
+                    out = np.concatenate([out, np.empty_like(out)])
+                    indices = np.concatenate([indices, np.empty_like(indices)])
+                out[n] = [(lm.x, lm.y, lm.z) for lm in result.pose_landmarks.landmark]
+                indices[n] = idx
+                n += 1
+    finally:
+        stop.set()
+        decoder.join()
+        cap.release()
+
+    # Copy when the estimate overshot so the caller doesn't pin the unused tail
+    seq = out[:n] if n > len(out) // 2 else out[:n].copy()
+    if not as_array:
+        seq = list(seq)  # list of [33,3]
+    if return_frame_indices:
+        return seq, indices[:n].copy()
+    return seq
 
 # ------------------------------ Orientation (3D) ------------------------------
 # Moved to orientation.py
@@ -139,30 +270,37 @@ def derive_angle_thresholds(angle_series):
     hyst = max(0.05 * amp, 5.0)
     return float(lo), float(hi), float(amp), float(hyst)
 
-# ------------------------------ Main Live Session ------------------------------
-def run_live_session(trainer_video_path, device='cpu', hidden=64, priority=None, priority_weight=1.5, nonpriority_weight=0.5, require_weights=False):
-    # 1) Load trainer sequence
-    trainer_seq = extract_pose_sequence(trainer_video_path)
-    if len(trainer_seq) == 0:
-        print("[ERROR] Could not extract trainer landmarks.")
-        return
+# ------------------------------ Trainer reference & rep scoring ------------------------------
+REP_CHANNELS = ['elbow_l', 'elbow_r', 'knee_l', 'knee_r']
 
+def rep_channel_series(seq, chosen_name):
+    """1D angle series used for rep detection: one joint angle per frame."""
+    return np.asarray([extract_joint_angles_xy(fr)[chosen_name] for fr in seq], dtype=np.float32)
+
+def prepare_trainer_reference(trainer_seq, priority=None, priority_weight=1.5, nonpriority_weight=0.5,
+                              frame_times=None, rate=None):
+    """
+    Everything scoring needs from a trainer sequence: the rep-detection channel and
+    thresholds, the single-rep template (longest detected trainer rep, or the whole
+    sequence), its smoothed angles, per-joint weights and the priority mask.
+    Given frame_times (seconds, one per trainer_seq entry) and a rate, the template
+    angles are resampled onto an even `rate` Hz grid, and "rate"/"rep_seconds" let
+    the live scorer cut user windows by duration instead of by sample count.
+    """
     # Choose angle channel for rep detection from trainer
     trainer_angles = []
     for fr in trainer_seq:
         a = extract_joint_angles_xy(fr)
         # choose one angle (example: pick the one with max variance across trainer)
-        trainer_angles.append([a['elbow_l'], a['elbow_r'], a['knee_l'], a['knee_r']])
+        trainer_angles.append([a[name] for name in REP_CHANNELS])
     trainer_angles = np.asarray(trainer_angles)  # [T, 4]
     var_by_joint = trainer_angles.var(axis=0)
     chosen_idx = int(np.argmax(var_by_joint))
-    chosen_name = ['elbow_l','elbow_r','knee_l','knee_r'][chosen_idx]
+    chosen_name = REP_CHANNELS[chosen_idx]
     trainer_angle_1d = trainer_angles[:, chosen_idx]
 
     low_t, high_t, amp, hyst = derive_angle_thresholds(trainer_angle_1d)
 
-    # 2) Build trainer template (angles-based scoring; no GCN needed)
-
     # Detect rep segments on the trainer angle series to extract a single-rep template
     trainer_repdet = RepDetector(window=5, min_amp=amp, hysteresis=hyst)
     trainer_rep_segments = []
@@ -172,6 +310,8 @@ def run_live_session(trainer_video_path, device='cpu', hidden=64, priority=None,
             trainer_rep_segments.append(seg)
 
     # Choose the longest/most stable trainer rep as the template; fallback to full video if none
+    trainer_template_seq = trainer_seq
+    template_start = 0
     if trainer_rep_segments:
         trainer_rep_segments.sort(key=lambda se: se[1] - se[0], reverse=True)
         ts, te = trainer_rep_segments[0]
@@ -180,383 +320,752 @@ def run_live_session(trainer_video_path, device='cpu', hidden=64, priority=None,
         # enforce a minimal duration to avoid noise
         if te > ts + 2:
             trainer_template_seq = trainer_seq[ts:te+1]
+            template_start = ts
+
+    # Precompute trainer angles (smoothed), and weights for joints
+    template_angles = compute_angles_for_seq(trainer_template_seq)
+    timed = frame_times is not None and bool(rate)
+    if timed:
+        # Frames without a detected pose leave gaps; the grid fills them
+        times = np.asarray(frame_times, dtype=np.float64)[template_start:template_start + len(trainer_template_seq)]
+        template_angles = resample_by_time(times, template_angles, rate)
+    template_angles = smooth_angles(template_angles, window=5)
+    D = template_angles.shape[1]
+    weights = build_weights_from_priority(priority, priority_weight, nonpriority_weight, D)
+    return {
+        "chosen_name": chosen_name,
+        "thresholds": (low_t, high_t, amp, hyst),
+        "template_seq": trainer_template_seq,
+        "angles": template_angles,
+        "weights": weights,
+        "priority_mask": build_priority_mask(priority, D),
+        # Trainer forward orientation (3D) for coarse direction check
+        "forward": average_forward_vector(trainer_template_seq),
+        "rate": float(rate) if timed else None,
+        "rep_seconds": len(template_angles) / float(rate) if timed else None,
+    }
+
+def score_user_segment(user_segment, trainer_angles, weights, priority_mask, verbose=False):
+    """
+    Score one user rep (list of [33,3]) against the trainer template angles.
+    Angle-based DTW (best of nominal and left/right mirrored) times the priority-joint
+    amplitude ratio, with a penalty for excessive non-priority motion.
+    """
+    return score_user_angles(compute_angles_for_seq(user_segment), trainer_angles, weights, priority_mask, verbose)
+
+def score_user_angles(A_us, trainer_angles, weights, priority_mask, verbose=False, params=REP_SCORE_DEFAULTS):
+    """score_user_segment for a rep whose [T, 8] joint angles are already computed."""
+    # Angle-based DTW (auto-mirrored) with amplitude penalty; the constants are in params
+    features = rep_features(A_us, trainer_angles, weights, priority_mask)
+    score = float(rep_scores_from_features(features, params)[0])
+    if verbose:
+        dist, amp_user_pr, amp_trainer_pr, amp_user_np, amp_trainer_np = features
+        base_score = float(np.exp(-params.dist_scale * dist) * min(amp_user_pr / (amp_trainer_pr + 1e-6), 1.0))
+        if base_score < params.gate:
+            print(f"[DEBUG] Priority motion poor ({base_score:.3f}), skipping non-priority check")
+        else:
+            np_motion_ratio = amp_user_np / (amp_trainer_np + 1e-6)
+            verdict = "Excessive non-priority motion detected" if score < base_score else "Non-priority motion OK"
+            print(f"[DEBUG] {verdict}: user={amp_user_np:.3f}, trainer={amp_trainer_np:.3f}, ratio={np_motion_ratio:.2f}")
+            print(f"[SCORING] Final score: {score:.3f}")
+    return score
+
+# ------------------------------ Main Live Session ------------------------------
+class LiveSessionScorer:
+    """
+    Pre-start gates (weights -> orientation), trainer-loop-driven rep scoring and
+    feedback for one live session. Runs on the scoring worker: add_sample() is fed
+    every user pose, step() does the (possibly slow) DTW / weights checks on the
+    newest one. The UI thread only calls notify_trainer_loop(),
+    take_trainer_restart() and reads hud(), none of which wait on scoring work.
+    """
+    def __init__(self, reference, feedback_system, require_weights=False, max_sample_rate=None, stats=None,
+                 events=None):
+        self.trainer_angles = reference["angles"]
+        self.trainer_forward = reference["forward"]
+        self.default_weights = reference["weights"]
+        self.priority_mask = reference["priority_mask"]
+        self.feedback_system = feedback_system
+        self.require_weights = require_weights
+        # DTW and feedback timings; repeated status lines go through a rate-limited log
+        self.stats = stats if stats is not None else StageStats()
+        self.log = RateLimitedLog()
+        # Optional callable(event, **fields) receiving phase changes, rep scores and feedback
+        self.events = events
+
+        # Recent user frames with their angles/forward vectors, sliced by trainer rep duration
+        self.trainer_rep_len = max(1, len(self.trainer_angles))
+        self.align_needed_len = min(24, len(self.trainer_angles))
+        # With a timed reference, user windows are cut by capture time and resampled
+        # onto the trainer's grid, so they span the same duration at any sample rate
+        self.rate = reference.get("rate")
+        # keep ~2 reps worth of frames (and at least the alignment window)
+        capacity = 2 * self.trainer_rep_len
+        if self.rate and max_sample_rate:
+            capacity = int(np.ceil(capacity * max(1.0, max_sample_rate / self.rate)))
+        self.features = PoseFeatureStore(capacity, forward_window=self.align_needed_len)
+        self.rep_scores = []
+        self.last_rep_score = None
+
+        # Alignment/weights gates (continuous)
+        self.trainer_align_ref = self.trainer_angles[:self.align_needed_len]
+        self.align_margin_deg = 2.0
+        self.wrist_hist = deque(maxlen=45)
+        self.weights_ok = (not require_weights)
+        self.orient_ok = False
+        # Pre-start gates: sequential phases (weights -> orientation), then start
+        self.pre_start_mode = True
+        self.pre_start_phase = 'weights' if require_weights else 'orientation'
+        self.weights_message_time = 0.0  # timestamp when weights equipped message starts
+        self.orientation_message_time = 0.0  # timestamp when orientation aligned message starts
+        self.stable_orient_ok = False
+        self.stable_weights_ok = (not require_weights)
+        self.orientation_locked = False  # Once True, stop checking orientation
+        self.weights_locked = (not require_weights)  # Once True, stop checking weights
+
+        # State for showing start message
+        self.show_start_message = False
+        self.start_message_time = 0.0
+
+        # Feedback system state
+        self.current_feedback = ""
+        self.feedback_display_time = 0.0
+        self.feedback_duration = 3.0  # Show feedback for 3 seconds
+
+        # Shared with the UI thread; only held for flag updates
+        self._loop_lock = threading.Lock()
+        self._loop_pending = False
+        self._restart_trainer = False
+
+    def notify_trainer_loop(self):
+        """UI thread: the trainer clip wrapped around. Coalesces until step() consumes it."""
+        with self._loop_lock:
+            self._loop_pending = True
+
+    def take_trainer_restart(self):
+        """UI thread: True once when the workout starts and the trainer clip should restart."""
+        with self._loop_lock:
+            restart, self._restart_trainer = self._restart_trainer, False
+            if restart:
+                self._loop_pending = False
+            return restart
+
+    def _peek_loop(self):
+        with self._loop_lock:
+            return self._loop_pending
+
+    def _clear_loop(self):
+        with self._loop_lock:
+            self._loop_pending = False
+
+    def add_sample(self, us_lmk_arr, t):
+        """Append one [33, 3] user pose captured at time t to the rolling buffers."""
+        self.features.append(us_lmk_arr, t)
+        if self.pre_start_mode and self.pre_start_phase == 'weights' and not self.weights_locked and self.require_weights:
+            self.wrist_hist.append(us_lmk_arr[[15, 16, 11, 12], :2])  # x,y only
+
+    def _window_ready(self, n):
+        """Enough user samples for an n-sample trainer window (n grid steps of time with a rate)."""
+        if not self.rate:
+            return len(self.features) >= n
+        times = self.features.times.latest()
+        return len(times) > 0 and times[-1] - times[0] >= (n - 1) / self.rate
+
+    def _recent_angles(self, n):
+        """The user's last n samples on the trainer's time grid (simply the last n samples without a rate)."""
+        return rep_window_angles(self.features.times.latest(), self.features.angles.latest(), n, self.rate)
+
+    def hud(self):
+        """Snapshot of everything the renderer draws."""
+        return {
+            "reps": len(self.rep_scores),
+            "last_rep_score": self.last_rep_score,
+            "current_feedback": self.current_feedback,
+            "feedback_display_time": self.feedback_display_time,
+            "feedback_duration": self.feedback_duration,
+            "pre_start_mode": self.pre_start_mode,
+            "pre_start_phase": self.pre_start_phase,
+            "show_start_message": self.show_start_message,
+            "start_message_time": self.start_message_time,
+            "stable_orient_ok": self.stable_orient_ok,
+            "require_weights": self.require_weights,
+        }
+
+    def _emit(self, event, now, **fields):
+        if self.events is not None:
+            self.events(event, t=round(now, 3), **fields)
+
+    def step(self, us_lmk_arr, user_frame, now=None):
+        """
+        Advance gates and scoring given the newest pose (us_lmk_arr may be None).
+        now: session clock for the gate/feedback timers (the pose's capture time;
+        default time.time()), so a replayed recording keeps its own timing.
+        """
+        now = time.time() if now is None else now
+        loop_pending = self._peek_loop()
+        align_needed_len = self.align_needed_len
+
+        # Orientation check only during orientation phase
+        if self.pre_start_mode and self.pre_start_phase == 'orientation' and not self.orientation_locked and self._window_ready(align_needed_len):
+            t_dtw = time.perf_counter()
+            A_us = self._recent_angles(align_needed_len)
+            A_us = smooth_angles(A_us, window=5)
+            A_us = resample_to_length(A_us, len(self.trainer_align_ref))
+            dist_nom = dtw_distance_l1(A_us, self.trainer_align_ref, weights=self.default_weights)
+            # mirrored
+            A_us_m = A_us.copy()
+            A_us_m[:, [0,1]] = A_us[:, [1,0]]
+            A_us_m[:, [2,3]] = A_us[:, [3,2]]
+            A_us_m[:, [4,5]] = A_us[:, [5,4]]
+            A_us_m[:, [6,7]] = A_us[:, [7,6]]
+            dist_mir = dtw_distance_l1(A_us_m, self.trainer_align_ref, weights=self.default_weights)
+            self.stats.observe("dtw", time.perf_counter() - t_dtw)
+            self.orient_ok = ((dist_nom <= dist_mir * 0.99) or (dist_nom + self.align_margin_deg <= dist_mir))
+            user_forward = self.features.mean_forward()
+            if self.trainer_forward is not None and user_forward is not None:
+                cos_dir = float(np.clip(np.dot(self.trainer_forward, user_forward), -1.0, 1.0))
+                if cos_dir < 0.5:
+                    self.orient_ok = False
+
+        # Weights detection only during weights phase
+        if self.pre_start_mode and self.pre_start_phase == 'weights' and not self.weights_locked and self.require_weights and us_lmk_arr is not None:
+            self.weights_ok = detect_weights(
+                self.wrist_hist,
+                current_frame_bgr=user_frame,
+                current_us_landmarks=us_lmk_arr
+            )
+            if self.weights_ok:
+                self.log("weights", f"[DEBUG] Weights detected! Buffer size: {len(self.wrist_hist)}")
+        # On loop boundary, update stable gates based on the last window
+        if self.pre_start_mode and loop_pending:
+            if self.pre_start_phase == 'weights':
+                # Lock weights if they've been detected for one loop, then move to orientation phase
+                if self.weights_ok and not self.weights_locked:
+                    self.weights_locked = True
+                    self.stable_weights_ok = True
+                    print(f"[INFO] Weights locked! Weights: {self.stable_weights_ok}")
+                    self._emit("phase", now, phase="weights_done")
+                    # Show green confirmation for 1s before moving to orientation phase
+                    self.weights_message_time = now
+                    self.pre_start_phase = 'weights_done'
+                elif not self.weights_locked:
+                    self.stable_weights_ok = (not self.require_weights) or self.weights_ok
+            elif self.pre_start_phase == 'orientation':
+                # Lock orientation if it's been stable for one loop
+                if self.orient_ok and not self.orientation_locked:
+                    self.orientation_locked = True
+                    self.stable_orient_ok = True
+                    print(f"[INFO] Orientation locked! Orientation: {self.stable_orient_ok}")
+                    self._emit("phase", now, phase="orientation_done")
+                    # Show green confirmation for 1s before starting workout
+                    self.orientation_message_time = now
+                    self.pre_start_phase = 'orientation_done'
+                elif not self.orientation_locked:
+                    self.stable_orient_ok = self.orient_ok
+            # Debug output for current phase
+            self.log("loop", f"[DEBUG] Loop boundary - Phase: {self.pre_start_phase}, Orientation: {self.stable_orient_ok} (locked: {self.orientation_locked}), Weights: {self.stable_weights_ok} (locked: {self.weights_locked}), require_weights: {self.require_weights}")
+
+        # Transition from weights_done -> orientation after 1s display
+        if self.pre_start_mode and self.pre_start_phase == 'weights_done' and (now - self.weights_message_time) >= 1.0:
+            self.pre_start_phase = 'orientation'
+
+        # Start workout only after orientation green message has shown for 1s
+        if self.pre_start_mode and self.pre_start_phase == 'orientation_done' and (now - self.orientation_message_time) >= 1.0 and loop_pending:
+            # Set flag to show start message for 2 seconds
+            print("[INFO] Orientation aligned! Starting exercise in 2 seconds...")
+            self.show_start_message = True
+            self.start_message_time = now
+            self._clear_loop()
+            loop_pending = False
+        # Check if start message time has elapsed and start workout
+        if self.show_start_message and (now - self.start_message_time) >= 2.0:
+            print("[INFO] Starting workout now!")
+            self._emit("phase", now, phase="workout")
+            self.pre_start_mode = False
+            self.show_start_message = False
+            # reset for clean start
+            self.features.clear()
+            self.wrist_hist.clear()
+            with self._loop_lock:
+                self._loop_pending = False
+                self._restart_trainer = True
+            loop_pending = False
+
+        # Score only after start
+        if (not self.pre_start_mode) and loop_pending:
+            self._clear_loop()
+            self._score_rep(now)
+
+        # Continuous feedback during exercise (not just after reps)
+        elif (not self.pre_start_mode) and len(self.features) >= 10:
+            # Check if user is moving enough
+            recent_user_angles = self.features.angles.latest(10)
+            user_motion_amp = masked_motion_amplitude(recent_user_angles, self.priority_mask)
+
+            # Only show continuous feedback if no rep feedback is currently displayed
+            if not self.current_feedback or (now - self.feedback_display_time) >= self.feedback_duration:
+                if user_motion_amp < 0.02:  # Very low motion
+                    self.current_feedback = "Start moving! Follow the trainer"
+                    self.feedback_display_time = now
+                    self._emit("feedback", now, text=self.current_feedback, rep=None)
+                elif user_motion_amp < 0.05:  # Low motion
+                    self.current_feedback = "Move more! Increase your range"
+                    self.feedback_display_time = now
+                    self._emit("feedback", now, text=self.current_feedback, rep=None)
+
+    def _score_rep(self, now):
+        # Take the most recent trainer rep's worth of frames; if fewer, use whatever is available
+        A_tr = self.trainer_angles  # precomputed
+        if len(self.features) == 0:
+            # No user data; assign worst possible similarity (0.0)
+            score = 0.0
+        else:
+            # Angles were computed when each frame arrived; used for both score and feedback
+            user_segment_angles = self._recent_angles(self.trainer_rep_len)
+            try:
+                with self.stats.time("dtw"):
+                    score = score_user_angles(user_segment_angles, A_tr, self.default_weights, self.priority_mask)
+                # Store the score for feedback (no gamma calibration)
+                final_score = score
+            except Exception as e:
+                self.log("score_error", f"[DEBUG] Scoring error: {e}")
+                score = 0.0
+                final_score = 0.0
+        self.rep_scores.append(score)
+        self.last_rep_score = score
+        self.log("score", f"[SCORING] Rep {len(self.rep_scores)}: {score:.3f}")
+        self._emit("rep", now, rep=len(self.rep_scores), score=round(float(score), 4))
+
+        # Generate real-time feedback for this rep using uncalibrated score
+        if len(self.features) > 0:
+            user_motion_amp = masked_motion_amplitude(user_segment_angles, self.priority_mask)
+            trainer_motion_amp = masked_motion_amplitude(A_tr, self.priority_mask)
+
+            # Get feedback from the system using final score
+            with self.stats.time("feedback"):
+                feedback = self.feedback_system.analyze_rep_performance(
+                    user_segment_angles, A_tr, user_motion_amp,
+                    trainer_motion_amp, final_score, self.priority_mask
+                )
+
+            # Update feedback display
+            self.current_feedback = feedback
+            self.feedback_display_time = now
+            self.log("feedback", f"[FEEDBACK] {feedback}")
+            self._emit("feedback", now, text=feedback, rep=len(self.rep_scores))
+
+
+def draw_live_hud(combined, hud, now=None):
+    """
+    Rep count, last score, feedback and pre-start gate messages.
+    now: the shown frame's capture time (default time.time()), the clock the
+    scorer stamps feedback and the start countdown with
+    """
+    now = time.time() if now is None else now
+    cv2.putText(combined, f"Reps (trainer-driven): {hud['reps']}", (20, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 255), 3)
+    if hud["last_rep_score"] is not None:
+        cv2.putText(combined, f"Last Rep Score: {hud['last_rep_score']:.3f}", (20, 95),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
+
+    # Display real-time feedback
+    current_feedback = hud["current_feedback"]
+    if current_feedback and (now - hud["feedback_display_time"]) < hud["feedback_duration"]:
+        # Choose color based on feedback type
+        if "Excellent" in current_feedback or "Good" in current_feedback:
+            color = (50, 255, 50)  # Green for positive feedback
+        elif "Start moving" in current_feedback:
+            color = (0, 200, 255)  # Orange for movement prompts
+        else:
+            color = (0, 255, 255)  # Yellow for improvement tips
+
+        # Display feedback on screen
+        cv2.putText(combined, current_feedback, (20, 210),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    if hud["pre_start_mode"]:
+        pre_start_phase = hud["pre_start_phase"]
+        # Sequential pre-start UI: show phase-specific messages or the start countdown
+        if hud["show_start_message"]:
+            remaining_time = max(0, 2 - int(now - hud["start_message_time"]))
+            cv2.putText(combined, "Start exercise!", (20, 140),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
+            cv2.putText(combined, f"Starting in {remaining_time} seconds...", (20, 175),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 255, 50), 2)
         else:
-            trainer_template_seq = trainer_seq
+            if pre_start_phase == 'weights' and hud["require_weights"]:
+                cv2.putText(combined, "Expecting weights...", (20, 140),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 200, 255), 2)
+            elif pre_start_phase == 'weights_done':
+                cv2.putText(combined, "Weights equipped!", (20, 140),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
+            elif pre_start_phase == 'orientation':
+                if not hud["stable_orient_ok"]:
+                    cv2.putText(combined, "Align with trainer orientation...", (20, 140),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (80, 200, 255), 2)
+            elif pre_start_phase == 'orientation_done':
+                cv2.putText(combined, "Orientation aligned!", (20, 140),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
     else:
-        trainer_template_seq = trainer_seq
+        # Workout running; no more gate messages
+        cv2.putText(combined, "Press 'q' to Quit", (20, 140),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
 
-    # trainer_emb (GCN) not used; kept removed for efficiency
 
-    # Precompute trainer angles (smoothed), and weights for joints
-    trainer_angles = compute_angles_for_seq(trainer_template_seq)
-    trainer_angles = smooth_angles(trainer_angles, window=5)
-    D = trainer_angles.shape[1]
-    # Trainer forward orientation (3D) for coarse direction check
-    trainer_forward = average_forward_vector(trainer_template_seq)
-    # Build weights from user-selected priorities
-    default_weights = build_weights_from_priority(priority, priority_weight, nonpriority_weight, D)
-    priority_mask = build_priority_mask(priority, D)
-    
-    # Initialize feedback system
-    feedback_system = create_feedback_system(priority, default_weights)
+# Live-loop stages in pipeline order, as shown on the stats HUD
+LIVE_STAGES = ("capture", "resize_flip", "inference", "features", "dtw", "feedback",
+               "trainer_frame", "draw", "imshow", "waitkey", "frame")
 
-    # 3) Set up live capture
+def run_live_session(trainer_video_path, device='cpu', hidden=64, priority=None, priority_weight=1.5, nonpriority_weight=0.5, require_weights=False, inference_fps=12.0, trainer_cache_dir=None,
+                     target_fps=30.0, latency_budget_ms=150.0, model_complexity=None, roi_tracking=False,
+                     motion_gating=True, scoring_fps=25.0, stats_hud=False, stats_path=None,
+                     source=None, headless=False, events_path=None, record_path=None):
+    """
+    Live coaching session against a trainer video.
+
+    source: frame source for the user (default: webcam 0). A VideoFileSource or
+      SyntheticSource that isn't real time is replayed losslessly, as fast as the
+      pipeline can take it, through the same threads and code as the webcam.
+    headless: no window, keyboard or summary window; stop with Ctrl+C or at the
+      end of the source.
+    events_path: write phase changes, rep scores, feedback and a final timing
+      summary as JSON lines ("-" for stdout).
+    record_path: keep the user's raw landmark stream (every inferred frame, with its
+      capture time) and the same events in a compact SessionRecorder file.
+    Returns a dict with rep_scores and per-stage timings, or None on setup errors.
+    """
+    # 1) Load trainer sequence
+    trainer_seq, trainer_seq_frames = extract_pose_sequence(trainer_video_path, return_frame_indices=True)
+    if len(trainer_seq) == 0:
+        print("[ERROR] Could not extract trainer landmarks.")
+        return
+    # Trainer skeleton overlay comes from these landmarks, keyed by trainer frame number,
+    # so the live loop only runs Pose on the user
+    trainer_overlay = {int(f): landmarks_to_proto(lmk) for f, lmk in zip(trainer_seq_frames, trainer_seq)}
+
+    # 2) Build trainer template (angles-based scoring; no GCN needed)
+    # Trainer frame times put the template on a time grid at the video's rate;
+    # user windows are resampled onto the same grid from their capture times
     cap_trainer = cv2.VideoCapture(trainer_video_path)
-    cap_user = cv2.VideoCapture(0)
-    if not cap_user.isOpened():
-        print("[ERROR] Webcam not available.")
+    trainer_fps = cap_trainer.get(cv2.CAP_PROP_FPS) or 30.0
+    cap_trainer.release()
+    reference = prepare_trainer_reference(trainer_seq, priority, priority_weight, nonpriority_weight,
+                                          frame_times=np.asarray(trainer_seq_frames) / trainer_fps,
+                                          rate=trainer_fps)
+
+    # Initialize feedback system
+    feedback_system = create_feedback_system(priority, reference["weights"])
+    # Per-stage latency histograms for every thread of the live loop
+    stats = StageStats()
+    event_log = EventLog(events_path) if events_path else None
+    recorder = None
+    if record_path:
+        recorder = SessionRecorder(record_path, meta={
+            "trainer_video_path": os.path.abspath(trainer_video_path), "trainer_fps": trainer_fps,
+            "priority": priority, "priority_weight": priority_weight, "nonpriority_weight": nonpriority_weight,
+            "require_weights": require_weights, "inference_fps": inference_fps, "scoring_fps": scoring_fps,
+            "mirror": True, "started": time.time(),
+            # What offline re-scoring (rescore.py) needs without the trainer video or Pose
+            "reference": {
+                "angles": np.asarray(reference["angles"]).tolist(),
+                "weights": np.asarray(reference["weights"]).tolist(),
+                "priority_mask": np.asarray(reference["priority_mask"]).tolist(),
+                "rate": reference["rate"],
+            },
+        })
+    sinks = [sink for sink in (event_log, recorder) if sink is not None]
+
+    def events(event, **fields):
+        for sink in sinks:
+            sink(event, **fields)
+
+    scorer = LiveSessionScorer(reference, feedback_system, require_weights=require_weights,
+                               max_sample_rate=max(inference_fps, scoring_fps), stats=stats,
+                               events=events if sinks else None)
+
+    # 3) Set up live capture. Trainer frames are decoded, resized and have the
+    # skeleton drawn once up front; playback is then just an index into them.
+    trainer_frames = TrainerFrameCache.build(
+        trainer_video_path, size=(640, 480), overlay=trainer_overlay,
+        draw_fn=lambda frame, lmk: mp_drawing.draw_landmarks(frame, lmk, mp_pose.POSE_CONNECTIONS),
+        cache_dir=trainer_cache_dir,
+    )
+    if len(trainer_frames) == 0:
+        print("[ERROR] Could not decode trainer video.")
+        return
+    if source is None:
+        source = CameraSource(0)
+    if not source.isOpened():
+        print("[ERROR] Webcam not available." if source.realtime else "[ERROR] User video not available.")
         return
+    # Recorded sources: every frame goes through inference, scoring and the UI, in that
+    # order, before the next is read; the inference rate and model are held fixed (in
+    # media time) so a replay gives the same results however fast the machine is
+    lossless = not source.realtime
+
+    # Inference rate (up to inference_fps) and Pose model_complexity adapt to hold
+    # target_fps on screen and keep capture-to-landmarks latency within budget
+    scheduler = InferenceScheduler(target_fps=target_fps, latency_budget_ms=latency_budget_ms,
+                                   max_inference_fps=inference_fps, model_complexity=model_complexity)
+    user_pose = mp_pose.Pose(model_complexity=scheduler.complexity)
+
+    # 4) Stages: capture -> inference -> scoring, with the UI on this thread.
+    # The UI and inference only ever look at the newest camera frame; every pose
+    # still reaches the scorer through a queue so rep windows have no gaps, and a
+    # slow DTW or weights check only delays scoring, never the display.
+    stop = threading.Event()
+    frame_slot = LatestSlot()  # newest (capture time, 640x480 mirrored user frame, read time)
+    pose_slot = LatestSlot()   # newest user landmark proto, for drawing
+    hud_slot = LatestSlot()    # newest scorer.hud()
+    hud_slot.put(scorer.hud())
+    pose_queue = queue.Queue(maxsize=max(64, scorer.features.capacity))
+    capture = CaptureThread(source, frame_slot, size=(640, 480), mirror=True, stats=stats,
+                            readers=("inference", "ui"))
+
+    # Crop each inference input around the previous landmarks (opt-in: video-mode Pose
+    # already tracks the person, and a moving crop shifts the frame its tracking is in)
+    roi_tracker = RoiTracker() if roi_tracking else None
+    # Reuse the previous landmarks while the camera image is (nearly) unchanged
+    motion_gate = MotionGate() if motion_gating else None
+    # Smooth poses and fill the scorer's stream at scoring_fps, so inference can run slower
+    lmk_filter = OneEuroFilter() if scoring_fps > 0 else None
+    upsampler = PoseUpsampler(scoring_fps) if scoring_fps > 0 else None
+
+    def inference_worker():
+        nonlocal user_pose
+        seq = 0
+        last_landmark_time = 0.0
+        next_due = float("-inf")
+        while not stop.is_set():
+            new_seq, captured = frame_slot.wait_newer(seq, timeout=0.1)
+            if new_seq == seq:
+                if frame_slot.closed:
+                    break
+                continue
+            if lossless:
+                # Replay: hold the inference rate in media time by passing over early frames
+                if captured[0] < next_due:
+                    seq = new_seq
+                    frame_slot.ack("inference", seq)
+                    continue
+            else:
+                delay = last_landmark_time + scheduler.interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                    new_seq, captured = frame_slot.get()
+            seq = new_seq
+            t_capture, user_frame, t_read = captured
+            last_landmark_time = time.time()
+            next_due = t_capture + 1.0 / inference_fps
+            if motion_gate is not None and not motion_gate.should_infer(user_frame, t_capture):
+                # Still queued for the scorer so rep windows keep their sampling rate
+                us_lmk_obj, us_lmk_arr = motion_gate.last_result
+                skipped = True
+            elif roi_tracker is not None:
+                us_lmk_obj, us_lmk_arr = extract_landmarks_roi(user_frame, user_pose, roi_tracker)
+                skipped = False
+            else:
+                us_lmk_obj, us_lmk_arr = extract_landmarks(user_frame, user_pose)
+                skipped = False
+            t_done = time.time()
+            if not skipped:
+                if motion_gate is not None:
+                    motion_gate.inferred((us_lmk_obj, us_lmk_arr), t_capture)
+                stats.observe("inference", t_done - last_landmark_time)
+                scheduler.record("inference", t_done - last_landmark_time)
+                scheduler.record("e2e", t_done - t_read)
+            if not skipped and not lossless and scheduler.update():
+                try:
+                    new_pose = mp_pose.Pose(model_complexity=scheduler.complexity)
+                except Exception as e:
+                    print(f"[WARN] Pose model_complexity={scheduler.complexity} unavailable: {e}")
+                    scheduler.reject(scheduler.complexity)
+                else:
+                    print(f"[INFO] Pose model_complexity -> {scheduler.complexity} "
+                          f"(inference {scheduler.inference_fps:.1f} Hz)")
+                    user_pose.close()
+                    user_pose = new_pose
+            if us_lmk_arr is not None and us_lmk_arr.shape != (33, 3):
+                us_lmk_arr = None
+            if recorder is not None:
+                recorder.append(us_lmk_arr, t_capture)
+            if lmk_filter is None:
+                pose_slot.put(us_lmk_obj)
+                samples = [(t_capture, us_lmk_arr)]
+            elif us_lmk_arr is None:
+                lmk_filter.reset()
+                upsampler.push(None, t_capture)
+                pose_slot.put(None)
+                samples = [(t_capture, None)]
+            else:
+                samples = upsampler.push(lmk_filter(us_lmk_arr, t_capture), t_capture)
+                pose_slot.put(lmk_filter.estimate())
+            for t_sample, sample in samples:
+                item = (t_sample, sample, user_frame)
+                try:
+                    pose_queue.put_nowait(item)
+                except queue.Full:
+                    # Scorer is far behind; the oldest pose would fall out of its buffers anyway
+                    try:
+                        pose_queue.get_nowait()
+                        pose_queue.task_done()
+                    except queue.Empty:
+                        pass
+                    pose_queue.put_nowait(item)
+            if lossless:
+                # Let the scorer catch up before the next frame is read
+                with pose_queue.all_tasks_done:
+                    while pose_queue.unfinished_tasks and not stop.is_set():
+                        pose_queue.all_tasks_done.wait(0.1)
+            frame_slot.ack("inference", seq)
 
-    user_pose = mp_pose.Pose()
-    trainer_pose = mp_pose.Pose()
+    def scoring_worker():
+        while not stop.is_set():
+            try:
+                items = [pose_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    items.append(pose_queue.get_nowait())
+                except queue.Empty:
+                    break
+            t0 = time.time()
+            with stats.time("features"):
+                for t_sample, us_lmk_arr, _ in items:
+                    if us_lmk_arr is not None:
+                        scorer.add_sample(us_lmk_arr, t_sample)
+            t_newest, us_lmk_arr, user_frame = items[-1]
+            scorer.step(us_lmk_arr, user_frame, now=t_newest)
+            hud_slot.put(scorer.hud())
+            scheduler.record("scoring", time.time() - t0)
+            for _ in items:
+                pose_queue.task_done()
 
-    # Buffer of recent user frames so we can slice by trainer rep duration
-    trainer_rep_len = max(1, len(trainer_template_seq))
-    user_buf = deque(maxlen=int(2 * trainer_rep_len))  # keep ~2 reps worth of frames
-    rep_scores = []
-    last_rep_score = None
+    workers = [
+        capture,
+        threading.Thread(target=inference_worker, name="inference", daemon=True),
+        threading.Thread(target=scoring_worker, name="scoring", daemon=True),
+    ]
+    for w in workers:
+        w.start()
 
     print(f"[INFO] Live session started. Alignment check in progress...")
     win = "Trainer (Left) | You (Right)"
-    cv2.namedWindow(win, cv2.WINDOW_NORMAL)
-
-    last_landmark_time = 0.0
-
-    # Track trainer frame index to detect loop end boundaries
-    prev_trainer_frame_idx = int(cap_trainer.get(cv2.CAP_PROP_POS_FRAMES))
-    loop_pending = False
-    prev_looped = False
-    # Alignment gating
-    # Alignment/weights gates (continuous)
-    align_buf = deque(maxlen=36)
-    align_needed_len = min(24, len(trainer_angles))
-    trainer_align_ref = trainer_angles[:align_needed_len]
-    align_margin_deg = 2.0
-    weights_ok = (not require_weights)
-    orient_ok = False
-    # Pre-start gates: sequential phases (weights -> orientation), then start
-    pre_start_mode = True
-    pre_start_phase = 'weights' if require_weights else 'orientation'
-    weights_message_time = 0.0  # timestamp when weights equipped message starts
-    orientation_message_time = 0.0  # timestamp when orientation aligned message starts
-    stable_orient_ok = False
-    stable_weights_ok = (not require_weights)
-    orientation_locked = False  # Once True, stop checking orientation
-    weights_locked = (not require_weights)  # Once True, stop checking weights
-    
-    # State for showing start message
-    show_start_message = False
-    start_message_time = 0.0
-    
-    # Feedback system state
-    current_feedback = ""
-    feedback_display_time = 0.0
-    feedback_duration = 3.0  # Show feedback for 3 seconds
+    if not headless:
+        cv2.namedWindow(win, cv2.WINDOW_NORMAL)
+
+    # Next trainer frame to show; wrapping past the end marks a loop boundary
+    trainer_pos = 0
+    frame_seq = 0
+    canvas = np.empty((480, 1280, 3), dtype=np.uint8)
+    last_show_time = None
 
     while True:
-        ok_t, trainer_frame = cap_trainer.read()
-        ok_u, user_frame = cap_user.read()
-        if not ok_u:
-            print("[ERROR] Could not read webcam frame.")
+        # Paced by the camera: one trainer frame per new webcam frame
+        try:
+            new_seq, captured = frame_slot.wait_newer(frame_seq, timeout=0.05)
+        except KeyboardInterrupt:
+            break
+        if new_seq != frame_seq:
+            frame_seq = new_seq
+            t_frame, user_frame, _ = captured
+            if lossless:
+                # Draw (and count trainer loops) only once this frame's pose has been scored
+                while not frame_slot.wait_acked(("inference",), frame_seq, timeout=0.1) and not stop.is_set():
+                    pass
+            if scorer.take_trainer_restart():
+                trainer_pos = 0
+            # Detect trainer loop end to trigger one rep evaluation
+            if trainer_pos >= len(trainer_frames):
+                trainer_pos = 0
+                scorer.notify_trainer_loop()
+            t0 = time.perf_counter()
+            # Read-only view, already 640x480 with the skeleton drawn
+            canvas[:, :640] = trainer_frames[trainer_pos]
+            trainer_pos += 1
+            t1 = time.perf_counter()
+            # The capture thread's frame is shared with inference; draw on our copy
+            canvas[:, 640:] = user_frame
+            _, us_lmk_obj = pose_slot.get()
+            if us_lmk_obj is not None and lmk_filter is not None:
+                # Predicted to this frame's capture time, so the skeleton doesn't trail the user
+                us_lmk_obj = landmarks_to_proto(us_lmk_obj.at(t_frame, lmk_filter.max_predict))
+            if us_lmk_obj:
+                mp_drawing.draw_landmarks(canvas[:, 640:], us_lmk_obj, mp_pose.POSE_CONNECTIONS)
+            _, hud = hud_slot.get()
+            draw_live_hud(canvas, hud, t_frame)
+            if stats_hud:
+                draw_stats_hud(canvas, stats, LIVE_STAGES)
+            t2 = time.perf_counter()
+            if not headless:
+                cv2.imshow(win, canvas)
+                stats.observe("imshow", time.perf_counter() - t2)
+            stats.observe("trainer_frame", t1 - t0)
+            stats.observe("draw", t2 - t1)
+            stats.frame()
+            frame_slot.ack("ui", frame_seq)
+            now = time.time()
+            if last_show_time is not None:
+                scheduler.record("display", now - last_show_time)
+            last_show_time = now
+        elif frame_slot.closed:
+            print("[INFO] End of user video." if lossless else "[ERROR] Could not read webcam frame.")
             break
 
-        # Detect trainer loop end to trigger one rep evaluation
-        trainer_frame_idx = int(cap_trainer.get(cv2.CAP_PROP_POS_FRAMES))
-        looped = False
-        if not ok_t:
-            looped = True
-        elif trainer_frame_idx < prev_trainer_frame_idx:
-            looped = True
-        prev_trainer_frame_idx = trainer_frame_idx if ok_t else prev_trainer_frame_idx
-
-        if not ok_t:
-            # Reset to start for next loop
-            cap_trainer.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ok_t, trainer_frame = cap_trainer.read()
-            if not ok_t:
-                break
-        # Arm scoring only on transition to looped (False -> True)
-        if looped and not prev_looped and not loop_pending:
-            loop_pending = True
-
-        trainer_frame = cv2.resize(trainer_frame, (640, 480))
-        user_frame = cv2.resize(user_frame, (640, 480))
-        user_frame = cv2.flip(user_frame, 1)
-
-        current_time = time.time()
-        if current_time - last_landmark_time >= 0.04:  # ~25 FPS
-            last_landmark_time = current_time
-            tr_lmk_obj, _ = extract_landmarks(trainer_frame, trainer_pose)
-            us_lmk_obj, us_lmk_arr = extract_landmarks(user_frame, user_pose)
-
-            if us_lmk_arr is not None and us_lmk_arr.shape == (33, 3):
-                user_buf.append(us_lmk_arr)
-                align_buf.append(us_lmk_arr)
-
-            # Orientation check only during orientation phase
-            if pre_start_mode and pre_start_phase == 'orientation' and not orientation_locked and len(align_buf) >= align_needed_len:
-                A_us = compute_angles_for_seq(list(align_buf)[-align_needed_len:])
-                A_us = smooth_angles(A_us, window=5)
-                A_us = resample_to_length(A_us, len(trainer_align_ref))
-                dist_nom = dtw_distance_l1(A_us, trainer_align_ref, weights=default_weights)
-                # mirrored
-                A_us_m = A_us.copy()
-                A_us_m[:, [0,1]] = A_us[:, [1,0]]
-                A_us_m[:, [2,3]] = A_us[:, [3,2]]
-                A_us_m[:, [4,5]] = A_us[:, [5,4]]
-                A_us_m[:, [6,7]] = A_us[:, [7,6]]
-                dist_mir = dtw_distance_l1(A_us_m, trainer_align_ref, weights=default_weights)
-                orient_ok = ((dist_nom <= dist_mir * 0.99) or (dist_nom + align_margin_deg <= dist_mir))
-                user_forward = average_forward_vector(list(align_buf)[-align_needed_len:])
-                if trainer_forward is not None and user_forward is not None:
-                    cos_dir = float(np.clip(np.dot(trainer_forward, user_forward), -1.0, 1.0))
-                    if cos_dir < 0.5:
-                        orient_ok = False
-
-            # Weights detection only during weights phase
-            if pre_start_mode and pre_start_phase == 'weights' and not weights_locked and require_weights and us_lmk_arr is not None:
-                if 'wrist_hist' not in locals():
-                    wrist_hist = deque(maxlen=45)
-                wrist_hist.append(us_lmk_arr[[15,16,11,12], :2])  # x,y only
-                weights_ok = detect_weights(
-                    wrist_hist,
-                    current_frame_bgr=user_frame,
-                    current_us_landmarks=us_lmk_arr
-                )
-                if weights_ok:
-                    print(f"[DEBUG] Weights detected! Buffer size: {len(wrist_hist)}")
-            # On loop boundary, update stable gates based on the last window
-            if pre_start_mode and loop_pending:
-                if pre_start_phase == 'weights':
-                    # Lock weights if they've been detected for one loop, then move to orientation phase
-                    if weights_ok and not weights_locked:
-                        weights_locked = True
-                        stable_weights_ok = True
-                        print(f"[INFO] Weights locked! Weights: {stable_weights_ok}")
-                        # Show green confirmation for 1s before moving to orientation phase
-                        weights_message_time = time.time()
-                        pre_start_phase = 'weights_done'
-                    elif not weights_locked:
-                        stable_weights_ok = (not require_weights) or weights_ok
-                elif pre_start_phase == 'orientation':
-                    # Lock orientation if it's been stable for one loop
-                    if orient_ok and not orientation_locked:
-                        orientation_locked = True
-                        stable_orient_ok = True
-                        print(f"[INFO] Orientation locked! Orientation: {stable_orient_ok}")
-                        # Show green confirmation for 1s before starting workout
-                        orientation_message_time = time.time()
-                        pre_start_phase = 'orientation_done'
-                    elif not orientation_locked:
-                        stable_orient_ok = orient_ok
-                # Debug output for current phase
-                print(f"[DEBUG] Loop boundary - Phase: {pre_start_phase}, Orientation: {stable_orient_ok} (locked: {orientation_locked}), Weights: {stable_weights_ok} (locked: {weights_locked}), require_weights: {require_weights}")
-
-            # Transition from weights_done -> orientation after 1s display
-            if pre_start_mode and pre_start_phase == 'weights_done' and (time.time() - weights_message_time) >= 1.0:
-                pre_start_phase = 'orientation'
-
-            # Start workout only after orientation green message has shown for 1s
-            if pre_start_mode and pre_start_phase == 'orientation_done' and (time.time() - orientation_message_time) >= 1.0 and loop_pending:
-                # Set flag to show start message for 2 seconds
-                print("[INFO] Orientation aligned! Starting exercise in 2 seconds...")
-                show_start_message = True
-                start_message_time = time.time()
-                loop_pending = False
-            # Check if start message time has elapsed and start workout
-            if show_start_message and (time.time() - start_message_time) >= 2.0:
-                print("[INFO] Starting workout now!")
-                pre_start_mode = False
-                show_start_message = False
-                # reset for clean start
-                user_buf.clear()
-                if 'wrist_hist' in locals():
-                    wrist_hist.clear()
-                loop_pending = False
-                prev_looped = False
-                cap_trainer.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                prev_trainer_frame_idx = 0
-            
-            # Score only after start
-            if (not pre_start_mode) and loop_pending:
-                # Take the most recent trainer_rep_len frames; if fewer, use whatever is available
-                if len(user_buf) == 0:
-                    # No user data; assign worst possible similarity (0.0)
-                    score = 0.0
-                else:
-                    user_segment = list(user_buf)[-trainer_rep_len:]
-                    try:
-                        # Angle-based DTW with amplitude penalty for robustness
-                        A_tr = trainer_angles  # precomputed
-                        A_us = compute_angles_for_seq(user_segment)
-                        # optional auto-mirroring: flip left/right if mirroring yields lower DTW
-                        A_us_sm = smooth_angles(A_us, window=5)
-                        A_us_rs = resample_to_length(A_us_sm, len(A_tr))
-                        dist_nom = dtw_distance_l1(A_us_rs, A_tr, weights=default_weights)
-                        # mirror left/right columns: (0,1), (2,3), (4,5), (6,7)
-                        A_us_mir = A_us_rs.copy()
-                        A_us_mir[:, [0,1]] = A_us_rs[:, [1,0]]
-                        A_us_mir[:, [2,3]] = A_us_rs[:, [3,2]]
-                        A_us_mir[:, [4,5]] = A_us_rs[:, [5,4]]
-                        A_us_mir[:, [6,7]] = A_us_rs[:, [7,6]]
-                        dist_mir = dtw_distance_l1(A_us_mir, A_tr, weights=default_weights)
-                        dist = min(dist_nom, dist_mir)
-                        sim_angle = np.exp(-0.03 * dist)
-                        # amplitude computed over priority joints only
-                        amp_user_pr = masked_motion_amplitude(A_us_rs, priority_mask)
-                        amp_tr_pr = masked_motion_amplitude(A_tr, priority_mask) + 1e-6
-                        amp_ratio = float(np.clip(amp_user_pr / amp_tr_pr, 0.0, 1.0))
-                        # First calculate the base score based on priority joint performance
-                        base_score = float(sim_angle * amp_ratio)
-                        
-                        # Only check non-priority motion if priority motion is good enough
-                        if base_score >= 0.4:  # If priority joints are performing well
-                            # Check non-priority joints only when priority motion is good
-                            non_mask = ~priority_mask if np.any(priority_mask) else np.zeros_like(priority_mask)
-                            amp_user_np = masked_motion_amplitude(A_us_rs, non_mask)
-                            amp_trainer_np = masked_motion_amplitude(A_tr, non_mask)
-                            
-                            # Calculate how much user's non-priority motion differs from trainer
-                            np_motion_ratio = amp_user_np / (amp_trainer_np + 1e-6)
-                            
-                            # Only penalize if user is moving non-priority joints MUCH more than trainer
-                            if np_motion_ratio > 2.5:  # User moving 150% more than trainer
-                                excessive_motion_penalty = 0.3  # Heavy penalty for wrong body part motion
-                                score = base_score * excessive_motion_penalty
-                                print(f"[DEBUG] Excessive non-priority motion detected: user={amp_user_np:.3f}, trainer={amp_trainer_np:.3f}, ratio={np_motion_ratio:.2f}")
-                                print(f"[SCORING] Applying penalty: {excessive_motion_penalty}, final score: {score:.3f}")
-                            else:
-                                # Non-priority motion is reasonable, keep good score
-                                score = base_score
-                                print(f"[DEBUG] Non-priority motion OK: user={amp_user_np:.3f}, trainer={amp_trainer_np:.3f}, ratio={np_motion_ratio:.2f}")
-                                print(f"[SCORING] Keeping good score: {score:.3f}")
-                        else:
-                            # Priority motion is poor, don't worry about non-priority
-                            score = base_score
-                            print(f"[DEBUG] Priority motion poor ({base_score:.3f}), skipping non-priority check")
-                        
-                                                                         # Store the score for feedback (no gamma calibration)
-                        final_score = score
-                    except Exception as e:
-                        print(f"[DEBUG] Scoring error: {e}")
-                        score = 0.0
-                        final_score = 0.0
-                rep_scores.append(score)
-                last_rep_score = score
-                 
-                 # Generate real-time feedback for this rep using uncalibrated score
-                if len(user_buf) > 0:
-                    user_segment_angles = compute_angles_for_seq(user_segment)
-                    user_motion_amp = masked_motion_amplitude(user_segment_angles, priority_mask)
-                    trainer_motion_amp = masked_motion_amplitude(A_tr, priority_mask)
-                     
-                                          # Get feedback from the system using final score
-                    feedback = feedback_system.analyze_rep_performance(
-                        user_segment_angles, A_tr, user_motion_amp, 
-                        trainer_motion_amp, final_score, priority_mask
-                     )
-                    
-                    # Update feedback display
-                    current_feedback = feedback
-                    feedback_display_time = time.time()
-                    print(f"[FEEDBACK] {feedback}")
-                
-                loop_pending = False
-            
-            # Continuous feedback during exercise (not just after reps)
-            elif (not pre_start_mode) and len(user_buf) >= 10:
-                # Check if user is moving enough
-                recent_user_angles = compute_angles_for_seq(list(user_buf)[-10:])
-                user_motion_amp = masked_motion_amplitude(recent_user_angles, priority_mask)
-                
-                # Only show continuous feedback if no rep feedback is currently displayed
-                if not current_feedback or (time.time() - feedback_display_time) >= feedback_duration:
-                    if user_motion_amp < 0.02:  # Very low motion
-                        current_feedback = "Start moving! Follow the trainer"
-                        feedback_display_time = time.time()
-                    elif user_motion_amp < 0.05:  # Low motion
-                        current_feedback = "Move more! Increase your range"
-                        feedback_display_time = time.time()
-
-        # Track loop state for next iteration to avoid double-arming
-        prev_looped = looped
-
-            # draw landmarks
-        if tr_lmk_obj:
-            mp_drawing.draw_landmarks(trainer_frame, tr_lmk_obj, mp_pose.POSE_CONNECTIONS)
-        if us_lmk_obj:
-            mp_drawing.draw_landmarks(user_frame, us_lmk_obj, mp_pose.POSE_CONNECTIONS)
-
-        combined = np.hstack((trainer_frame, user_frame))
-        cv2.putText(combined, f"Reps (trainer-driven): {len(rep_scores)}", (20, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 255), 3)
-        if last_rep_score is not None:
-            cv2.putText(combined, f"Last Rep Score: {last_rep_score:.3f}", (20, 95),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
-        
-        # Display real-time feedback
-        if current_feedback and (time.time() - feedback_display_time) < feedback_duration:
-            # Choose color based on feedback type
-            if "Excellent" in current_feedback or "Good" in current_feedback:
-                color = (50, 255, 50)  # Green for positive feedback
-            elif "Start moving" in current_feedback:
-                color = (0, 200, 255)  # Orange for movement prompts
-            else:
-                color = (0, 255, 255)  # Yellow for improvement tips
-            
-            # Display feedback on screen
-            cv2.putText(combined, current_feedback, (20, 210),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-        else:
-            # Clear feedback after duration expires
-            current_feedback = ""
-        if pre_start_mode:
-            # Sequential pre-start UI: show phase-specific messages or the start countdown
-            if show_start_message:
-                remaining_time = max(0, 2 - int(time.time() - start_message_time))
-                cv2.putText(combined, "Start exercise!", (20, 140),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
-                cv2.putText(combined, f"Starting in {remaining_time} seconds...", (20, 175),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 255, 50), 2)
-            else:
-                if pre_start_phase == 'weights' and require_weights:
-                    cv2.putText(combined, "Expecting weights...", (20, 140),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 200, 255), 2)
-                elif pre_start_phase == 'weights_done':
-                    cv2.putText(combined, "Weights equipped!", (20, 140),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
-                elif pre_start_phase == 'orientation':
-                    if not stable_orient_ok:
-                        cv2.putText(combined, "Align with trainer orientation...", (20, 140),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (80, 200, 255), 2)
-                elif pre_start_phase == 'orientation_done':
-                    cv2.putText(combined, "Orientation aligned!", (20, 140),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 255, 50), 2)
-        else:
-            # Workout running; no more gate messages
-            cv2.putText(combined, "Press 'q' to Quit", (20, 140),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-
-        cv2.imshow(win, combined)
-        key = cv2.waitKey(1) & 0xFF
+        if headless:
+            continue
+        with stats.time("waitkey"):
+            key = cv2.waitKey(1) & 0xFF
         if cv2.getWindowProperty(win, cv2.WND_PROP_VISIBLE) < 1:
             print("[INFO] Window closed by user.")
             break
         if key == ord('q'):
             break
 
-    cap_trainer.release()
-    cap_user.release()
-    cv2.destroyAllWindows()
+    stop.set()
+    capture.stop()
+    for w in workers:
+        w.join(timeout=2.0)
+    user_pose.close()
+    trainer_frames.close()
+    source.release()
+    if not headless:
+        cv2.destroyAllWindows()
 
+    rep_scores = scorer.rep_scores
     print("\n[INFO] Session ended.")
+    summary = stats.summary()
+    print("[INFO] Stage latency (p50 / p95 ms): " + ", ".join(
+        f"{stage} {summary[stage]['p50_ms']:.1f}/{summary[stage]['p95_ms']:.1f}"
+        for stage in LIVE_STAGES if stage in summary))
+    session_info = {
+        "frames": frame_seq,
+        "inference": scheduler.snapshot(),
+        "motion_skip_ratio": motion_gate.skip_ratio if motion_gate is not None else None,
+    }
+    if stats_path:
+        stats.dump(stats_path, extra=session_info)
+        print(f"[INFO] Stage timings written to {stats_path}")
+    if sinks:
+        events("summary", reps=len(rep_scores), rep_scores=[round(float(s), 4) for s in rep_scores],
+               fps=round(stats.fps(), 2), stages=summary, **session_info)
+    if event_log is not None:
+        event_log.close()
+    if recorder is not None:
+        recorder.close()
+        print(f"[INFO] Session recorded to {record_path} ({recorder.frames} frames, {recorder.nbytes / 1024:.0f} KiB)")
+    if motion_gate is not None and motion_gate.checked:
+        print(f"[INFO] Pose skipped on {motion_gate.skip_ratio:.0%} of {motion_gate.checked} frames (no motion)")
     print(f"Total Reps: {len(rep_scores)}")
     if rep_scores:
         print("Rep Scores:", [f"{s:.3f}" for s in rep_scores])
         
-        # Show summary window
-        print("\n[INFO] Opening summary window...")
-        show_exercise_summary(rep_scores)
+        if not headless:
+            # Show summary window
+            print("\n[INFO] Opening summary window...")
+            from summary_window import show_exercise_summary  # matplotlib + tkinter
+            show_exercise_summary(rep_scores)
+    return {"rep_scores": list(rep_scores), "stages": summary, **session_info}
 
 # UI helpers moved to ui_priority.py
 
@@ -574,10 +1083,47 @@ if __name__ == "__main__":
                         help="Weight for prioritized joints (>= nonpriority_weight).")
     parser.add_argument("--nonpriority_weight", type=float, default=0.2,
                         help="Weight for non-priority joints (0 to de-emphasize).")
+    parser.add_argument("--inference_fps", type=float, default=12.0,
+                        help="Max user pose inferences per second.")
+    parser.add_argument("--scoring_fps", type=float, default=25.0,
+                        help="Rate of the filtered, interpolated pose stream fed to scoring (0 = raw inference results).")
+    parser.add_argument("--stats_hud", action="store_true",
+                        help="Overlay fps and per-stage p95 latency on the live view.")
+    parser.add_argument("--stats_out", type=str, default=None,
+                        help="Write per-stage latency stats here at session end (.json, otherwise CSV).")
+    parser.add_argument("--target_fps", type=float, default=30.0,
+                        help="Display frame rate the inference scheduler protects.")
+    parser.add_argument("--latency_budget_ms", type=float, default=150.0,
+                        help="Capture-to-landmarks latency budget for picking the Pose model.")
+    parser.add_argument("--model_complexity", type=str, default="auto", choices=["auto", "0", "1", "2"],
+                        help="Pose model complexity; 'auto' switches it to fit the budgets.")
+    parser.add_argument("--roi_tracking", action="store_true",
+                        help="Run Pose on a crop around the last pose instead of the full frame.")
+    parser.add_argument("--no_motion_gate", action="store_true",
+                        help="Run Pose on every scheduled frame, even when the camera image hasn't changed.")
+    parser.add_argument("--trainer_cache_dir", type=str, default=None,
+                        help="Keep decoded trainer frames here and reuse them on the next run.")
+    parser.add_argument("--user_video", type=str, default=None,
+                        help="Replay this recording as the user instead of the webcam (every frame, as fast as possible).")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="FRAMES",
+                        help="Use this many generated frames as the user instead of the webcam.")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Pace --user_video / --synthetic at their frame rate and drop frames like a camera.")
+    parser.add_argument("--headless", action="store_true",
+                        help="No windows or keyboard; for replays, benchmarks and CI.")
+    parser.add_argument("--events_out", type=str, default=None,
+                        help="Write rep scores, feedback and timings as JSON lines here ('-' for stdout).")
+    parser.add_argument("--record", type=str, default=None,
+                        help="Record the user's landmarks and session events to this compact file.")
     args = parser.parse_args()
+    source = None
+    if args.user_video:
+        source = VideoFileSource(args.user_video, realtime=args.realtime)
+    elif args.synthetic:
+        source = SyntheticSource(num_frames=args.synthetic, realtime=args.realtime)
     # If no priority provided, open setup UI (priorities + weights mode)
     weights_mode = "without"
-    if not args.priority:
+    if not args.priority and not args.headless:
         priority, weights_mode = show_setup_ui()
     else:
         priority = [p.strip() for p in args.priority.split(',')] if args.priority else None
@@ -589,5 +1135,19 @@ if __name__ == "__main__":
         priority_weight=args.priority_weight,
         nonpriority_weight=args.nonpriority_weight,
         require_weights=(weights_mode == "with"),
+        inference_fps=args.inference_fps,
+        trainer_cache_dir=args.trainer_cache_dir,
+        target_fps=args.target_fps,
+        latency_budget_ms=args.latency_budget_ms,
+        model_complexity=None if args.model_complexity == "auto" else int(args.model_complexity),
+        roi_tracking=args.roi_tracking,
+        motion_gating=not args.no_motion_gate,
+        scoring_fps=args.scoring_fps,
+        stats_hud=args.stats_hud,
+        stats_path=args.stats_out,
+        source=source,
+        headless=args.headless,
+        events_path=args.events_out,
+        record_path=args.record,
     )
 
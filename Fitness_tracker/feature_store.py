@@ -0,0 +1,66 @@
+"""
+Incremental per-frame pose features for the live session.
+
+Each user pose is turned into its 8 joint angles and its torso forward vector
+exactly once, when it arrives. Windows are served as ring-buffer slices, and
+the orientation average is a running sum over the last `forward_window`
+frames, so per-tick feature cost no longer grows with the window length.
+Every pose carries its capture time, so windows can also be cut by duration.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from orientation import compute_forward_vector_3d
+from ring_buffer import RingBuffer
+from scoring import compute_angles_for_seq
+
+
+class PoseFeatureStore:
+    def __init__(self, capacity: int, forward_window: int):
+        self.capacity = max(int(capacity), int(forward_window), 1)
+        self.forward_window = max(1, int(forward_window))
+        self.landmarks = RingBuffer(self.capacity, shape=(33, 3))
+        self.angles = RingBuffer(self.capacity, shape=(8,))
+        self.times = RingBuffer(self.capacity, shape=(), dtype=np.float64)
+        # Frames without a usable forward vector are stored as zeros with valid=False
+        self._forward = RingBuffer(self.capacity, shape=(3,))
+        self._forward_valid = RingBuffer(self.capacity, shape=(), dtype=bool)
+        self._forward_sum = np.zeros(3, dtype=np.float64)
+        self._forward_count = 0
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    def append(self, lmk_arr: np.ndarray, t: float) -> None:
+        """Add one [33, 3] pose captured at time t (seconds, non-decreasing) and compute its features."""
+        # The frame falling out of the orientation window leaves the running sum
+        if len(self) >= self.forward_window:
+            if self._forward_valid.latest(self.forward_window)[0]:
+                self._forward_sum -= self._forward.latest(self.forward_window)[0]
+                self._forward_count -= 1
+
+        fwd = compute_forward_vector_3d(lmk_arr)
+        valid = fwd is not None and bool(np.isfinite(fwd).all())
+        if valid:
+            self._forward_sum += fwd
+            self._forward_count += 1
+        self.landmarks.append(lmk_arr)
+        self.angles.append(compute_angles_for_seq([lmk_arr])[0])
+        self.times.append(t)
+        self._forward.append(fwd if valid else 0.0)
+        self._forward_valid.append(valid)
+
+    def clear(self) -> None:
+        for buf in (self.landmarks, self.angles, self.times, self._forward, self._forward_valid):
+            buf.clear()
+        self._forward_sum[:] = 0.0
+        self._forward_count = 0
+
+    def mean_forward(self) -> Optional[np.ndarray]:
+        """Normalized mean forward vector of the last forward_window frames (as average_forward_vector)."""
+        if self._forward_count <= 0:
+            return None
+        v = self._forward_sum / (np.linalg.norm(self._forward_sum) + 1e-8)
+        return v.astype(np.float32)
@@ -2,10 +2,11 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 from collections import deque
 import cv2
-import pyttsx3
 import time
 import threading
 
+from scoring import REP_SCORE_DEFAULTS
+
 class ExerciseFeedbackSystem:
     """
     Real-time feedback system that analyzes user performance and provides
@@ -25,8 +26,8 @@ class ExerciseFeedbackSystem:
         
         # Feedback thresholds
         self.motion_threshold = 0.02  # Minimum motion to consider "moving"
-        self.good_rep_threshold = 0.5
-        self.excellent_rep_threshold = 0.8
+        self.good_rep_threshold = REP_SCORE_DEFAULTS.good
+        self.excellent_rep_threshold = REP_SCORE_DEFAULTS.excellent
         
         # Store previous feedback to avoid spam
         self.last_feedback = ""
@@ -41,6 +42,8 @@ class ExerciseFeedbackSystem:
     def _speak_in_thread(self, feedback: str):
         """Speak feedback in a separate thread with its own voice engine."""
         try:
+            import pyttsx3  # loaded on first spoken feedback
+
             # Create a fresh voice engine for this feedback
             engine = pyttsx3.init()
             engine.setProperty('rate', 150)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Cold-start import benchmark for the Fitness Tracker modules
+
+Imports each module in a fresh interpreter and reports wall time, peak RSS
+and which heavy optional packages (torch, CLIP, tkinter, matplotlib, pyttsx3)
+ended up loaded. The API server and scoring core are expected to load none of
+them; use --check in CI to fail when one sneaks back in or a budget is exceeded.
+
+Heavy packages pulled in by the baseline dependencies themselves (MediaPipe
+imports matplotlib.pyplot for its drawing utilities) are reported separately
+and do not fail the check, since no import ordering on our side avoids them.
+
+Examples:
+    python import_benchmark.py
+    python import_benchmark.py --repeat 5 --check --max-seconds 3 --max-rss-mb 400
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+# Packages that must stay behind lazy imports on the server path
+HEAVY_MODULES = ("torch", "clip", "tkinter", "matplotlib", "pyttsx3")
+
+DEFAULT_TARGETS = ("scoring", "feedback_system", "exercise", "api_server")
+# Third-party imports the server needs regardless; measured first for reference
+BASELINE_MODULE = "mediapipe"
+
+_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024  # macOS reports bytes
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024.0, "heavy": heavy}}))
+"""
+
+
+def probe(module: str, cwd: str) -> Dict:
+    """Import `module` in a fresh interpreter and return its timing/RSS record."""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        return {"error": tail[0]}
+    # Modules may print on import; the probe's JSON is always the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(targets: List[str], repeat: int, cwd: str, baseline: str = BASELINE_MODULE) -> Dict[str, Dict]:
+    results = {}
+    for module in ([baseline] if baseline else []) + list(targets):
+        if module in results:
+            continue
+        samples = [probe(module, cwd) for _ in range(max(1, repeat))]
+        errors = [s["error"] for s in samples if "error" in s]
+        if errors:
+            results[module] = {"error": errors[0]}
+            continue
+        times = sorted(s["seconds"] for s in samples)
+        results[module] = {
+            "seconds_median": times[len(times) // 2],
+            "seconds_min": times[0],
+            "rss_mb": max(s["rss_mb"] for s in samples),
+            "heavy": samples[-1]["heavy"],
+        }
+    inherited = set(results.get(baseline, {}).get("heavy", ())) if baseline else set()
+    for module, r in results.items():
+        if "heavy" in r:
+            r["inherited"] = [m for m in r["heavy"] if m in inherited]
+            r["heavy"] = [m for m in r["heavy"] if m not in inherited]
+    return results
+
+
+def print_report(results: Dict[str, Dict]):
+    print(f"{'module':<18}{'median s':>10}{'min s':>10}{'RSS MB':>10}  heavy modules")
+    print("-" * 70)
+    for module, r in results.items():
+        if "error" in r:
+            print(f"{module:<18}  ERROR: {r['error']}")
+            continue
+        heavy = ", ".join(r["heavy"] + [f"{m} (via baseline)" for m in r["inherited"]]) or "-"
+        print(f"{module:<18}{r['seconds_median']:>10.3f}{r['seconds_min']:>10.3f}{r['rss_mb']:>10.1f}  {heavy}")
+
+
+def check(results: Dict[str, Dict], max_seconds: float, max_rss_mb: float) -> List[str]:
+    failures = []
+    for module, r in results.items():
+        if "error" in r:
+            failures.append(f"{module}: import failed ({r['error']})")
+            continue
+        if r["heavy"]:
+            failures.append(f"{module}: loaded {', '.join(r['heavy'])} at import time")
+        if max_seconds and r["seconds_median"] > max_seconds:
+            failures.append(f"{module}: import took {r['seconds_median']:.2f}s > {max_seconds:.2f}s")
+        if max_rss_mb and r["rss_mb"] > max_rss_mb:
+            failures.append(f"{module}: RSS {r['rss_mb']:.0f} MB > {max_rss_mb:.0f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time and RSS of Fitness Tracker modules")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_TARGETS), help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on heavy imports or exceeded budgets")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="Median import time budget (0 = none)")
+    parser.add_argument("--max-rss-mb", type=float, default=0.0, help="Peak RSS budget in MB (0 = none)")
+    parser.add_argument("--baseline", default=BASELINE_MODULE,
+                        help="Dependency whose own heavy imports are not counted against our modules ('' to disable)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    results = run(args.modules, args.repeat, cwd, args.baseline)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    if args.check:
+        failures = check(results, args.max_seconds, args.max_rss_mb)
+        for f in failures:
+            print(f"FAIL {f}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Adaptive pose-inference rate and MediaPipe model_complexity selection.
+
+Stages report their latencies with record(); update() then
+  - lowers the inference rate multiplicatively while the display runs below
+    target_fps and raises it additively once it recovers, and
+  - steps model_complexity down when end-to-end latency (capture -> landmarks)
+    exceeds the budget, or the display is still short of target with the rate
+    already at min_inference_fps, and
+    up when the rate is saturated and the heavier model is predicted to fit.
+Complexity changes need the condition to hold for dwell_seconds, at least
+dwell_seconds after the previous switch, and the up-switch must fit the budget
+with a `hysteresis` margin, so the model doesn't flap between two levels.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+MODEL_COMPLEXITIES = (0, 1, 2)
+# Approximate Pose cost relative to complexity 1; predicts the latency of a
+# level until it has been measured
+COMPLEXITY_COST = {0: 0.6, 1: 1.0, 2: 2.8}
+
+
+class InferenceScheduler:
+    def __init__(self, target_fps: float = 30.0, latency_budget_ms: float = 150.0,
+                 max_inference_fps: float = 30.0, min_inference_fps: float = 10.0,
+                 model_complexity: Optional[int] = None, initial_complexity: int = 1,
+                 hysteresis: float = 0.15, dwell_seconds: float = 3.0, ema_alpha: float = 0.2):
+        """model_complexity pins the model (only the rate adapts); None lets it adapt."""
+        self.target_fps = float(target_fps)
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.max_inference_fps = float(max_inference_fps)
+        self.min_inference_fps = min(float(min_inference_fps), self.max_inference_fps)
+        self.fixed_complexity = model_complexity
+        self.complexity = model_complexity if model_complexity is not None else initial_complexity
+        self.hysteresis = hysteresis
+        self.dwell_seconds = dwell_seconds
+        self.ema_alpha = ema_alpha
+
+        self.inference_fps = self.max_inference_fps
+        self.switches = 0
+        self.stage_ema: Dict[str, float] = {}
+        self._inference_ema: Dict[int, float] = {}  # per complexity level
+        self._pending_dir = 0
+        self._pending_since = 0.0
+        self._last_switch: Optional[float] = None
+        self._previous_complexity = self.complexity
+        # Levels whose model failed to load (MediaPipe downloads 0 and 2 on first use)
+        self._unavailable = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "InferenceScheduler":
+        """Build from an object with the ExerciseConfig scheduling fields."""
+        return cls(target_fps=config.target_fps, latency_budget_ms=config.latency_budget_ms,
+                   max_inference_fps=config.max_inference_fps, min_inference_fps=config.min_inference_fps,
+                   model_complexity=config.model_complexity)
+
+    def _ema(self, table, key, value):
+        prev = table.get(key)
+        table[key] = value if prev is None else prev + self.ema_alpha * (value - prev)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Report one latency sample. Stages the scheduler acts on: "inference"
+        (one Pose call), "e2e" (capture to landmarks) and "display" (time
+        between shown frames); any other name is just tracked.
+        """
+        with self._lock:
+            self._ema(self.stage_ema, stage, seconds)
+            if stage == "inference":
+                self._ema(self._inference_ema, self.complexity, seconds)
+
+    @property
+    def interval(self) -> float:
+        """Seconds to wait between inference starts."""
+        with self._lock:
+            inference = self._inference_ema.get(self.complexity, 0.0)
+            return max(1.0 / self.inference_fps, inference)
+
+    def _predicted_e2e(self, level: int) -> float:
+        e2e = self.stage_ema.get("e2e", 0.0)
+        current = self._inference_ema.get(self.complexity)
+        if current is None:
+            return e2e * COMPLEXITY_COST[level] / COMPLEXITY_COST[self.complexity]
+        target = self._inference_ema.get(level, current * COMPLEXITY_COST[level] / COMPLEXITY_COST[self.complexity])
+        return e2e - current + target
+
+    def update(self, now: Optional[float] = None) -> bool:
+        """Re-plan rate and complexity from the latest samples; True when complexity changed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            h = self.hysteresis
+            display = self.stage_ema.get("display")
+            display_fps = 1.0 / display if display else None
+            # Without display samples (server side) only the latency budget applies
+            display_low = display_fps is not None and display_fps < self.target_fps * (1.0 - h)
+            display_ok = display_fps is None or display_fps >= self.target_fps * (1.0 - h / 2)
+
+            if display_low:
+                self.inference_fps = max(self.min_inference_fps, self.inference_fps * 0.85)
+            elif display_ok:
+                self.inference_fps = min(self.max_inference_fps, self.inference_fps + 0.5)
+
+            if self.fixed_complexity is not None or "e2e" not in self.stage_ema:
+                return False
+            want = 0
+            at_min_rate = self.inference_fps <= self.min_inference_fps * 1.01
+            at_max_rate = self.inference_fps >= self.max_inference_fps * 0.99
+            if self.complexity > MODEL_COMPLEXITIES[0] and self.complexity - 1 not in self._unavailable and (
+                    self.stage_ema["e2e"] > self.latency_budget or (not display_ok and at_min_rate)):
+                want = -1
+            elif (self.complexity < MODEL_COMPLEXITIES[-1] and self.complexity + 1 not in self._unavailable
+                  and display_ok and at_max_rate
+                  and self._predicted_e2e(self.complexity + 1) < self.latency_budget * (1.0 - h)):
+                want = 1
+
+            if want != self._pending_dir:
+                self._pending_dir = want
+                self._pending_since = now
+            if not want or now - self._pending_since < self.dwell_seconds \
+                    or (self._last_switch is not None and now - self._last_switch < self.dwell_seconds):
+                return False
+            new_level = self.complexity + want
+            # Old-model latencies would immediately argue for switching back
+            self.stage_ema["e2e"] = self._predicted_e2e(new_level)
+            self._previous_complexity = self.complexity
+            self.complexity = new_level
+            self.switches += 1
+            self._last_switch = now
+            self._pending_dir = 0
+            return True
+
+    def reject(self, level: int) -> None:
+        """The model for `level` could not be loaded: never pick it again, go back if it is current."""
+        with self._lock:
+            self._unavailable.add(level)
+            if self.complexity == level:
+                self.stage_ema["e2e"] = self._predicted_e2e(self._previous_complexity)
+                self.complexity = self._previous_complexity
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model_complexity": self.complexity,
+                "adaptive_complexity": self.fixed_complexity is None,
+                "inference_fps": round(self.inference_fps, 2),
+                "complexity_switches": self.switches,
+                "unavailable_complexities": sorted(self._unavailable),
+                "stage_ms": {k: round(v * 1000.0, 2) for k, v in self.stage_ema.items()},
+            }
@@ -0,0 +1,125 @@
+"""
+Landmark filtering and upsampling for the live session.
+
+Pose inference can run well below the rate scoring wants. OneEuroFilter
+smooths a whole [33, 3] pose in one set of array operations and keeps a
+velocity estimate, so the pose can be predicted a little ahead (e.g. to the
+capture time of the frame on screen). PoseUpsampler is the scoring clock: it
+puts the filtered poses on fixed-rate ticks, interpolating ticks between two
+inferences, so the scorer sees an evenly spaced, timestamped stream.
+"""
+
+import math
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class PoseEstimate(NamedTuple):
+    """Filtered pose at time t with its per-coordinate velocity (units per second)."""
+    t: float
+    pose: np.ndarray
+    velocity: np.ndarray
+
+    def at(self, t: float, max_ahead: float = 0.1) -> np.ndarray:
+        """Pose extrapolated to time t, at most max_ahead seconds past self.t."""
+        dt = min(max(t - self.t, 0.0), max_ahead)
+        return (self.pose + self.velocity * dt).astype(np.float32)
+
+
+def _alpha(cutoff, dt: float):
+    """Smoothing factor of a first-order low-pass with the given cutoff (Hz)."""
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter (Casiez et al.) applied to every coordinate of a pose at
+    once: the cutoff rises with each coordinate's speed, so still joints are
+    smoothed hard and moving ones follow with little lag.
+    """
+    def __init__(self, min_cutoff: float = 1.5, beta: float = 40.0, d_cutoff: float = 1.0,
+                 max_predict: float = 0.1):
+        """
+        min_cutoff: cutoff (Hz) for a coordinate at rest
+        beta: cutoff added per unit/second of speed (coordinates are normalized to the frame)
+        d_cutoff: cutoff (Hz) for the velocity estimate
+        max_predict: predict() never extrapolates further than this many seconds
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_predict = max_predict
+        self.t: Optional[float] = None
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Forget the track (e.g. the person left the frame)."""
+        self.t = None
+        self._x = None
+        self._dx = None
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        """Filter pose x observed at time t (seconds); returns the filtered pose as float32."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.t is None or self._x.shape != x.shape:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self.t = t
+            return self._x.astype(np.float32)
+        dt = t - self.t
+        if dt <= 0.0:
+            return self._x.astype(np.float32)
+        self._dx += _alpha(self.d_cutoff, dt) * ((x - self._x) / dt - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        self._x += _alpha(cutoff, dt) * (x - self._x)
+        self.t = t
+        return self._x.astype(np.float32)
+
+    def estimate(self) -> Optional[PoseEstimate]:
+        """Copy of the current state, safe to hand to another thread; None before the first pose."""
+        if self.t is None:
+            return None
+        return PoseEstimate(self.t, self._x.copy(), self._dx.copy())
+
+    def predict(self, t: float) -> Optional[np.ndarray]:
+        """Filtered pose extrapolated to time t (capped at max_predict); None before the first pose."""
+        if self.t is None:
+            return None
+        return PoseEstimate(self.t, self._x, self._dx).at(t, self.max_predict)
+
+
+class PoseUpsampler:
+    """
+    Emits poses on a fixed clock of `rate` Hz from poses that arrive at
+    irregular, usually lower, rates. Each push() returns the samples for
+    every tick up to the new pose's time, linearly interpolated from the
+    previous pose; the clock restarts after a missing pose or a gap longer
+    than max_gap seconds instead of bridging it.
+    """
+    def __init__(self, rate: float = 25.0, max_gap: float = 0.5):
+        self.period = 1.0 / rate
+        self.max_gap = max_gap
+        self._prev: Optional[np.ndarray] = None
+        self._prev_t = 0.0
+        self._next_tick = 0.0
+
+    def push(self, pose: Optional[np.ndarray], t: float) -> List[Tuple[float, np.ndarray]]:
+        """Add the pose observed at time t (None = no person); returns the due (tick time, pose) samples, oldest first."""
+        if pose is None:
+            self._prev = None
+            return []
+        if self._prev is None or t - self._prev_t > self.max_gap:
+            self._prev, self._prev_t, self._next_tick = pose, t, t
+        elif t < self._prev_t:
+            return []
+        out = []
+        span = t - self._prev_t
+        while self._next_tick <= t:
+            w = (self._next_tick - self._prev_t) / span if span > 0 else 1.0
+            out.append((self._next_tick, (self._prev + (pose - self._prev) * w).astype(np.float32)))
+            self._next_tick += self.period
+        self._prev, self._prev_t = pose, t
+        return out
@@ -0,0 +1,209 @@
+"""
+Building blocks for the threaded live session.
+
+Stages hand data to each other through LatestSlot: the writer overwrites, the
+reader always sees the newest value, so a slow consumer never makes a
+producer wait and never works on stale frames.
+
+Frames come from a frame source (webcam, video file or synthetic generator).
+Sources that aren't real time are replayed losslessly: CaptureThread waits
+until every reader has acknowledged a frame before reading the next, so a
+recorded session runs through the same code as fast as it can be processed.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from live_stats import StageStats
+
+
+class LatestSlot:
+    """Single-value mailbox with a sequence number that increments on every put()."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value: Any = None
+        self._seq = 0
+        self._acked = {}
+        self.closed = False
+
+    def put(self, value: Any) -> int:
+        """Store value; returns its sequence number."""
+        with self._cond:
+            self._value = value
+            self._seq += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def get(self) -> Tuple[int, Any]:
+        with self._cond:
+            return self._seq, self._value
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """
+        Block until a value newer than `seq` is available, the slot is closed or
+        the timeout passes; returns (seq, value). An unchanged seq means nothing new.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self.closed, timeout)
+            return self._seq, self._value
+
+    def ack(self, reader: str, seq: int) -> None:
+        """`reader` is done with value `seq`."""
+        with self._cond:
+            self._acked[reader] = seq
+            self._cond.notify_all()
+
+    def wait_acked(self, readers: Iterable[str], seq: int, timeout: Optional[float] = None) -> bool:
+        """Block until every reader acknowledged `seq` (True) or the timeout passes (False)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: all(self._acked.get(r, 0) >= seq for r in readers), timeout)
+
+    def close(self) -> None:
+        """No more values will arrive; wakes all waiters."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class CameraSource:
+    """Live webcam; frames are stamped with time.time() when read."""
+    realtime = True
+
+    def __init__(self, index: int = 0):
+        self.cap = cv2.VideoCapture(index)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        ok, frame = self.cap.read()
+        return ok, frame, time.time()
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class VideoFileSource:
+    """
+    Recorded user video. Frames are stamped with media time (frame index / fps)
+    offset to the wall clock at open, so timestamps advance at the video's rate.
+    realtime=True paces reads to that rate, like a camera; otherwise frames are
+    delivered as fast as the pipeline takes them.
+    """
+    def __init__(self, path: str, realtime: bool = False):
+        self.cap = cv2.VideoCapture(path)
+        self.realtime = realtime
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.fps = fps if fps > 0 else 30.0
+        self._index = 0
+        self._t0 = time.time()
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        t = self._t0 + self._index / self.fps
+        if self.realtime:
+            delay = t - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        ok, frame = self.cap.read()
+        self._index += 1
+        return ok, frame, t
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+def _moving_bar(i: int, size: Tuple[int, int]) -> np.ndarray:
+    w, h = size
+    frame = np.full((h, w, 3), 40, dtype=np.uint8)
+    x = (i * 8) % w
+    frame[:, x:x + 40] = 220
+    return frame
+
+
+class SyntheticSource:
+    """
+    Generated frames for benchmarking without a camera or video: frame_fn(i)
+    returns frame i (default: a bar sweeping across a gray frame). Stamped with
+    i / fps like a video file; num_frames=None never ends.
+    """
+    def __init__(self, frame_fn: Optional[Callable[[int], np.ndarray]] = None, fps: float = 30.0,
+                 num_frames: Optional[int] = 300, size: Tuple[int, int] = (640, 480), realtime: bool = False):
+        self.frame_fn = frame_fn or (lambda i: _moving_bar(i, size))
+        self.fps = fps
+        self.num_frames = num_frames
+        self.realtime = realtime
+        self._index = 0
+        self._t0 = time.time()
+
+    def isOpened(self) -> bool:
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray], float]:
+        if self.num_frames is not None and self._index >= self.num_frames:
+            return False, None, time.time()
+        t = self._t0 + self._index / self.fps
+        if self.realtime:
+            delay = t - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.frame_fn(self._index)
+        self._index += 1
+        return True, frame, t
+
+    def release(self) -> None:
+        pass
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads a frame source and keeps the freshest (capture time, frame, read
+    time.time()) in `slot`. Capture time is the source's timestamp (wall clock
+    for a camera, media time for recordings). For sources that aren't real
+    time, each frame is held until all `readers` have acked it on the slot.
+    With `stats`, read and resize/flip times are recorded as stages "capture"
+    and "resize_flip".
+    """
+    def __init__(self, source, slot: LatestSlot, size: Optional[Tuple[int, int]] = None,
+                 mirror: bool = False, stats: Optional[StageStats] = None, readers: Iterable[str] = ()):
+        super().__init__(name="capture", daemon=True)
+        self.source = source
+        self.slot = slot
+        self.readers = tuple(readers) if not source.realtime else ()
+        self.size = size
+        self.mirror = mirror
+        self.stats = stats
+        self.failed = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                t0 = time.perf_counter()
+                ok, frame, t_capture = self.source.read()
+                if not ok:
+                    self.failed = True
+                    break
+                t1 = time.perf_counter()
+                if self.size is not None:
+                    frame = cv2.resize(frame, self.size)
+                if self.mirror:
+                    frame = cv2.flip(frame, 1)
+                if self.stats is not None:
+                    self.stats.observe("capture", t1 - t0)
+                    self.stats.observe("resize_flip", time.perf_counter() - t1)
+                seq = self.slot.put((t_capture, frame, time.time()))
+                if self.readers:
+                    while not self._stop_event.is_set() and not self.slot.wait_acked(self.readers, seq, timeout=0.1):
+                        pass
+        finally:
+            self.slot.close()
+
+    def stop(self):
+        self._stop_event.set()
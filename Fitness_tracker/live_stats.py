@@ -0,0 +1,176 @@
+"""
+Per-stage timing for the live session.
+
+StageStats keeps one fixed-size log-bucketed histogram per stage (capture,
+inference, DTW, drawing, ...), so recording a sample is O(1) and memory does
+not grow with session length; percentiles are read back from the buckets.
+RateLimitedLog replaces per-frame / per-rep prints on the hot path, and
+EventLog writes rep scores, feedback and timings as JSON lines.
+"""
+
+import csv
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Bucket edges in seconds: 10 us .. 10 s, ~12% apart
+BUCKET_EDGES = np.geomspace(1e-5, 10.0, 121)
+
+
+class StageStats:
+    def __init__(self, edges: np.ndarray = BUCKET_EDGES, fps_window: int = 30):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self._counts: Dict[str, np.ndarray] = {}
+        self._sum: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+        self._frames = deque(maxlen=max(2, fps_window))
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        # Bucket i holds (edges[i-1], edges[i]]; the last one everything above edges[-1]
+        i = int(np.searchsorted(self.edges, seconds, side="left"))
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = self._counts[stage] = np.zeros(len(self.edges) + 1, dtype=np.int64)
+                self._sum[stage] = 0.0
+                self._max[stage] = 0.0
+            counts[i] += 1
+            self._sum[stage] += seconds
+            if seconds > self._max[stage]:
+                self._max[stage] = seconds
+
+    @contextmanager
+    def time(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def frame(self, now: Optional[float] = None) -> None:
+        """Mark one displayed frame; the interval is recorded as stage "frame"."""
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            last = self._frames[-1] if self._frames else None
+            self._frames.append(now)
+        if last is not None:
+            self.observe("frame", now - last)
+
+    def fps(self) -> float:
+        """Display rate over the last fps_window frames."""
+        with self._lock:
+            if len(self._frames) < 2:
+                return 0.0
+            return (len(self._frames) - 1) / max(self._frames[-1] - self._frames[0], 1e-9)
+
+    def quantile(self, stage: str, q: float) -> Optional[float]:
+        """Approximate q-quantile (0..1) in seconds, interpolated within its bucket; None without samples."""
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                return None
+            counts = counts.copy()
+            top = self._max[stage]
+        total = int(counts.sum())
+        rank = q * total
+        cum = np.cumsum(counts)
+        i = int(np.searchsorted(cum, rank, side="left"))
+        lo = self.edges[i - 1] if i > 0 else 0.0
+        hi = self.edges[i] if i < len(self.edges) else top
+        below = cum[i - 1] if i > 0 else 0
+        frac = (rank - below) / counts[i] if counts[i] else 1.0
+        return float(min(lo + (hi - lo) * frac, top))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: count, mean/p50/p95/max in milliseconds."""
+        with self._lock:
+            stages = sorted(self._counts)
+        out = {}
+        for stage in stages:
+            with self._lock:
+                count = int(self._counts[stage].sum())
+                mean = self._sum[stage] / count if count else 0.0
+                top = self._max[stage]
+            out[stage] = {
+                "count": count,
+                "mean_ms": round(mean * 1000.0, 3),
+                "p50_ms": round(self.quantile(stage, 0.5) * 1000.0, 3),
+                "p95_ms": round(self.quantile(stage, 0.95) * 1000.0, 3),
+                "max_ms": round(top * 1000.0, 3),
+            }
+        return out
+
+    def dump(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """Write summary() as JSON (path ending in .json, with `extra` merged in) or CSV (anything else)."""
+        summary = self.summary()
+        if path.lower().endswith(".json"):
+            doc = {"fps": round(self.fps(), 2), "stages": summary}
+            doc.update(extra or {})
+            with open(path, "w") as f:
+                json.dump(doc, f, indent=2)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+            for stage, row in summary.items():
+                writer.writerow([stage, row["count"], row["mean_ms"], row["p50_ms"], row["p95_ms"], row["max_ms"]])
+
+
+class RateLimitedLog:
+    """print() that emits each key at most once per `interval` seconds and reports what it held back."""
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key: str, message: str, now: Optional[float] = None) -> bool:
+        """Print message unless `key` was printed within the interval; True if printed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        print(message + (f" (+{suppressed} suppressed)" if suppressed else ""))
+        return True
+
+
+def draw_stats_hud(canvas: np.ndarray, stats: StageStats, stages: List[str], origin=(960, 30)) -> None:
+    """Overlay fps and per-stage p95 (ms) on canvas."""
+    x, y = origin
+    cv2.putText(canvas, f"{stats.fps():5.1f} fps", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    for stage in stages:
+        p95 = stats.quantile(stage, 0.95)
+        if p95 is None:
+            continue
+        y += 20
+        cv2.putText(canvas, f"{stage:<13}{p95 * 1000.0:7.1f} ms", (x, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+
+class EventLog:
+    """Structured session events, one JSON object per line ("-" writes to stdout)."""
+    def __init__(self, path: str):
+        self._file = sys.stdout if path == "-" else open(path, "w")
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, **fields) -> None:
+        line = json.dumps({"event": event, **fields}, default=float)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not sys.stdout:
+            self._file.close()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Fitness Tracker API
+
+Spins up N simulated users that each run the session lifecycle
+(start -> analyze / base64_frame / complete_rep / status -> end) at fixed
+rates with synthetic landmark windows and JPEG frames, then reports
+throughput, per-endpoint latency percentiles and error rate.
+
+Examples:
+    python load_test.py --users 8 --duration 30 --spawn-server
+    python load_test.py --sweep --max-users 64 --p95-slo-ms 250 --spawn-server
+"""
+
+import argparse
+import base64
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import requests
+
+
+# ------------------------------ Synthetic inputs ------------------------------
+def synthetic_landmarks(num_frames: int, phase: float = 0.0, fps: float = 25.0) -> List[List[List[float]]]:
+    """
+    A standing skeleton doing lateral raises: arms swing about the shoulders
+    at ~0.5 Hz, everything else holds still with a little jitter.
+    """
+    rng = np.random.default_rng()
+    base = np.zeros((33, 3), dtype=np.float32)
+    base[:, 0] = 0.5
+    base[:, 1] = 0.3
+    base[11] = (0.42, 0.30, 0.0); base[12] = (0.58, 0.30, 0.0)   # shoulders
+    base[23] = (0.45, 0.55, 0.0); base[24] = (0.55, 0.55, 0.0)   # hips
+    base[25] = (0.45, 0.72, 0.0); base[26] = (0.55, 0.72, 0.0)   # knees
+    base[27] = (0.45, 0.90, 0.0); base[28] = (0.55, 0.90, 0.0)   # ankles
+    out = np.repeat(base[None], num_frames, axis=0)
+    t = phase + np.arange(num_frames) / fps
+    lift = 0.5 * (1.0 - np.cos(2 * np.pi * 0.5 * t))  # 0..1
+    ang = np.radians(10 + 80 * lift)
+    for side, (sh, el, wr) in enumerate(((11, 13, 15), (12, 14, 16))):
+        sign = -1.0 if side == 0 else 1.0
+        out[:, el, 0] = out[:, sh, 0] + sign * 0.12 * np.sin(ang)
+        out[:, el, 1] = out[:, sh, 1] + 0.12 * np.cos(ang)
+        out[:, wr, 0] = out[:, sh, 0] + sign * 0.24 * np.sin(ang)
+        out[:, wr, 1] = out[:, sh, 1] + 0.24 * np.cos(ang)
+    out[:, :, :2] += rng.normal(0, 0.003, size=(num_frames, 33, 2)).astype(np.float32)
+    return out.tolist()
+
+
+def synthetic_jpeg(width: int = 640, height: int = 480, quality: int = 80) -> bytes:
+    """Encode a simple stick figure on a noisy background as a JPEG."""
+    rng = np.random.default_rng()
+    img = rng.integers(40, 80, size=(height, width, 3), dtype=np.uint8)
+    lms = np.asarray(synthetic_landmarks(1, phase=rng.uniform(0, 2))[0])
+    pts = {i: (int(lms[i, 0] * width), int(lms[i, 1] * height)) for i in range(33)}
+    for a, b in ((11, 12), (11, 13), (13, 15), (12, 14), (14, 16), (11, 23), (12, 24),
+                 (23, 24), (23, 25), (25, 27), (24, 26), (26, 28)):
+        cv2.line(img, pts[a], pts[b], (220, 200, 180), 12)
+    cv2.circle(img, (width // 2, int(0.2 * height)), 30, (220, 200, 180), -1)
+    _, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return buf.tobytes()
+
+
+# ------------------------------ Stats ------------------------------
+class LatencyStats:
+    """Thread-safe per-endpoint latency and error recorder."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out = {}
+            for ep, lat in sorted(self.latencies.items()):
+                arr = np.asarray(lat) * 1000.0
+                out[ep] = {
+                    "count": len(arr),
+                    "rps": len(arr) / max(elapsed, 1e-9),
+                    "p50_ms": float(np.percentile(arr, 50)),
+                    "p95_ms": float(np.percentile(arr, 95)),
+                    "p99_ms": float(np.percentile(arr, 99)),
+                    "error_rate": self.errors[ep] / max(len(arr), 1),
+                }
+            total = sum(len(v) for v in self.latencies.values())
+            errors = sum(self.errors.values())
+            all_lat = np.concatenate([np.asarray(v) for v in self.latencies.values()]) * 1000.0 if total else np.zeros(1)
+            out["__total__"] = {
+                "count": total,
+                "rps": total / max(elapsed, 1e-9),
+                "p50_ms": float(np.percentile(all_lat, 50)),
+                "p95_ms": float(np.percentile(all_lat, 95)),
+                "p99_ms": float(np.percentile(all_lat, 99)),
+                "error_rate": errors / max(total, 1),
+            }
+            return out
+
+
+# ------------------------------ Simulated user ------------------------------
+class SimulatedUser(threading.Thread):
+    def __init__(self, user_idx: int, args, stats: LatencyStats, stop_event: threading.Event, frame_pool: List[bytes]):
+        super().__init__(daemon=True, name=f"user-{user_idx}")
+        self.args = args
+        self.stats = stats
+        self.stop_event = stop_event
+        self.frame_pool = frame_pool
+        self.http = requests.Session()
+        self.rng = np.random.default_rng(user_idx)
+
+    def _call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.request(method, self.args.base_url + path, timeout=self.args.timeout, **kwargs)
+            ok = resp.status_code < 400
+        except requests.RequestException:
+            resp, ok = None, False
+        self.stats.record(endpoint, time.perf_counter() - t0, ok)
+        return resp
+
+    def _start_session(self) -> Optional[str]:
+        resp = self._call("POST /sessions/start", "POST", "/sessions/start", json={
+            "trainer_video_path": self.args.trainer_video,
+            "config": {"priority_joints": ["elbow", "shoulder"]},
+        })
+        if resp is None or resp.status_code != 200:
+            return None
+        session_id = resp.json()["session_id"]
+        deadline = time.time() + self.args.ready_timeout
+        while time.time() < deadline and not self.stop_event.is_set():
+            resp = self._call("GET /sessions/{id}/status", "GET", f"/sessions/{session_id}/status")
+            if resp is not None and resp.status_code == 200:
+                status = resp.json()["status"]
+                if status == "ready":
+                    return session_id
+                if status == "error":
+                    return None
+            time.sleep(0.2)
+        return None
+
+    def run(self):
+        session_id = self._start_session() if self.args.trainer_video else None
+        window = self.args.window
+        trainer_window = synthetic_landmarks(window)
+        trainer_template_id = None
+        # Stagger schedules so users do not fire in lockstep
+        now = time.perf_counter()
+        next_due = {
+            "analyze": now + self.rng.uniform(0, 1.0 / self.args.analyze_hz) if self.args.analyze_hz > 0 else float("inf"),
+            "frame": now + self.rng.uniform(0, 1.0 / self.args.frame_hz) if self.args.frame_hz > 0 else float("inf"),
+            "rep": now + self.args.rep_interval if self.args.rep_interval > 0 else float("inf"),
+            "status": now + self.args.status_interval if self.args.status_interval > 0 else float("inf"),
+        }
+        while not self.stop_event.is_set():
+            kind = min(next_due, key=next_due.get)
+            wait = next_due[kind] - time.perf_counter()
+            if wait > 0 and self.stop_event.wait(wait):
+                break
+            if kind == "analyze":
+                next_due[kind] += 1.0 / self.args.analyze_hz
+                user_window = synthetic_landmarks(window, phase=self.rng.uniform(0, 2))
+                if session_id:
+                    self._call("POST /sessions/{id}/analyze", "POST", f"/sessions/{session_id}/analyze", json={
+                        "session_id": session_id, "user_landmarks": user_window,
+                    })
+                else:
+                    body = {"session_id": "", "user_landmarks": user_window}
+                    if trainer_template_id:
+                        body["trainer_template_id"] = trainer_template_id
+                    else:
+                        body["trainer_landmarks"] = trainer_window
+                    resp = self._call("POST /analysis/pose", "POST", "/analysis/pose", json=body)
+                    if resp is not None and resp.status_code == 200:
+                        trainer_template_id = resp.json().get("trainer_template_id")
+                    elif resp is not None and resp.status_code == 404:
+                        trainer_template_id = None
+            elif kind == "frame":
+                next_due[kind] += 1.0 / self.args.frame_hz
+                jpeg = self.frame_pool[int(self.rng.integers(len(self.frame_pool)))]
+                gate_key = session_id or self.name
+                if self.args.frame_mode == "raw":
+                    self._call("POST /analysis/frame", "POST", "/analysis/frame",
+                               params={"scale": self.args.frame_scale, "session_id": gate_key},
+                               data=jpeg, headers={"Content-Type": "image/jpeg"})
+                elif self.args.frame_mode == "multipart":
+                    self._call("POST /analysis/frame_upload", "POST", "/analysis/frame_upload",
+                               files={"file": ("frame.jpg", jpeg, "image/jpeg")},
+                               data={"scale": self.args.frame_scale, "session_id": gate_key})
+                else:
+                    self._call("POST /analysis/base64_frame", "POST", "/analysis/base64_frame", json={
+                        "frame_b64": base64.b64encode(jpeg).decode("utf-8"), "session_id": gate_key,
+                    })
+            elif kind == "rep":
+                next_due[kind] += self.args.rep_interval
+                if session_id:
+                    self._call("POST /sessions/{id}/complete_rep", "POST", f"/sessions/{session_id}/complete_rep",
+                               data={"score": float(self.rng.uniform(0.3, 1.0))})
+            elif kind == "status":
+                next_due[kind] += self.args.status_interval
+                if session_id:
+                    self._call("GET /sessions/{id}/status", "GET", f"/sessions/{session_id}/status")
+            # Fell behind (server saturated): skip missed slots instead of bursting
+            now = time.perf_counter()
+            for k in next_due:
+                if next_due[k] < now - 1.0:
+                    next_due[k] = now
+        if session_id:
+            self._call("POST /sessions/{id}/end", "POST", f"/sessions/{session_id}/end")
+            self._call("DELETE /sessions/{id}", "DELETE", f"/sessions/{session_id}")
+
+
+# ------------------------------ Runner ------------------------------
+def run_load(args, num_users: int, frame_pool: List[bytes]):
+    stats = LatencyStats()
+    stop_event = threading.Event()
+    users = [SimulatedUser(i, args, stats, stop_event, frame_pool) for i in range(num_users)]
+    t0 = time.perf_counter()
+    for u in users:
+        u.start()
+    try:
+        time.sleep(args.duration)
+    finally:
+        stop_event.set()
+        for u in users:
+            u.join(timeout=args.timeout + args.ready_timeout)
+    elapsed = time.perf_counter() - t0
+    return stats.summary(elapsed), elapsed
+
+
+def print_report(num_users: int, summary: Dict[str, Dict[str, float]], elapsed: float):
+    print(f"\n📊 {num_users} users, {elapsed:.1f}s")
+    print(f"{'endpoint':<36} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for ep, s in summary.items():
+        name = "TOTAL" if ep == "__total__" else ep
+        print(f"{name:<36} {s['count']:>7d} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['error_rate']:>6.1%}")
+
+
+def is_sustainable(summary: Dict[str, Dict[str, float]], args) -> bool:
+    total = summary["__total__"]
+    return total["p95_ms"] <= args.p95_slo_ms and total["error_rate"] <= args.max_error_rate
+
+
+def saturation_sweep(args, frame_pool: List[bytes]):
+    """Double the user count until the SLO breaks, then bisect the last interval."""
+    cores = os.cpu_count() or 1
+    best = 0
+    lo, hi = 0, None
+    users = 1
+    while users <= args.max_users:
+        summary, elapsed = run_load(args, users, frame_pool)
+        print_report(users, summary, elapsed)
+        if is_sustainable(summary, args):
+            best = lo = users
+            users *= 2
+        else:
+            hi = users
+            break
+    if hi is not None:
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            summary, elapsed = run_load(args, mid, frame_pool)
+            print_report(mid, summary, elapsed)
+            if is_sustainable(summary, args):
+                best = lo = mid
+            else:
+                hi = mid
+    print("\n" + "=" * 50)
+    print(f"Max sustainable users: {best} (p95 <= {args.p95_slo_ms:.0f} ms, errors <= {args.max_error_rate:.1%})")
+    print(f"Users per core: {best / cores:.2f} ({cores} cores)")
+    return best
+
+
+def spawn_server(args) -> subprocess.Popen:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    port = args.base_url.rsplit(":", 1)[-1].strip("/")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api_server:app", "--host", "127.0.0.1", "--port", port,
+         "--log-level", "warning"],
+        cwd=script_dir,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if requests.get(args.base_url + "/health", timeout=1).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("API server did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Fitness Tracker API")
+    parser.add_argument("--base_url", "--base-url", dest="base_url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn-server", action="store_true", help="Start api_server with uvicorn for the run")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per run")
+    parser.add_argument("--trainer-video", dest="trainer_video", default=None,
+                        help="Server-side trainer video; enables the session lifecycle. "
+                             "Without it users hit /analysis/pose standalone.")
+    parser.add_argument("--window", type=int, default=30, help="Landmark frames per analyze call")
+    parser.add_argument("--analyze-hz", type=float, default=2.0, help="Analyze calls per user per second")
+    parser.add_argument("--frame-hz", type=float, default=5.0, help="base64_frame calls per user per second")
+    parser.add_argument("--rep-interval", type=float, default=3.0, help="Seconds between complete_rep calls")
+    parser.add_argument("--status-interval", type=float, default=5.0, help="Seconds between status polls")
+    parser.add_argument("--frame-mode", dest="frame_mode", choices=["base64", "raw", "multipart"], default="base64",
+                        help="Frame upload endpoint: base64_frame, frame (raw body) or frame_upload")
+    parser.add_argument("--frame-scale", dest="frame_scale", type=int, default=1, choices=[1, 2, 4, 8],
+                        help="Reduced-resolution decode factor for raw/multipart uploads")
+    parser.add_argument("--frame-width", type=int, default=640)
+    parser.add_argument("--frame-height", type=int, default=480)
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout")
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="Max wait for a session to become ready")
+    parser.add_argument("--sweep", action="store_true", help="Find max sustainable users per core")
+    parser.add_argument("--max-users", type=int, default=128)
+    parser.add_argument("--p95-slo-ms", type=float, default=250.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    frame_pool = [synthetic_jpeg(args.frame_width, args.frame_height) for _ in range(8)]
+    proc = spawn_server(args) if args.spawn_server else None
+    try:
+        if args.sweep:
+            saturation_sweep(args, frame_pool)
+        else:
+            summary, elapsed = run_load(args, args.users, frame_pool)
+            print_report(args.users, summary, elapsed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
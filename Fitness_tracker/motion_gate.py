@@ -0,0 +1,60 @@
+"""
+Motion gating for pose inference.
+
+A frame is compared with the frame of the last real Pose run on a small
+grayscale thumbnail; when the mean absolute difference stays under a
+threshold the previous landmarks are reused instead of running Pose. A full
+inference is forced at least every max_skip_seconds so the pose can't drift,
+and comparing against the last inferred frame (not the previous one) makes
+slow movement add up until it triggers.
+"""
+
+import time
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, threshold: float = 1.0, max_skip_seconds: float = 0.5, thumb_size=(64, 48)):
+        """threshold: mean absolute gray-level difference (0-255) that counts as motion."""
+        self.threshold = threshold
+        self.max_skip_seconds = max_skip_seconds
+        self.thumb_size = thumb_size
+        # Whatever the caller got from the last real inference; handed back on skipped frames
+        self.last_result: Any = None
+        self.last_motion = 0.0
+        self.checked = 0
+        self.skipped = 0
+        self._ref: Optional[np.ndarray] = None
+        self._candidate: Optional[np.ndarray] = None
+        self._last_inference = 0.0
+
+    def _thumbnail(self, frame_bgr: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_infer(self, frame_bgr: np.ndarray, now: Optional[float] = None) -> bool:
+        """True if Pose should run on this frame; False means reuse last_result."""
+        now = time.time() if now is None else now
+        self.checked += 1
+        thumb = self._thumbnail(frame_bgr)
+        self._candidate = thumb
+        if self._ref is None or now - self._last_inference >= self.max_skip_seconds:
+            return True
+        self.last_motion = float(np.abs(thumb - self._ref).mean())
+        if self.last_motion >= self.threshold:
+            return True
+        self.skipped += 1
+        return False
+
+    def inferred(self, result: Any, now: Optional[float] = None) -> None:
+        """Record the result of the inference should_infer() asked for."""
+        self.last_result = result
+        self._ref = self._candidate
+        self._last_inference = time.time() if now is None else now
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.checked if self.checked else 0.0
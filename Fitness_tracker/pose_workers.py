@@ -0,0 +1,251 @@
+"""
+Process pool for MediaPipe Pose inference.
+
+Each worker process owns one warm mp_pose.Pose graph. Frames are handed over
+through a shared-memory ring of preallocated slots and landmarks come back
+through a second shared-memory block as [33, 3] float32, so only a few small
+integers cross the process boundary per frame and nothing is pickled.
+
+Only numpy and cv2 are imported here at module level; mediapipe is imported
+inside the worker processes.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 33
+# Slot index a worker reports once its Pose graph is built
+READY_SLOT = -1
+
+
+def _pose_worker_main(worker_idx: int, frames_name: str, results_name: str, num_slots: int,
+                      max_height: int, max_width: int, task_q, done_q,
+                      model_complexity: int, min_detection_confidence: float):
+    import mediapipe as mp_lib
+
+    # Spawned children share the parent's resource tracker, and the parent
+    # unlinks both blocks in close(); workers only attach and close.
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    results_shm = shared_memory.SharedMemory(name=results_name)
+    frames = np.ndarray((num_slots, max_height, max_width, 3), dtype=np.uint8, buffer=frames_shm.buf)
+    results = np.ndarray((num_slots, NUM_LANDMARKS, 3), dtype=np.float32, buffer=results_shm.buf)
+
+    # Frames from different clients interleave on a worker, so no cross-frame tracking
+    def build(complexity):
+        return mp_lib.solutions.pose.Pose(
+            static_image_mode=True,
+            model_complexity=complexity,
+            min_detection_confidence=min_detection_confidence,
+        )
+    # The default graph is warm before READY; other complexities are built on first use
+    graphs = {model_complexity: build(model_complexity)}
+    done_q.put((worker_idx, READY_SLOT, 0, False, 0.0))
+    try:
+        while True:
+            task = task_q.get()
+            if task is None:
+                break
+            slot, gen, h, w, complexity = task
+            t0 = time.perf_counter()
+            found = False
+            try:
+                if complexity not in graphs:
+                    try:
+                        graphs[complexity] = build(complexity)
+                    except Exception as e:
+                        # e.g. model download failed; serve this level with the default graph
+                        print(f"[POSE-WORKER {worker_idx}] model_complexity={complexity} unavailable: {e}")
+                        graphs[complexity] = graphs[model_complexity]
+                rgb = cv2.cvtColor(frames[slot, :h, :w], cv2.COLOR_BGR2RGB)
+                res = graphs[complexity].process(rgb)
+                if res.pose_landmarks:
+                    lms = res.pose_landmarks.landmark
+                    results[slot] = [(lm.x, lm.y, lm.z) for lm in lms]
+                    found = True
+            except Exception as e:
+                print(f"[POSE-WORKER {worker_idx}] Inference error: {e}")
+            done_q.put((worker_idx, slot, gen, found, time.perf_counter() - t0))
+    finally:
+        for pose in {id(g): g for g in graphs.values()}.values():
+            pose.close()
+        del frames, results
+        frames_shm.close()
+        results_shm.close()
+
+
+class PoseWorkerPool:
+    """
+    Pool of pose worker processes fed through a shared-memory frame ring.
+
+    submit(frame_bgr) copies the frame into a free slot (downscaling it if it
+    exceeds the slot size; landmarks are normalized so this is transparent)
+    and returns a Future that resolves to a [33, 3] float32 array, or None when
+    no person is detected.
+    """
+    def __init__(self, num_workers: int, num_slots: Optional[int] = None,
+                 max_height: int = 480, max_width: int = 640,
+                 model_complexity: int = 1, min_detection_confidence: float = 0.5):
+        self.num_workers = max(1, int(num_workers))
+        self.num_slots = int(num_slots or 4 * self.num_workers)
+        self.max_height = max_height
+        self.max_width = max_width
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+
+        self._ctx = mp.get_context("spawn")
+        frame_bytes = self.num_slots * max_height * max_width * 3
+        result_bytes = self.num_slots * NUM_LANDMARKS * 3 * 4
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=frame_bytes)
+        self._results_shm = shared_memory.SharedMemory(create=True, size=result_bytes)
+        self._frames = np.ndarray((self.num_slots, max_height, max_width, 3), dtype=np.uint8,
+                                  buffer=self._frames_shm.buf)
+        self._results = np.ndarray((self.num_slots, NUM_LANDMARKS, 3), dtype=np.float32,
+                                   buffer=self._results_shm.buf)
+
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for i in range(self.num_slots):
+            self._free_slots.put(i)
+        self._gen = [0] * self.num_slots
+        # slot -> (generation, worker index, future)
+        self._pending: Dict[int, Tuple[int, int, Future]] = {}
+        self._in_flight = [0] * self.num_workers
+        self._lock = threading.Lock()
+        self._closing = False
+        self._ready = set()
+        self._all_ready = threading.Event()
+
+        self._done_q = self._ctx.Queue()
+        self._task_qs: List = [self._ctx.Queue() for _ in range(self.num_workers)]
+        self._procs: List = [self._spawn(i) for i in range(self.num_workers)]
+        self._collector = threading.Thread(target=self._collect, name="pose-pool-collector", daemon=True)
+        self._collector.start()
+
+    def _spawn(self, worker_idx: int):
+        proc = self._ctx.Process(
+            target=_pose_worker_main,
+            args=(worker_idx, self._frames_shm.name, self._results_shm.name, self.num_slots,
+                  self.max_height, self.max_width, self._task_qs[worker_idx], self._done_q,
+                  self.model_complexity, self.min_detection_confidence),
+            name=f"pose-worker-{worker_idx}",
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(self._in_flight)
+
+    def _fit(self, frame_bgr: np.ndarray) -> np.ndarray:
+        h, w = frame_bgr.shape[:2]
+        if h <= self.max_height and w <= self.max_width:
+            return frame_bgr
+        s = min(self.max_height / h, self.max_width / w)
+        return cv2.resize(frame_bgr, (max(1, int(w * s)), max(1, int(h * s))), interpolation=cv2.INTER_AREA)
+
+    def submit(self, frame_bgr: np.ndarray, timeout: Optional[float] = None,
+               model_complexity: Optional[int] = None) -> Future:
+        """model_complexity None uses the pool default; others get their own graph per worker."""
+        if self._closing:
+            raise RuntimeError("Pose worker pool is closed")
+        try:
+            slot = self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No free frame slot in pose worker pool")
+        frame = self._fit(frame_bgr)
+        h, w = frame.shape[:2]
+        self._frames[slot, :h, :w] = frame
+        fut: Future = Future()
+        with self._lock:
+            self._gen[slot] += 1
+            gen = self._gen[slot]
+            worker_idx = min(range(self.num_workers), key=self._in_flight.__getitem__)
+            self._in_flight[worker_idx] += 1
+            self._pending[slot] = (gen, worker_idx, fut)
+        complexity = self.model_complexity if model_complexity is None else int(model_complexity)
+        self._task_qs[worker_idx].put((slot, gen, h, w, complexity))
+        return fut
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has built its Pose graph."""
+        return self._all_ready.wait(timeout)
+
+    def process(self, frame_bgr: np.ndarray, timeout: float = 10.0,
+                model_complexity: Optional[int] = None) -> Optional[np.ndarray]:
+        """Blocking helper: run one frame and return [33, 3] float32 landmarks or None."""
+        return self.submit(frame_bgr, timeout=timeout, model_complexity=model_complexity).result(timeout=timeout)
+
+    def _finish(self, slot: int, result: Optional[np.ndarray] = None, error: Optional[BaseException] = None):
+        # Caller holds self._lock
+        gen, worker_idx, fut = self._pending.pop(slot)
+        self._in_flight[worker_idx] -= 1
+        self._free_slots.put(slot)
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def _collect(self):
+        while True:
+            try:
+                msg = self._done_q.get(timeout=0.5)
+            except queue.Empty:
+                msg = None
+            except (EOFError, OSError):
+                break
+            if msg is not None and msg[1] == READY_SLOT:
+                self._ready.add(msg[0])
+                if len(self._ready) >= self.num_workers:
+                    self._all_ready.set()
+            elif msg is not None:
+                worker_idx, slot, gen, found, _elapsed = msg
+                with self._lock:
+                    entry = self._pending.get(slot)
+                    if entry is not None and entry[0] == gen:
+                        result = self._results[slot].copy() if found else None
+                        self._finish(slot, result=result)
+            if self._closing:
+                if not self._pending:
+                    break
+                continue
+            self._reap_dead_workers()
+
+    def _reap_dead_workers(self):
+        for i, proc in enumerate(self._procs):
+            if proc.is_alive():
+                continue
+            print(f"[POSE-POOL] Worker {i} exited (code {proc.exitcode}); restarting")
+            with self._lock:
+                for slot in [s for s, (_, w, _) in self._pending.items() if w == i]:
+                    self._finish(slot, error=RuntimeError("Pose worker crashed"))
+            self._task_qs[i] = self._ctx.Queue()
+            self._procs[i] = self._spawn(i)
+
+    def close(self, timeout: float = 5.0):
+        if self._closing:
+            return
+        self._closing = True
+        for q in self._task_qs:
+            q.put(None)
+        for proc in self._procs:
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                proc.terminate()
+        with self._lock:
+            for slot in list(self._pending):
+                self._finish(slot, error=RuntimeError("Pose worker pool closed"))
+        self._collector.join(timeout=timeout)
+        del self._frames, self._results
+        self._frames_shm.close()
+        self._frames_shm.unlink()
+        self._results_shm.close()
+        self._results_shm.unlink()
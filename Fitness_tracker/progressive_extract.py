@@ -0,0 +1,123 @@
+"""
+Pose extraction from a video file that is still being written.
+
+The upload handler appends chunks to a file and calls notify(); run(), on a
+worker thread, opens the file as soon as there is enough data, decodes and
+runs Pose on every frame available so far, and reopens the file and skips
+the frames already done when more data arrives. An open VideoCapture stops
+at the end of file it first saw, so each pass needs a fresh one. Skipping
+reads from the start with grab() (decode only, no conversion or Pose):
+seeking with CAP_PROP_POS_FRAMES lands on keyframes for most codecs, which
+would repeat or drop frames. To keep the skipping linear in the file size,
+a pass only starts once the file has grown retry_growth-fold since the last
+one: a 512 MB upload takes about 16 passes and decodes each frame about 3
+times in total, but runs Pose on it once. Containers that can't be opened
+until they are complete (MP4 with the index at the end) simply fall back to
+a single pass once the upload finishes.
+"""
+
+import threading
+from collections import deque
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from exercise import downscale_frame, extract_landmarks, mp_pose
+
+
+class ProgressivePoseExtractor:
+    def __init__(self, path: str, min_bytes: int = 256 * 1024, retry_bytes: int = 1024 * 1024,
+                 retry_growth: float = 1.5, holdback_frames: int = 2, max_size: Optional[int] = None):
+        """
+        retry_bytes / retry_growth: a new pass starts once the file has grown by at least
+          retry_bytes and to retry_growth times its size at the previous pass
+        max_size: downscale frames whose longer side exceeds this before Pose, as
+          extract_pose_sequence(max_size=...) does
+        """
+        self.path = path
+        self.min_bytes = min_bytes
+        self.retry_bytes = retry_bytes
+        self.retry_growth = max(1.0, float(retry_growth))
+        self.max_size = max_size
+        # Frames this close to the end of a growing file may be truncated; they
+        # are only processed once more data (or the end of the upload) follows
+        self.holdback_frames = holdback_frames
+        self.frames_decoded = 0
+        self.passes = 0
+        self._written = 0
+        self._finished = False
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def notify(self, bytes_written: int) -> None:
+        """Writer side: total bytes flushed to the file so far."""
+        with self._cond:
+            self._written = bytes_written
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        """Writer side: the file is complete."""
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def _wait_for_data(self, attempted_at: int):
+        threshold = max(self.min_bytes, attempted_at + self.retry_bytes, attempted_at * self.retry_growth)
+        with self._cond:
+            while not (self._cancelled or self._finished or self._written >= threshold):
+                self._cond.wait()
+            return self._cancelled, self._finished, self._written
+
+    def run(self) -> Optional[List[np.ndarray]]:
+        """
+        Blocking: returns the list of [33, 3] landmark arrays in frame order,
+        or None if cancelled.
+        """
+        seq: List[np.ndarray] = []
+        attempted_at = 0
+        with mp_pose.Pose() as pose:
+            while True:
+                cancelled, finished, written = self._wait_for_data(attempted_at)
+                if cancelled:
+                    return None
+                attempted_at = written
+                self._decode_available(pose, seq, final=finished)
+                if self._cancelled:
+                    return None
+                if finished:
+                    return seq
+
+    def _decode_available(self, pose, seq: List[np.ndarray], final: bool) -> None:
+        cap = cv2.VideoCapture(self.path)
+        try:
+            if not cap.isOpened():
+                return
+            self.passes += 1
+            for _ in range(self.frames_decoded):
+                if self._cancelled or not cap.grab():
+                    return
+            pending = deque()
+            while not self._cancelled:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                pending.append(frame)
+                if len(pending) > self.holdback_frames:
+                    self._process(pose, pending.popleft(), seq)
+            if final:
+                while pending and not self._cancelled:
+                    self._process(pose, pending.popleft(), seq)
+        finally:
+            cap.release()
+
+    def _process(self, pose, frame, seq: List[np.ndarray]) -> None:
+        self.frames_decoded += 1
+        _, lmk_arr = extract_landmarks(downscale_frame(frame, self.max_size), pose)
+        if lmk_arr is not None and lmk_arr.shape == (33, 3):
+            seq.append(lmk_arr)
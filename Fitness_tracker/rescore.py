@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Offline re-scoring and parameter sweeps over recorded sessions
+
+Each recording (exercise.py --record) is replayed through the live landmark
+filter and scoring clock, and the user window of every recorded rep is cut
+the way the live scorer cut it. The expensive, parameter-free part of a rep
+score (DTW distance and motion amplitudes, scoring.rep_features) is computed
+once per session, in parallel, and cached on disk. A sweep then only
+evaluates scoring.rep_scores_from_features for every setting of the grid,
+fanned out over a process pool, and reports each setting's score
+distribution.
+
+Grid values are comma lists or start:stop:step ranges (stop included).
+
+Examples:
+    python rescore.py sessions/*.ftsr
+    python rescore.py sessions/*.ftsr --dist-scale 0.02:0.05:0.005 --gate 0.3,0.4,0.5 --out sweep.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from landmark_filter import OneEuroFilter, PoseUpsampler
+from scoring import (
+    REP_FEATURES,
+    REP_SCORE_DEFAULTS,
+    RepScoreParams,
+    compute_angles_for_seq,
+    rep_features,
+    rep_scores_from_features,
+    rep_window_angles,
+)
+from session_recording import SessionReader
+
+# Bump when the way rep features are derived changes, so stale caches are ignored
+FEATURES_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.fitness_tracker/rescore_cache")
+# Event times are rounded to the millisecond; samples are at least a scoring tick apart
+_EVENT_TOLERANCE = 5e-4
+HIST_EDGES = np.linspace(0.0, 1.0, 11)
+
+
+# ------------------------------ Per-session features ------------------------------
+def replay_samples(times: np.ndarray, poses: np.ndarray, scoring_fps: float):
+    """The (time, pose) samples the live scorer received for these inference results (NaN pose = none)."""
+    lmk_filter = OneEuroFilter() if scoring_fps > 0 else None
+    upsampler = PoseUpsampler(scoring_fps) if scoring_fps > 0 else None
+    for t, pose in zip(times, poses):
+        pose = None if np.isnan(pose[0, 0]) else pose
+        if lmk_filter is None:
+            if pose is not None:
+                yield t, pose
+        elif pose is None:
+            lmk_filter.reset()
+            upsampler.push(None, t)
+        else:
+            yield from upsampler.push(lmk_filter(pose, t), t)
+
+
+def session_rep_features(path: str) -> Dict[str, np.ndarray]:
+    """
+    For every rep recorded in the session: rep_features of the user window the
+    live scorer saw ([R, 5]), the rep's time and the score given live.
+    """
+    with SessionReader(path) as reader:
+        ref = reader.meta.get("reference")
+        if ref is None:
+            raise ValueError(f"{path}: recording has no trainer reference (recorded before rescore support)")
+        trainer_angles = np.asarray(ref["angles"], dtype=np.float32)
+        weights = np.asarray(ref["weights"], dtype=np.float32)
+        priority_mask = np.asarray(ref["priority_mask"], dtype=bool)
+        rate = ref.get("rate")
+        scoring_fps = float(reader.meta.get("scoring_fps") or 0.0)
+        times, poses = reader.frames()
+        starts = [e["t"] for e in reader.events("phase") if e.get("phase") == "workout"]
+        reps = reader.events("rep")
+
+    samples = list(replay_samples(times, poses, scoring_fps))
+    sample_times = np.array([t for t, _ in samples], dtype=np.float64)
+    angles = compute_angles_for_seq([pose for _, pose in samples])
+    # The live scorer clears its buffers when the workout starts
+    t_start = starts[0] + _EVENT_TOLERANCE if starts else -np.inf
+    lo = int(np.searchsorted(sample_times, t_start, side="right"))
+    n = max(1, len(trainer_angles))
+    features = np.zeros((len(reps), len(REP_FEATURES)), dtype=np.float64)
+    for i, rep in enumerate(reps):
+        hi = int(np.searchsorted(sample_times, rep["t"] + _EVENT_TOLERANCE, side="right"))
+        if hi <= lo:
+            # No user data: scored 0 live; an infinite distance scores 0 for any setting
+            features[i] = (np.inf, 0.0, 1.0, 0.0, 1.0)
+            continue
+        window = rep_window_angles(sample_times[lo:hi], angles[lo:hi], n, rate)
+        features[i] = rep_features(window, trainer_angles, weights, priority_mask)
+    return {
+        "features": features,
+        "rep_times": np.array([rep["t"] for rep in reps], dtype=np.float64),
+        "live_scores": np.array([rep.get("score", np.nan) for rep in reps], dtype=np.float64),
+    }
+
+
+def _cache_path(cache_dir: str, path: str) -> str:
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{FEATURES_VERSION}"
+    return os.path.join(cache_dir, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".npz")
+
+
+def _load_cached(cache_path: str) -> Optional[Dict[str, np.ndarray]]:
+    try:
+        with np.load(cache_path) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def _compute_and_cache(path: str, cache_path: Optional[str]) -> Dict[str, np.ndarray]:
+    result = session_rep_features(path)
+    if cache_path:
+        # Write to a temp name and rename so a concurrent run never loads a partial file
+        tmp = f"{cache_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, **result)
+        os.replace(tmp, cache_path)
+    return result
+
+
+def load_features(paths: Sequence[str], cache_dir: Optional[str], pool: Optional[ProcessPoolExecutor]):
+    """Per-session rep features, from the cache where possible; returns (results, cached count)."""
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    cache_paths = [_cache_path(cache_dir, p) if cache_dir else None for p in paths]
+    results: List[Optional[Dict[str, np.ndarray]]] = [
+        _load_cached(c) if c else None for c in cache_paths]
+    cached = sum(r is not None for r in results)
+    todo = [i for i, r in enumerate(results) if r is None]
+    if pool is not None:
+        futures = {i: pool.submit(_compute_and_cache, paths[i], cache_paths[i]) for i in todo}
+        for i, future in futures.items():
+            results[i] = future.result()
+    else:
+        for i in todo:
+            results[i] = _compute_and_cache(paths[i], cache_paths[i])
+    return results, cached
+
+
+# ------------------------------ Sweep ------------------------------
+_worker_features: Optional[np.ndarray] = None
+
+
+def _init_worker(features: np.ndarray) -> None:
+    global _worker_features
+    _worker_features = features
+
+
+def summarize(scores: np.ndarray, params: RepScoreParams) -> Dict[str, Any]:
+    """Distribution of one setting's rep scores."""
+    row: Dict[str, Any] = dict(params._asdict())
+    row["reps"] = int(len(scores))
+    if len(scores) == 0:
+        return row
+    q = np.percentile(scores, [10, 25, 50, 75, 90])
+    row.update({
+        "mean": float(scores.mean()), "std": float(scores.std()),
+        "p10": float(q[0]), "p25": float(q[1]), "p50": float(q[2]), "p75": float(q[3]), "p90": float(q[4]),
+        "excellent_frac": float((scores >= params.excellent).mean()),
+        "good_frac": float(((scores >= params.good) & (scores < params.excellent)).mean()),
+        "poor_frac": float((scores < params.good).mean()),
+        "hist": np.histogram(np.clip(scores, 0.0, 1.0), bins=HIST_EDGES)[0].tolist(),
+    })
+    return row
+
+
+def _score_settings(settings: List[RepScoreParams], features: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    features = _worker_features if features is None else features
+    return [summarize(rep_scores_from_features(features, params), params) for params in settings]
+
+
+def sweep(features: np.ndarray, settings: List[RepScoreParams], pool: Optional[ProcessPoolExecutor],
+          workers: int) -> List[Dict[str, Any]]:
+    """summarize() for every setting, in grid order; settings are split into chunks across the pool."""
+    if pool is None:
+        return _score_settings(settings, features)
+    size = max(1, -(-len(settings) // (4 * workers)))
+    chunks = [settings[i:i + size] for i in range(0, len(settings), size)]
+    return [row for rows in pool.map(_score_settings, chunks) for row in rows]
+
+
+def parse_grid(spec: Optional[str], default: float) -> List[float]:
+    """'0.02,0.03' or '0.02:0.05:0.01' (stop included); None means just the default."""
+    if not spec:
+        return [default]
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 10) for i in range(max(count, 1))]
+    return [float(x) for x in spec.split(",") if x.strip()]
+
+
+def write_rows(path: str, rows: List[Dict[str, Any]]) -> None:
+    """JSON (path ending in .json) or CSV (anything else; without the histogram)."""
+    if path.lower().endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+        return
+    columns = [k for k in rows[0] if k != "hist"] if rows else []
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded sessions and sweep scoring constants")
+    parser.add_argument("recordings", nargs="+", help="Session recordings (exercise.py --record)")
+    parser.add_argument("--cache-dir", dest="cache_dir", default=DEFAULT_CACHE_DIR,
+                        help="Where per-session rep features are cached")
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Recompute rep features")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = inline)")
+    parser.add_argument("--dist-scale", dest="dist_scale", default=None, help="Similarity exp(-k * DTW distance) k")
+    parser.add_argument("--gate", default=None, help="Base score from which non-priority motion is checked")
+    parser.add_argument("--np-ratio-limit", dest="np_ratio_limit", default=None,
+                        help="Non-priority motion ratio counted as excessive")
+    parser.add_argument("--np-penalty", dest="np_penalty", default=None, help="Score multiplier for excessive motion")
+    parser.add_argument("--good", default=None, help="'Good rep' score threshold")
+    parser.add_argument("--excellent", default=None, help="'Excellent rep' score threshold")
+    parser.add_argument("--out", default=None, help="Write every setting's distribution (.json, otherwise CSV)")
+    parser.add_argument("--show", type=int, default=20, help="Settings to print")
+    args = parser.parse_args()
+
+    grid = [parse_grid(getattr(args, name), getattr(REP_SCORE_DEFAULTS, name)) for name in RepScoreParams._fields]
+    settings = [RepScoreParams(*values) for values in itertools.product(*grid)]
+    workers = max(1, args.workers)
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        t0 = time.perf_counter()
+        results, cached = load_features(args.recordings, None if args.no_cache else args.cache_dir, pool)
+        features = np.concatenate([r["features"] for r in results]) if results else np.zeros((0, 5))
+        live = np.concatenate([r["live_scores"] for r in results]) if results else np.zeros((0,))
+        t1 = time.perf_counter()
+        print(f"[INFO] {len(features)} reps from {len(results)} sessions ({cached} cached) in {t1 - t0:.2f}s")
+        if len(features) == 0:
+            print("[ERROR] No recorded reps.")
+            return 1
+        replayed = rep_scores_from_features(features, REP_SCORE_DEFAULTS)
+        known = np.isfinite(live)
+        if known.any():
+            print(f"[INFO] Default constants vs live scores: max |diff| {np.abs(replayed - live)[known].max():.4f}")
+
+        if pool is not None:
+            # Fresh pool so every worker holds the features once instead of receiving them per task
+            pool.shutdown()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(features,))
+        rows = sweep(features, settings, pool, workers)
+        t2 = time.perf_counter()
+        print(f"[INFO] {len(settings)} settings x {len(features)} reps scored in {t2 - t1:.2f}s")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    varied = [name for name, values in zip(RepScoreParams._fields, grid) if len(values) > 1]
+    header = varied + ["mean", "p10", "p50", "p90", "excellent_frac", "good_frac", "poor_frac"]
+    print("  ".join(f"{h:>14}" for h in header))
+    for row in rows[:args.show]:
+        print("  ".join(f"{row[h]:>14.4f}" for h in header))
+    if len(rows) > args.show:
+        print(f"... {len(rows) - args.show} more")
+    if args.out:
+        write_rows(args.out, rows)
+        print(f"[INFO] Wrote {len(rows)} settings to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
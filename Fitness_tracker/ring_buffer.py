@@ -0,0 +1,51 @@
+"""
+Fixed-capacity circular buffer of equally shaped numpy records.
+
+Storage is double-mapped: every record is written to slot i and slot i + N of
+a [2N, ...] array, so the newest k records are always a contiguous slice and
+latest(k) returns a view without copying or re-stacking.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, shape: Tuple[int, ...] = (33, 3), dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._cap = int(capacity)
+        self._data = np.zeros((2 * self._cap,) + tuple(shape), dtype=dtype)
+        self._pos = -1  # slot of the newest record
+        self._len = 0
+
+    @property
+    def maxlen(self) -> int:
+        return self._cap
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, record: np.ndarray) -> None:
+        """O(1); the oldest record is dropped once the buffer is full."""
+        self._pos = (self._pos + 1) % self._cap
+        self._data[self._pos] = record
+        self._data[self._pos + self._cap] = record
+        if self._len < self._cap:
+            self._len += 1
+
+    def clear(self) -> None:
+        self._pos = -1
+        self._len = 0
+
+    def latest(self, k: int = None) -> np.ndarray:
+        """
+        Read-only [min(k, len), ...] view of the newest records, oldest first
+        (all records when k is None). Valid until the next append().
+        """
+        n = self._len if k is None else max(0, min(int(k), self._len))
+        end = self._pos + self._cap + 1
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
@@ -0,0 +1,89 @@
+"""
+Region-of-interest tracking for pose inference.
+
+The person usually occupies a stable part of the frame, so the next Pose call
+only needs the previous landmarks' bounding box plus a margin. The box is
+sticky: it is kept while the person stays well inside it, so MediaPipe's own
+frame-to-frame tracking sees a steady input. When the crop loses the person
+the caller retries on the full frame and tracking starts over.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1 in pixels
+
+
+class RoiTracker:
+    def __init__(self, margin: float = 0.3, min_fraction: float = 0.3, full_frame_fraction: float = 0.8):
+        """
+        margin: padding around the landmark bounding box, as a fraction of its size
+        min_fraction: smallest crop side, as a fraction of the frame side
+        full_frame_fraction: crops covering more of the frame area than this aren't worth it
+        """
+        self.margin = margin
+        self.min_fraction = min_fraction
+        self.full_frame_fraction = full_frame_fraction
+        self.box: Optional[Box] = None
+        self.cropped_frames = 0
+        self.full_frames = 0
+        self.losses = 0
+
+    def crop(self, frame: np.ndarray) -> Tuple[np.ndarray, Optional[Box]]:
+        """Return (view to run Pose on, box or None for the full frame)."""
+        if self.box is None:
+            self.full_frames += 1
+            return frame, None
+        self.cropped_frames += 1
+        x0, y0, x1, y1 = self.box
+        return frame[y0:y1, x0:x1], self.box
+
+    def lost(self) -> None:
+        """The crop had no person; the next call uses the full frame."""
+        self.box = None
+        self.losses += 1
+
+    @staticmethod
+    def to_frame(lmk_arr: np.ndarray, box: Box, frame_shape) -> np.ndarray:
+        """Map [33, 3] landmarks normalized to `box` back to full-frame normalized coordinates."""
+        h, w = frame_shape[:2]
+        x0, y0, x1, y1 = box
+        out = np.empty_like(lmk_arr)
+        out[:, 0] = (lmk_arr[:, 0] * (x1 - x0) + x0) / w
+        out[:, 1] = (lmk_arr[:, 1] * (y1 - y0) + y0) / h
+        # MediaPipe z uses the same scale as x
+        out[:, 2] = lmk_arr[:, 2] * (x1 - x0) / w
+        return out
+
+    def _expand(self, x0, y0, x1, y1, pad, w, h) -> Box:
+        bw, bh = x1 - x0, y1 - y0
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+        half_w = max(bw * (0.5 + pad), self.min_fraction * w / 2.0)
+        half_h = max(bh * (0.5 + pad), self.min_fraction * h / 2.0)
+        return (int(max(0, cx - half_w)), int(max(0, cy - half_h)),
+                int(min(w, cx + half_w)), int(min(h, cy + half_h)))
+
+    def update(self, lmk_arr: Optional[np.ndarray], frame_shape) -> None:
+        """Plan the next crop from full-frame normalized landmarks (None = no person)."""
+        if lmk_arr is None:
+            self.box = None
+            return
+        h, w = frame_shape[:2]
+        xy = np.clip(lmk_arr[:, :2], 0.0, 1.0) * (w, h)
+        x0, y0 = xy.min(axis=0)
+        x1, y1 = xy.max(axis=0)
+        wanted = self._expand(x0, y0, x1, y1, self.margin, w, h)
+        if self.box is not None:
+            # Keep the current box while the person is comfortably inside it and it isn't oversized
+            bx0, by0, bx1, by1 = self.box
+            ix0, iy0, ix1, iy1 = self._expand(x0, y0, x1, y1, self.margin / 2.0, w, h)
+            inside = bx0 <= ix0 and by0 <= iy0 and bx1 >= ix1 and by1 >= iy1
+            area = (bx1 - bx0) * (by1 - by0)
+            wanted_area = (wanted[2] - wanted[0]) * (wanted[3] - wanted[1])
+            if inside and area <= 1.6 * wanted_area:
+                return
+        if (wanted[2] - wanted[0]) * (wanted[3] - wanted[1]) >= self.full_frame_fraction * w * h:
+            self.box = None
+        else:
+            self.box = wanted
@@ -1,6 +1,5 @@
 import numpy as np
-import torch
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
 
 def calculate_angle(a, b, c):
@@ -26,6 +25,7 @@ def extract_joint_angles_xy(frame33_xyz):
 
 
 def preprocess_for_gcn(seq33xyz: List[np.ndarray]):
+    import torch  # only the GCN path needs torch; keep it out of the scoring import
     arr = np.asarray(seq33xyz, dtype=np.float32)
     if arr.ndim != 3 or arr.shape[1:] != (33, 3):
         return torch.zeros(1, 2, 1, 33, dtype=torch.float32)
@@ -38,10 +38,11 @@ def preprocess_for_gcn(seq33xyz: List[np.ndarray]):
     return torch.tensor(xy, dtype=torch.float32).unsqueeze(0)
 
 
-@torch.no_grad()
 def embed_sequence(gcn_model, seq33xyz: List[np.ndarray], device: str = 'cpu') -> np.ndarray:
+    import torch
     x = preprocess_for_gcn(seq33xyz).to(device)
-    emb = gcn_model(x)
+    with torch.no_grad():
+        emb = gcn_model(x)
     emb = emb[0].permute(1, 0).contiguous().cpu().numpy()
     norms = np.linalg.norm(emb, axis=1, keepdims=True) + 1e-8
     emb = emb / norms
@@ -191,6 +192,29 @@ def resample_to_length(angles_TD: np.ndarray, target_len: int) -> np.ndarray:
     return out
 
 
+def resample_by_time(times_T: np.ndarray, values_TD: np.ndarray, rate: float,
+                     start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """
+    Linearly interpolate samples taken at increasing times_T (seconds) onto an
+    evenly spaced `rate` Hz grid from start to end (default: first/last sample,
+    start never earlier than the first sample). The grid is anchored at `end`,
+    so the newest sample lands on it exactly.
+    """
+    times = np.asarray(times_T, dtype=np.float64)
+    values = np.asarray(values_TD, dtype=np.float32)
+    if len(times) == 0:
+        return values[:0]
+    end = float(times[-1]) if end is None else float(end)
+    start = float(times[0]) if start is None else max(float(start), float(times[0]))
+    n = max(1, int(np.floor((end - start) * rate + 1e-6)) + 1)
+    grid = end - np.arange(n - 1, -1, -1, dtype=np.float64) / rate
+    flat = values.reshape(len(times), -1)
+    out = np.empty((n, flat.shape[1]), dtype=np.float32)
+    for d in range(flat.shape[1]):
+        out[:, d] = np.interp(grid, times, flat[:, d])
+    return out.reshape((n,) + values.shape[1:])
+
+
 def calibrate_score(raw_score: float, gamma: float = 0.8) -> float:
     try:
         s = float(raw_score)
@@ -200,3 +224,77 @@ def calibrate_score(raw_score: float, gamma: float = 0.8) -> float:
     return float(np.clip(s ** float(gamma), 0.0, 1.0))
 
 
+
+
+def rep_window_angles(times_T: np.ndarray, angles_TD: np.ndarray, n: int, rate: Optional[float]) -> np.ndarray:
+    """
+    The newest rep window of a timestamped angle stream, as the live scorer cuts
+    it: with a rate, the samples covering the last (n - 1) / rate seconds (plus
+    the one before, to interpolate the start) resampled onto the rate grid;
+    without one, simply the last n samples.
+    """
+    if not rate:
+        return angles_TD[-n:]
+    if len(times_T) == 0:
+        return angles_TD
+    span = (n - 1) / rate
+    first = max(0, int(np.searchsorted(times_T, times_T[-1] - span, side="right")) - 1)
+    return resample_by_time(times_T[first:], angles_TD[first:], rate, start=times_T[-1] - span)
+
+
+class RepScoreParams(NamedTuple):
+    """Tunable constants of the rep score (see rep_scores_from_features)."""
+    dist_scale: float = 0.03     # angle similarity = exp(-dist_scale * DTW distance)
+    gate: float = 0.4            # base score from which non-priority motion is checked
+    np_ratio_limit: float = 2.5  # user / trainer non-priority motion above this is excessive
+    np_penalty: float = 0.3      # score multiplier for excessive non-priority motion
+    good: float = 0.5            # feedback: "good rep" from this score
+    excellent: float = 0.8       # feedback: "excellent rep" from this score
+
+
+REP_SCORE_DEFAULTS = RepScoreParams()
+
+# Columns of rep_features()
+REP_FEATURES = ("dist", "amp_user_pr", "amp_trainer_pr", "amp_user_np", "amp_trainer_np")
+
+
+def rep_features(A_us: np.ndarray, trainer_angles: np.ndarray, weights: Optional[np.ndarray],
+                 priority_mask: np.ndarray) -> np.ndarray:
+    """
+    The expensive, parameter-free part of a rep score: the best of nominal and
+    left/right mirrored angle DTW distance, and the priority / non-priority
+    motion amplitudes of user and trainer, as a float64 vector (REP_FEATURES).
+    """
+    A_tr = trainer_angles
+    A_us_rs = resample_to_length(smooth_angles(A_us, window=5), len(A_tr))
+    dist_nom = dtw_distance_l1(A_us_rs, A_tr, weights=weights)
+    # mirror left/right columns: (0,1), (2,3), (4,5), (6,7)
+    A_us_mir = A_us_rs.copy()
+    A_us_mir[:, [0, 1]] = A_us_rs[:, [1, 0]]
+    A_us_mir[:, [2, 3]] = A_us_rs[:, [3, 2]]
+    A_us_mir[:, [4, 5]] = A_us_rs[:, [5, 4]]
+    A_us_mir[:, [6, 7]] = A_us_rs[:, [7, 6]]
+    dist_mir = dtw_distance_l1(A_us_mir, A_tr, weights=weights)
+    non_mask = ~priority_mask if np.any(priority_mask) else np.zeros_like(priority_mask)
+    return np.array([
+        min(dist_nom, dist_mir),
+        masked_motion_amplitude(A_us_rs, priority_mask),
+        masked_motion_amplitude(A_tr, priority_mask),
+        masked_motion_amplitude(A_us_rs, non_mask),
+        masked_motion_amplitude(A_tr, non_mask),
+    ], dtype=np.float64)
+
+
+def rep_scores_from_features(features_N5: np.ndarray, params: RepScoreParams = REP_SCORE_DEFAULTS) -> np.ndarray:
+    """
+    Rep scores for [N, 5] rep_features rows: angle similarity times the
+    priority-joint amplitude ratio (capped at 1); once that base score reaches
+    the gate, excessive non-priority motion multiplies it by np_penalty.
+    """
+    f = np.asarray(features_N5, dtype=np.float64).reshape(-1, len(REP_FEATURES))
+    dist, amp_user_pr, amp_trainer_pr, amp_user_np, amp_trainer_np = f.T
+    sim_angle = np.exp(-params.dist_scale * dist)
+    amp_ratio = np.clip(amp_user_pr / (amp_trainer_pr + 1e-6), 0.0, 1.0)
+    base = sim_angle * amp_ratio
+    excessive = (base >= params.gate) & (amp_user_np / (amp_trainer_np + 1e-6) > params.np_ratio_limit)
+    return np.where(excessive, base * params.np_penalty, base)
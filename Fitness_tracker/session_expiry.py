@@ -0,0 +1,63 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class SessionExpiryIndex:
+    """
+    Min-heap of (deadline, session_id) with lazy invalidation.
+
+    touch() pushes a fresh entry and records the session's current deadline;
+    stale heap entries are skipped when they surface. pop_expired() costs
+    O(log n) per expired or stale entry and never scans live sessions.
+    """
+    def __init__(self, ttl_seconds: float):
+        self.ttl = float(ttl_seconds)
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str, now: Optional[float] = None) -> None:
+        deadline = (time.monotonic() if now is None else now) + self.ttl
+        with self._lock:
+            self._deadlines[session_id] = deadline
+            heapq.heappush(self._heap, (deadline, session_id))
+            # Frequent touches leave stale entries behind; rebuild when they dominate
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(d, sid) for sid, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._deadlines.pop(session_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline (monotonic seconds), or None if nothing is tracked."""
+        with self._lock:
+            while self._heap:
+                deadline, sid = self._heap[0]
+                if self._deadlines.get(sid) == deadline:
+                    return deadline
+                heapq.heappop(self._heap)
+            return None
+
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return every session whose deadline has passed."""
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, sid = heapq.heappop(self._heap)
+                if self._deadlines.get(sid) == deadline:
+                    del self._deadlines[sid]
+                    expired.append(sid)
+        return expired
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._deadlines
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._deadlines)
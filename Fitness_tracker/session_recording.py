@@ -0,0 +1,367 @@
+"""
+Compact on-disk recording of a session's landmark stream and events.
+
+Layout: header | chunk* | index chunk | footer. Landmarks are buffered and
+written in chunks of up to chunk_frames poses:
+  - coordinates are quantized to int16 fixed point (x / scale, per axis),
+  - each joint coordinate's series is delta-coded over time and zigzagged, so
+    a still joint becomes a run of zeros,
+  - the low and high bytes go to separate planes (the high plane is almost
+    all zeros) and the chunk is zlib-compressed.
+Frame times are kept as int64 microsecond offsets from a session base time
+in the header, and frames without a person are flagged. Rep scores, feedback and other events go in small JSON chunks
+between landmark chunks. On close an index of all chunks (offset, frame
+range, time range) is appended. SessionReader memory-maps the file, uses the
+index to decode only the chunks a window touches, and can rebuild the index
+by scanning when a recording was cut short.
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"FTSR"
+VERSION = 2
+# magic, version, joints, dims, chunk_frames, metadata length, base time (whole
+# seconds); then one float32 quantization step per dim and the metadata JSON
+_HEADER = struct.Struct("<4sHHHIId")
+_BASE_OFFSET = _HEADER.size - 8
+# kind, frames, payload bytes, first frame, first time, last time
+_CHUNK = struct.Struct("<cxxxIIQdd")
+# index offset, magic
+_FOOTER = struct.Struct("<Q4s")
+_FOOTER_MAGIC = b"FTSX"
+
+LANDMARKS = b"L"
+EVENT = b"E"
+INDEX = b"I"
+
+_INDEX_DTYPE = np.dtype([("kind", "S1"), ("offset", "<u8"), ("frames", "<u4"), ("first_frame", "<u8"),
+                         ("t_first", "<f8"), ("t_last", "<f8")])
+
+
+def _zigzag(d: np.ndarray) -> np.ndarray:
+    """int16 -> uint16 with small magnitudes of either sign mapped to small values."""
+    d = d.astype(np.int16)
+    return ((d << 1) ^ (d >> 15)).view(np.uint16)
+
+
+def _unzigzag(z: np.ndarray) -> np.ndarray:
+    z = z.astype(np.uint16)
+    return ((z >> 1) ^ np.negative(z & 1)).view(np.int16)
+
+
+def to_us(times, t_base: float) -> np.ndarray:
+    """Times as int64 microseconds since t_base, the resolution a recording keeps."""
+    return np.rint((np.asarray(times, dtype=np.float64) - t_base) * 1e6).astype(np.int64)
+
+
+def encode_chunk(times: np.ndarray, poses: np.ndarray, valid: np.ndarray, scale: np.ndarray,
+                 t_base: float) -> bytes:
+    """
+    Compress [n] times, [n, J, D] float poses and [n] valid flags (invalid poses are
+    ignored); scale is per dim, and times are stored relative to t_base.
+    """
+    n = len(times)
+    q = np.clip(np.rint(np.asarray(poses, dtype=np.float64) / scale), -32768, 32767).astype(np.int16)
+    # Missing poses repeat the previous one so they cost a run of zero deltas
+    idx = np.where(valid, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    q = q[idx]
+    series = np.ascontiguousarray(q.reshape(n, -1).T).view(np.uint16)  # [J*D, n], one row per joint coordinate
+    deltas = np.diff(series, axis=1, prepend=np.zeros((series.shape[0], 1), dtype=np.uint16))  # wraps mod 2^16
+    z = _zigzag(deltas.view(np.int16))
+    planes = np.ascontiguousarray(z, dtype="<u2").view(np.uint8).reshape(-1, 2).T  # [2, ...]: low bytes, high bytes
+    # The first delta is the chunk's offset from t_base, so chunks decode independently
+    dt_us = np.diff(to_us(times, t_base), prepend=0).astype("<i8")
+    raw = dt_us.tobytes() + np.asarray(valid, dtype=np.uint8).tobytes() + planes.tobytes()
+    return zlib.compress(raw, 6)
+
+
+def decode_chunk(payload: bytes, frames: int, t_base: float, joints: int, dims: int,
+                 scale: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of encode_chunk: ([n] float64 times, [n, J, D] float32 poses, NaN where invalid)."""
+    raw = zlib.decompress(payload)
+    n, k = frames, joints * dims
+    dt_us = np.frombuffer(raw, dtype="<i8", count=n)
+    valid = np.frombuffer(raw, dtype=np.uint8, count=n, offset=8 * n).astype(bool)
+    planes = np.frombuffer(raw, dtype=np.uint8, count=2 * n * k, offset=9 * n).reshape(2, -1)
+    z = (planes[0].astype(np.uint16) | (planes[1].astype(np.uint16) << 8)).reshape(k, n)
+    series = np.cumsum(_unzigzag(z).view(np.uint16), axis=1, dtype=np.uint16).view(np.int16)
+    poses = series.T.reshape(n, joints, dims).astype(np.float32) * np.asarray(scale, dtype=np.float32)
+    poses[~valid] = np.nan
+    # t_base is whole seconds, so base + offset is exact in int64 before the one rounding to float
+    times = (int(t_base) * 1_000_000 + np.cumsum(dt_us, dtype=np.int64)) / 1e6
+    return times, poses
+
+
+class SessionRecorder:
+    """
+    Appends (pose, time) samples and events to a recording. Thread-safe, so
+    the inference thread can append poses while the scoring thread reports
+    events; also usable directly as an events callable (event, **fields).
+    """
+    def __init__(self, path: str, meta: Optional[Dict[str, Any]] = None,
+                 scale: Tuple[float, ...] = (1.0 / 512, 1.0 / 512, 1.0 / 128),
+                 chunk_frames: int = 256, joints: int = 33, dims: int = 3):
+        """
+        meta: JSON-able session description stored in the header
+        scale: quantization step per axis in landmark units. x/y are normalized to the
+          frame, so 1/512 is about 1.25 px at 640 px wide, under MediaPipe's own jitter
+          (joint angles move by 0.35 deg on average); MediaPipe's z is much noisier (and
+          unused by the joint angles), so it gets a coarser step
+        chunk_frames: poses per compressed chunk, the unit a reader decodes
+        """
+        self.path = path
+        self.scale = np.broadcast_to(np.asarray(scale, dtype=np.float32), (dims,)).copy()
+        self.chunk_frames = int(chunk_frames)
+        self.joints = joints
+        self.dims = dims
+        self.frames = 0
+        self._times: List[float] = []
+        self._poses: List[np.ndarray] = []
+        self._valid: List[bool] = []
+        self._last_pose = np.zeros((joints, dims), dtype=np.float32)
+        self._last_time = 0.0
+        self.t_base: Optional[float] = None
+        self._index: List[tuple] = []
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        meta_bytes = json.dumps(meta or {}, default=str).encode("utf-8")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, joints, dims, self.chunk_frames, len(meta_bytes), 0.0))
+        self._file.write(self.scale.astype("<f4").tobytes())
+        self._file.write(meta_bytes)
+
+    def append(self, pose: Optional[np.ndarray], t: float) -> None:
+        """Record the [J, D] pose observed at time t (None = no person in the frame)."""
+        with self._lock:
+            if pose is None or np.shape(pose) != (self.joints, self.dims):
+                self._poses.append(self._last_pose)
+                self._valid.append(False)
+            else:
+                self._last_pose = np.array(pose, dtype=np.float32)
+                self._poses.append(self._last_pose)
+                self._valid.append(True)
+            self._times.append(float(t))
+            self._last_time = float(t)
+            if len(self._times) >= self.chunk_frames:
+                self._flush_landmarks()
+
+    def __call__(self, event: str, **fields) -> None:
+        """
+        Record an event; its time is fields["t"] if given, else the last pose's time.
+        The event's "frame" is the number of poses appended before it, so it sorts
+        between frames frame - 1 and frame even while those are still buffered.
+        """
+        with self._lock:
+            frame = self.frames + len(self._times)
+            t = float(fields.get("t", self._last_time))
+            payload = json.dumps({"event": event, "frame": frame, **fields}, default=float).encode("utf-8")
+            self._write_chunk(EVENT, payload, 1, frame, t, t)
+
+    def _write_chunk(self, kind: bytes, payload: bytes, count: int, first_frame: int, t_first: float,
+                     t_last: float) -> None:
+        offset = self._file.tell()
+        self._file.write(_CHUNK.pack(kind, count, len(payload), first_frame, t_first, t_last))
+        self._file.write(payload)
+        if kind != INDEX:
+            self._index.append((kind, offset, count, first_frame, t_first, t_last))
+
+    def _flush_landmarks(self) -> None:
+        if not self._times:
+            return
+        times = np.asarray(self._times, dtype=np.float64)
+        if self.t_base is None:
+            # Fill in the header's base time before the first chunk that depends on it
+            self.t_base = float(math.floor(times[0]))
+            end = self._file.tell()
+            self._file.seek(_BASE_OFFSET)
+            self._file.write(struct.pack("<d", self.t_base))
+            self._file.seek(end)
+        payload = encode_chunk(times, np.stack(self._poses), np.asarray(self._valid), self.scale, self.t_base)
+        self._write_chunk(LANDMARKS, payload, len(times), self.frames, times[0], times[-1])
+        self.frames += len(times)
+        self._times, self._poses, self._valid = [], [], []
+
+    def flush(self) -> None:
+        """Write buffered poses as a (short) chunk and push everything to the OS."""
+        with self._lock:
+            self._flush_landmarks()
+            self._file.flush()
+
+    def close(self) -> None:
+        """Flush, then append the index and footer."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_landmarks()
+            index = np.array(self._index, dtype=_INDEX_DTYPE)
+            offset = self._file.tell()
+            t_first = float(index["t_first"].min()) if len(index) else 0.0
+            t_last = float(index["t_last"].max()) if len(index) else 0.0
+            self._write_chunk(INDEX, index.tobytes(), len(index), self.frames, t_first, t_last)
+            self._file.write(_FOOTER.pack(offset, _FOOTER_MAGIC))
+            self._file.close()
+
+    @property
+    def nbytes(self) -> int:
+        return self._file.tell() if not self._file.closed else os.path.getsize(self.path)
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SessionReader:
+    """
+    Memory-mapped view of a recording. Landmarks come back as float32
+    [T, J, D] arrays (NaN rows where no person was found) with float64 times;
+    only the chunks a request touches are decoded, and the last few decoded
+    chunks are kept.
+    """
+    def __init__(self, path: str, cache_chunks: int = 4):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.joints, self.dims, self.chunk_frames, meta_len,
+         self.t_base) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a session recording (version {VERSION})")
+        meta_start = _HEADER.size + 4 * self.dims
+        self.scale = np.frombuffer(self._mm[_HEADER.size:meta_start], dtype="<f4").astype(np.float32)
+        self.meta: Dict[str, Any] = json.loads(self._mm[meta_start:meta_start + meta_len] or b"{}")
+        self._data_start = meta_start + meta_len
+        index = self._read_index()
+        self.complete = index is not None
+        if index is None:
+            index = self._scan()
+        self._chunks = index[index["kind"] == LANDMARKS]
+        self._events = index[index["kind"] == EVENT]
+        self._chunk_ends = self._chunks["first_frame"] + self._chunks["frames"]
+        self._cache: "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._cache_chunks = cache_chunks
+
+    def _read_index(self) -> Optional[np.ndarray]:
+        if len(self._mm) < self._data_start + _FOOTER.size:
+            return None
+        offset, magic = _FOOTER.unpack_from(self._mm, len(self._mm) - _FOOTER.size)
+        if magic != _FOOTER_MAGIC:
+            return None
+        kind, count, length, _, _, _ = _CHUNK.unpack_from(self._mm, offset)
+        if kind != INDEX or length != count * _INDEX_DTYPE.itemsize:
+            return None
+        start = offset + _CHUNK.size
+        return np.frombuffer(self._mm[start:start + length], dtype=_INDEX_DTYPE)
+
+    def _scan(self) -> np.ndarray:
+        """Rebuild the index from chunk headers, stopping at a truncated chunk."""
+        entries, pos, size = [], self._data_start, len(self._mm)
+        while pos + _CHUNK.size <= size:
+            kind, count, length, first_frame, t_first, t_last = _CHUNK.unpack_from(self._mm, pos)
+            if kind not in (LANDMARKS, EVENT) or pos + _CHUNK.size + length > size:
+                break
+            entries.append((kind, pos, count, first_frame, t_first, t_last))
+            pos += _CHUNK.size + length
+        return np.array(entries, dtype=_INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return int(self._chunk_ends[-1]) if len(self._chunks) else 0
+
+    @property
+    def t_start(self) -> float:
+        return float(self._chunks["t_first"][0]) if len(self._chunks) else 0.0
+
+    @property
+    def t_end(self) -> float:
+        return float(self._chunks["t_last"][-1]) if len(self._chunks) else 0.0
+
+    def _payload(self, entry) -> bytes:
+        start = int(entry["offset"]) + _CHUNK.size
+        length = _CHUNK.unpack_from(self._mm, int(entry["offset"]))[2]
+        return self._mm[start:start + length]
+
+    def _chunk(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        hit = self._cache.get(i)
+        if hit is not None:
+            self._cache.move_to_end(i)
+            return hit
+        entry = self._chunks[i]
+        decoded = decode_chunk(self._payload(entry), int(entry["frames"]), self.t_base,
+                               self.joints, self.dims, self.scale)
+        self._cache[i] = decoded
+        while len(self._cache) > self._cache_chunks:
+            self._cache.popitem(last=False)
+        return decoded
+
+    def _gather(self, chunk_ids) -> Tuple[np.ndarray, np.ndarray]:
+        parts = [self._chunk(i) for i in chunk_ids]
+        if not parts:
+            return np.zeros((0,), np.float64), np.zeros((0, self.joints, self.dims), np.float32)
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+    def frames(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(times [T], poses [T, J, D]) for frames start..stop-1."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return self._gather([])
+        first = int(np.searchsorted(self._chunk_ends, start, side="right"))
+        last = int(np.searchsorted(self._chunk_ends, stop - 1, side="right"))
+        times, poses = self._gather(range(first, last + 1))
+        base = int(self._chunks["first_frame"][first])
+        return times[start - base:stop - base], poses[start - base:stop - base]
+
+    def window(self, t_start: float, t_end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (times, poses) of the frames captured in [t_start, t_end]. Bounds are compared at the
+        microsecond times are stored at, so passing a frame's own capture time includes it.
+        """
+        ids = np.nonzero((self._chunks["t_last"] >= t_start - 1e-6) & (self._chunks["t_first"] <= t_end + 1e-6))[0]
+        times, poses = self._gather(ids)
+        us = to_us(times, self.t_base)
+        keep = (us >= to_us(t_start, self.t_base)) & (us <= to_us(t_end, self.t_base))
+        return times[keep], poses[keep]
+
+    def iter_windows(self, seconds: float, step: Optional[float] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Sliding (times, poses) windows `seconds` long, every `step` seconds (default: back to back)."""
+        step = seconds if step is None else step
+        t = self.t_start
+        while t <= self.t_end:
+            times, poses = self.window(t, t + seconds)
+            if len(times):
+                yield times, poses
+            t += step
+
+    def events(self, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded events in time order, optionally only those named `event`."""
+        out = []
+        for entry in self._events[np.argsort(self._events["t_first"], kind="stable")]:
+            doc = json.loads(self._payload(entry))
+            if event is None or doc.get("event") == event:
+                out.append(doc)
+        return out
+
+    @property
+    def raw_nbytes(self) -> int:
+        """Size of the same landmarks as float32 arrays plus float64 times."""
+        return len(self) * (self.joints * self.dims * 4 + 8)
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._mm.close()
+        self._fh.close()
+
+    def __enter__(self) -> "SessionReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
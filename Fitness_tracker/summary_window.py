@@ -6,6 +6,8 @@ import numpy as np
 from typing import List, Optional
 import cv2
 
+from scoring import REP_SCORE_DEFAULTS
+
 class ExerciseSummaryWindow:
     """
     Summary window that displays exercise performance metrics including:
@@ -27,8 +29,8 @@ class ExerciseSummaryWindow:
         # Calculate statistics
         self.overall_score = np.mean(rep_scores) if rep_scores else 0.0
         self.total_reps = len(rep_scores)
-        self.excellent_reps = sum(1 for score in rep_scores if score >= 0.8)
-        self.good_reps = sum(1 for score in rep_scores if score >= 0.5)
+        self.excellent_reps = sum(1 for score in rep_scores if score >= REP_SCORE_DEFAULTS.excellent)
+        self.good_reps = sum(1 for score in rep_scores if score >= REP_SCORE_DEFAULTS.good)
         
         self._create_widgets()
         self._create_graph()
@@ -165,10 +167,10 @@ class ExerciseSummaryWindow:
                       markerfacecolor='#2196F3', markeredgecolor='#1976D2')
         
         # Add horizontal lines for thresholds
-        ax.axhline(y=0.8, color='#4CAF50', linestyle='--', alpha=0.7, 
-                  label='Excellent (0.8)')
-        ax.axhline(y=0.5, color='#FF9800', linestyle='--', alpha=0.7, 
-                  label='Good (0.5)')
+        ax.axhline(y=REP_SCORE_DEFAULTS.excellent, color='#4CAF50', linestyle='--', alpha=0.7, 
+                  label=f'Excellent ({REP_SCORE_DEFAULTS.excellent})')
+        ax.axhline(y=REP_SCORE_DEFAULTS.good, color='#FF9800', linestyle='--', alpha=0.7, 
+                  label=f'Good ({REP_SCORE_DEFAULTS.good})')
         ax.axhline(y=0.3, color='#F44336', linestyle='--', alpha=0.7, 
                   label='Poor (0.3)')
         
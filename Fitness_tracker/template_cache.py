@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from scoring import compute_angles_for_seq, total_motion_amplitude
+
+
+def hash_landmarks(landmarks_T33: np.ndarray) -> str:
+    """Content hash of a landmark sequence, used as the trainer template id."""
+    arr = np.ascontiguousarray(landmarks_T33, dtype=np.float32)
+    h = hashlib.sha1()
+    h.update(str(arr.shape).encode("ascii"))
+    h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def derive_trainer_features(landmarks_T33: np.ndarray) -> Dict[str, Any]:
+    """
+    Compute everything the analysis endpoints need from a trainer sequence:
+    per-frame angles [T, 8], total motion amplitude and the per-joint
+    10th/90th percentile envelope the amplitude is built from.
+    """
+    angles = compute_angles_for_seq(list(landmarks_T33))
+    if angles.size == 0:
+        lo = hi = np.zeros((0,), dtype=np.float32)
+    else:
+        lo = np.percentile(angles, 10, axis=0).astype(np.float32)
+        hi = np.percentile(angles, 90, axis=0).astype(np.float32)
+    return {
+        "angles": angles,
+        "motion_amplitude": total_motion_amplitude(angles),
+        "envelope_lo": lo,
+        "envelope_hi": hi,
+        "num_frames": int(len(angles)),
+    }
+
+
+class TrainerTemplateCache:
+    """
+    Bounded, thread-safe LRU of derived trainer features keyed by content hash.
+    Clients that sent a trainer sequence once can refer to it by id afterwards.
+    """
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(template_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(template_id)
+            self.hits += 1
+            return entry
+
+    def put(self, template_id: str, features: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[template_id] = features
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, landmarks_T33: np.ndarray):
+        """Return (template_id, features), computing and caching on a miss."""
+        template_id = hash_landmarks(landmarks_T33)
+        features = self.get(template_id)
+        if features is None:
+            features = derive_trainer_features(landmarks_T33)
+            self.put(template_id, features)
+        return template_id, features
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class TemplateStore:
+    """
+    On-disk store of extracted trainer landmark sequences.
+
+    Each template is saved as <id>.npy ([T, 33, 3] float32) plus <id>.json
+    metadata. Ids are the landmark content hash from template_cache, so an
+    uploaded template id is also accepted wherever a cached /analysis/pose id
+    is. The SHA-1 of the source video is kept in the metadata so re-uploading
+    the same file skips extraction.
+
+    Construction touches no files: root_dir is created by the first save() and
+    scanned for the video index on the first find_by_video().
+    """
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        self._by_video: Optional[Dict[str, str]] = None
+
+    def _video_index(self) -> Dict[str, str]:
+        """video SHA-1 -> template id, built from the stored metadata on first use. Call with _lock held."""
+        if self._by_video is None:
+            self._by_video = {}
+            names = os.listdir(self.root_dir) if os.path.isdir(self.root_dir) else []
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                meta = self._read_meta(name[:-len(".json")])
+                if meta and meta.get("video_sha1"):
+                    self._by_video[meta["video_sha1"]] = meta["template_id"]
+        return self._by_video
+
+    def _path(self, template_id: str, ext: str) -> str:
+        # Ids are hex digests; reject anything that could escape root_dir
+        if not template_id or not all(c in "0123456789abcdef" for c in template_id):
+            raise KeyError(template_id)
+        return os.path.join(self.root_dir, template_id + ext)
+
+    def _read_meta(self, template_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(template_id, ".json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def __contains__(self, template_id: str) -> bool:
+        try:
+            return os.path.exists(self._path(template_id, ".npy"))
+        except KeyError:
+            return False
+
+    def find_by_video(self, video_sha1: str) -> Optional[str]:
+        """Template id previously extracted from a video with this SHA-1, if still stored."""
+        with self._lock:
+            template_id = self._video_index().get(video_sha1)
+        return template_id if template_id is not None and template_id in self else None
+
+    def save(self, template_id: str, landmarks_T33: np.ndarray, **meta) -> Dict[str, Any]:
+        arr = np.ascontiguousarray(landmarks_T33, dtype=np.float32)
+        meta = dict(meta, template_id=template_id, num_frames=int(len(arr)), created=time.time())
+        npy_path = self._path(template_id, ".npy")
+        json_path = self._path(template_id, ".json")
+        os.makedirs(self.root_dir, exist_ok=True)
+        # Write to temp names and rename so readers never see a partial file
+        tmp_npy = npy_path + f".{os.getpid()}.tmp"
+        with open(tmp_npy, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp_npy, npy_path)
+        tmp_json = json_path + f".{os.getpid()}.tmp"
+        with open(tmp_json, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_json, json_path)
+        if meta.get("video_sha1"):
+            with self._lock:
+                self._video_index()[meta["video_sha1"]] = template_id
+        return meta
+
+    def load(self, template_id: str) -> Optional[np.ndarray]:
+        """Return the stored [T, 33, 3] float32 landmarks, or None if unknown."""
+        try:
+            return np.load(self._path(template_id, ".npy"))
+        except (OSError, KeyError):
+            return None
+
+    def metadata(self, template_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_meta(template_id)
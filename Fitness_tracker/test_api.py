@@ -5,11 +5,15 @@ Test script for the Fitness Tracker API
 This script tests the basic functionality of the API server.
 """
 
+import os
 import requests
 import time
 import json
+import cv2
 import numpy as np
 
+TRAINER_VIDEO = "trainer_lateralraise.mp4"
+
 def test_health_check():
     """Test the health check endpoint."""
     print("🔍 Testing health check...")
@@ -215,6 +219,159 @@ def test_standalone_analysis():
         print(f"❌ Standalone analysis error: {e}")
         return False
 
+def _test_frame_jpeg():
+    """A small JPEG for the frame endpoints; no person in it is fine for a smoke test."""
+    frame = np.full((480, 640, 3), 200, dtype=np.uint8)
+    cv2.rectangle(frame, (280, 100), (360, 400), (60, 60, 60), -1)
+    ok, buf = cv2.imencode(".jpg", frame)
+    return buf.tobytes()
+
+def test_raw_frame(session_id=None):
+    """Test raw-body frame analysis."""
+    print("\n🔍 Testing raw frame analysis...")
+    
+    try:
+        params = {"scale": 2}
+        if session_id:
+            params["session_id"] = session_id
+        response = requests.post("http://localhost:8000/analysis/frame", params=params,
+                                 data=_test_frame_jpeg(), headers={"Content-Type": "image/jpeg"})
+        
+        if response.status_code == 200:
+            result = response.json()
+            print("✅ Raw frame analysis successful")
+            print(f"   Message: {result.get('message')}")
+            print(f"   Decoded size: {response.headers.get('X-Decoded-Size')}")
+            print(f"   Server-Timing: {response.headers.get('Server-Timing')}")
+            return True
+        else:
+            print(f"❌ Raw frame analysis failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+            
+    except Exception as e:
+        print(f"❌ Raw frame analysis error: {e}")
+        return False
+
+def test_frame_upload():
+    """Test multipart frame analysis."""
+    print("\n🔍 Testing multipart frame upload...")
+    
+    try:
+        response = requests.post("http://localhost:8000/analysis/frame_upload",
+                                 files={"file": ("frame.jpg", _test_frame_jpeg(), "image/jpeg")},
+                                 data={"scale": 2})
+        
+        if response.status_code == 200:
+            result = response.json()
+            print("✅ Multipart frame upload successful")
+            print(f"   Message: {result.get('message')}")
+            print(f"   Decoded size: {response.headers.get('X-Decoded-Size')}")
+            return True
+        else:
+            print(f"❌ Multipart frame upload failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+            
+    except Exception as e:
+        print(f"❌ Multipart frame upload error: {e}")
+        return False
+
+def test_metrics():
+    """Test the Prometheus metrics endpoint."""
+    print("\n🔍 Testing metrics...")
+    
+    try:
+        response = requests.get("http://localhost:8000/metrics")
+        
+        if response.status_code == 200 and "fitness_api_requests_total" in response.text:
+            samples = [line for line in response.text.splitlines() if line and not line.startswith("#")]
+            print(f"✅ Metrics retrieved: {len(samples)} samples")
+            return True
+        else:
+            print(f"❌ Metrics failed: {response.status_code}")
+            return False
+            
+    except Exception as e:
+        print(f"❌ Metrics error: {e}")
+        return False
+
+def test_template_upload():
+    """Test streaming a trainer video to /templates/upload."""
+    print("\n🔍 Testing trainer template upload...")
+    
+    if not os.path.exists(TRAINER_VIDEO):
+        print(f"⚠️  Skipped: {TRAINER_VIDEO} not found locally")
+        return None
+    
+    try:
+        with open(TRAINER_VIDEO, "rb") as f:
+            response = requests.post("http://localhost:8000/templates/upload",
+                                     params={"filename": os.path.basename(TRAINER_VIDEO)}, data=f)
+        
+        if response.status_code == 200:
+            result = response.json()
+            print("✅ Template upload successful")
+            print(f"   Template id: {result['template_id']}")
+            print(f"   Frames: {result['num_frames']} (reused: {result['reused']})")
+            print(f"   Extraction after upload: {result['extraction_tail_seconds']:.2f}s")
+            return result["template_id"]
+        else:
+            print(f"❌ Template upload failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return None
+            
+    except Exception as e:
+        print(f"❌ Template upload error: {e}")
+        return None
+
+def test_video_job(template_id):
+    """Test offline scoring of a recorded workout."""
+    print("\n🔍 Testing video analysis job...")
+    
+    try:
+        # The trainer video doubles as the user's workout
+        with open(TRAINER_VIDEO, "rb") as f:
+            response = requests.post("http://localhost:8000/analysis/video_jobs",
+                                     params={"trainer_template_id": template_id,
+                                             "filename": os.path.basename(TRAINER_VIDEO),
+                                             "priority_joints": "elbow,shoulder"},
+                                     data=f)
+        if response.status_code != 202:
+            print(f"❌ Video job submission failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+            return False
+        
+        job_id = response.json()["job_id"]
+        print(f"✅ Video job submitted: {job_id}")
+        
+        max_wait = 120
+        wait_time = 0
+        while wait_time < max_wait:
+            response = requests.get(f"http://localhost:8000/analysis/video_jobs/{job_id}")
+            if response.status_code != 200:
+                print(f"❌ Video job status failed: {response.status_code}")
+                return False
+            result = response.json()
+            if result["status"] == "completed":
+                print("✅ Video job completed")
+                print(f"   Reps detected: {result['reps_detected']}")
+                print(f"   Average score: {result['average_score']:.3f}")
+                print(f"   Realtime factor: {result['realtime_factor']}")
+                return True
+            elif result["status"] == "error":
+                print(f"❌ Video job failed: {result['error']}")
+                return False
+            time.sleep(1)
+            wait_time += 1
+        
+        print("❌ Video job did not complete in time")
+        return False
+        
+    except Exception as e:
+        print(f"❌ Video job error: {e}")
+        return False
+
 def main():
     """Run all tests."""
     print("🧪 Fitness Tracker API Test Suite")
@@ -244,6 +401,15 @@ def main():
     # Test standalone analysis
     test_standalone_analysis()
     
+    # Test frame endpoints
+    test_raw_frame(session_id)
+    test_frame_upload()
+    
+    # Test template upload and offline video analysis
+    template_id = test_template_upload()
+    if template_id:
+        test_video_job(template_id)
+    
     # Test session list
     print("\n🔍 Testing session list...")
     try:
@@ -256,6 +422,9 @@ def main():
     except Exception as e:
         print(f"❌ Session list error: {e}")
     
+    # Test metrics last, so it reflects the requests above
+    test_metrics()
+    
     print("\n🎉 Test suite completed!")
     print("=" * 50)
 
@@ -0,0 +1,155 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from admission import AdmissionLimiter, AdmissionRejected, LatestFrameGate
+
+
+def run(coro):
+    # A leaked permit shows up as a hang; fail instead
+    return asyncio.run(asyncio.wait_for(coro, timeout=10.0))
+
+
+async def _hold(limiter, release: asyncio.Event):
+    async with limiter:
+        await release.wait()
+
+
+async def _assert_full_capacity(limiter):
+    """All max_concurrent slots can be taken at once without waiting."""
+    release = asyncio.Event()
+    holders = [asyncio.create_task(_hold(limiter, release)) for _ in range(limiter.max_concurrent)]
+    await asyncio.sleep(0.01)
+    assert limiter.in_flight == limiter.max_concurrent
+    release.set()
+    await asyncio.gather(*holders)
+    assert limiter.in_flight == 0
+
+
+def test_rejects_beyond_concurrency_plus_queue():
+    async def main():
+        limiter = AdmissionLimiter("pose", max_concurrent=2, max_queue=1, max_wait=5.0)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(limiter, release)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert (limiter.in_flight, limiter.waiting) == (2, 1)
+        with pytest.raises(AdmissionRejected) as info:
+            async with limiter:
+                pass
+        assert info.value.reason == "overloaded"
+        assert info.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert limiter.rejected == 1
+        await _assert_full_capacity(limiter)
+    run(main())
+
+
+def test_queue_wait_timeout():
+    async def main():
+        limiter = AdmissionLimiter("pose", max_concurrent=1, max_queue=4, max_wait=0.02)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as info:
+            async with limiter:
+                pass
+        assert info.value.reason == "queue wait exceeded"
+        assert limiter.waiting == 0
+        release.set()
+        await holder
+        await _assert_full_capacity(limiter)
+    run(main())
+
+
+def test_timeout_after_permit_granted_does_not_leak(monkeypatch):
+    # The permit is granted, but the wait still reports a timeout
+    async def late_timeout(aw, timeout):
+        await aw
+        raise asyncio.TimeoutError
+
+    async def main():
+        limiter = AdmissionLimiter("pose", max_concurrent=2, max_queue=2, max_wait=1.0)
+        monkeypatch.setattr(asyncio, "wait_for", late_timeout)
+        for _ in range(3):
+            with pytest.raises(AdmissionRejected):
+                async with limiter:
+                    pass
+        monkeypatch.undo()
+        await asyncio.sleep(0)
+        await _assert_full_capacity(limiter)
+    run(main())
+
+
+def test_cancelled_waiter_does_not_leak():
+    async def main():
+        limiter = AdmissionLimiter("pose", max_concurrent=1, max_queue=4, max_wait=5.0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(_hold(limiter, asyncio.Event())) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert limiter.waiting == 3
+        # Cancel as the slot frees up, so grants and cancellations interleave
+        release.set()
+        for w in waiters:
+            w.cancel()
+        await asyncio.gather(holder, *waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert limiter.waiting == 0
+        await _assert_full_capacity(limiter)
+    run(main())
+
+
+def test_gate_serializes_and_supersedes():
+    async def main():
+        gate = LatestFrameGate()
+        assert await gate.acquire("s1") is True
+        # Other keys are independent
+        assert await gate.acquire("s2") is True
+        second = asyncio.create_task(gate.acquire("s1"))
+        await asyncio.sleep(0)
+        third = asyncio.create_task(gate.acquire("s1"))
+        assert await second is False
+        assert gate.superseded == 1
+        assert not third.done()
+        gate.release("s1")
+        assert await third is True
+        gate.release("s1")
+        gate.release("s2")
+        assert len(gate) == 0
+        gate.release("unknown")
+    run(main())
+
+
+def test_gate_cancelled_waiter_passes_turn_on():
+    async def main():
+        gate = LatestFrameGate()
+        assert await gate.acquire("s") is True
+        waiter = asyncio.create_task(gate.acquire("s"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        gate.release("s")
+        assert len(gate) == 0
+        assert await gate.acquire("s") is True
+    run(main())
+
+
+def test_rejection_returns_429_with_retry_after(monkeypatch):
+    import cv2
+    from fastapi.testclient import TestClient
+
+    import api_server
+
+    limiter = AdmissionLimiter("pose_inference", max_concurrent=1, max_queue=0)
+    limiter.in_flight = 1  # saturated
+    monkeypatch.setattr(api_server, "pose_limiter", limiter)
+    ok, jpeg = cv2.imencode(".jpg", np.zeros((48, 64, 3), np.uint8))
+    client = TestClient(api_server.app)
+    response = client.post("/analysis/frame", content=jpeg.tobytes(), headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "busy" in response.json()["detail"]
@@ -0,0 +1,122 @@
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+import exercise
+from exercise import downscale_frame, draw_live_hud, extract_pose_sequence, landmarks_to_proto
+
+W, H = 320, 240
+NUM_FRAMES = 40
+
+
+def _frame(i):
+    a = np.zeros((H, W, 3), np.uint8)
+    for b in range(7):
+        if i >> b & 1:
+            a[:, 40 * b:40 * b + 40] = 255
+    return a
+
+
+def _index(rgb):
+    bar = rgb.shape[1] / 8.0
+    return sum(int(rgb[:, int(bar * b):int(bar * (b + 1)), 0].mean() > 128) << b for b in range(7))
+
+
+class _FakePose:
+    """Reports the decoded frame index as x and the frame size as (y, z); no pose on multiples of 5."""
+    seen = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def process(self, rgb):
+        idx = _index(rgb)
+        _FakePose.seen.append((idx, rgb.shape[:2]))
+        if idx % 5 == 0:
+            return types.SimpleNamespace(pose_landmarks=None)
+        lm = types.SimpleNamespace(x=float(idx), y=float(rgb.shape[0]), z=float(rgb.shape[1]))
+        return types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=[lm] * 33))
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (W, H))
+    if not writer.isOpened():
+        pytest.skip("MJPG writer unavailable")
+    for i in range(NUM_FRAMES):
+        writer.write(_frame(i))
+    writer.release()
+    _FakePose.seen = []
+    monkeypatch.setattr(exercise, "mp_pose", types.SimpleNamespace(Pose=_FakePose))
+    return path
+
+
+def test_every_frame_in_order(video):
+    seq, frames = extract_pose_sequence(video, return_frame_indices=True)
+    expected = [i for i in range(NUM_FRAMES) if i % 5]
+    assert isinstance(seq, list) and all(a.shape == (33, 3) for a in seq)
+    assert frames.tolist() == expected
+    assert [int(a[0, 0]) for a in seq] == expected
+    assert [i for i, _ in _FakePose.seen] == list(range(NUM_FRAMES))
+
+
+def test_stride_and_target_fps(video):
+    _, frames = extract_pose_sequence(video, stride=3, return_frame_indices=True)
+    assert frames.tolist() == [i for i in range(0, NUM_FRAMES, 3) if i % 5]
+    _FakePose.seen = []
+    _, frames = extract_pose_sequence(video, target_fps=10, return_frame_indices=True)
+    assert [i for i, _ in _FakePose.seen] == list(range(0, NUM_FRAMES, 3))
+
+
+def test_max_size_and_array_output(video):
+    seq = extract_pose_sequence(video, max_size=160, as_array=True)
+    assert seq.dtype == np.float32 and seq.shape == (NUM_FRAMES - NUM_FRAMES // 5, 33, 3)
+    assert {shape for _, shape in _FakePose.seen} == {(120, 160)}
+    assert np.all(seq[:, 0, 1:] == [120, 160])
+
+
+def test_missing_video_returns_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(exercise, "mp_pose", types.SimpleNamespace(Pose=_FakePose))
+    assert extract_pose_sequence(str(tmp_path / "missing.avi")) == []
+    seq, frames = extract_pose_sequence(str(tmp_path / "missing.avi"), as_array=True, return_frame_indices=True)
+    assert seq.shape == (0, 33, 3) and frames.shape == (0,)
+
+
+def test_downscale_frame():
+    small = np.zeros((100, 80, 3), np.uint8)
+    assert downscale_frame(small, None) is small
+    assert downscale_frame(small, 100) is small
+    assert downscale_frame(np.zeros((480, 640, 3), np.uint8), 320).shape == (240, 320, 3)
+    assert downscale_frame(np.zeros((1000, 10, 3), np.uint8), 100).shape == (100, 1, 3)
+
+
+def test_landmarks_to_proto_round_trip():
+    arr = np.random.default_rng(0).random((33, 3), dtype=np.float32)
+    proto = landmarks_to_proto(arr)
+    assert len(proto.landmark) == 33
+    back = np.array([(lm.x, lm.y, lm.z) for lm in proto.landmark], np.float32)
+    np.testing.assert_allclose(back, arr, rtol=1e-6)
+
+
+def test_hud_timers_follow_the_frame_clock():
+    hud = {
+        "reps": 0, "last_rep_score": None, "current_feedback": "Good form",
+        "feedback_display_time": 1000.0, "feedback_duration": 3.0,
+        "pre_start_mode": False, "pre_start_phase": None, "show_start_message": False,
+        "start_message_time": 0.0, "stable_orient_ok": True, "require_weights": False,
+    }
+
+    def feedback_drawn(now):
+        canvas = np.zeros((480, 1280, 3), np.uint8)
+        draw_live_hud(canvas, hud, now)
+        return canvas[190:215].any()
+
+    # A replay's capture clock, not the wall clock, decides whether feedback is still up
+    assert feedback_drawn(1001.0)
+    assert not feedback_drawn(1004.0)
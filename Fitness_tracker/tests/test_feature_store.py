@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from feature_store import PoseFeatureStore
+from orientation import average_forward_vector
+from scoring import compute_angles_for_seq
+
+
+def _poses(n, seed=0):
+    rng = np.random.default_rng(seed)
+    poses = rng.uniform(0.2, 0.8, (n, 33, 3)).astype(np.float32)
+    # A few frames without a usable forward vector
+    poses[[i for i in (4, 17, 18) if i < n]] = np.nan
+    return poses
+
+
+@pytest.mark.parametrize("capacity,forward_window,count", [(8, 5, 30), (10, 10, 23), (6, 2, 25), (6, 3, 4)])
+def test_mean_forward_matches_average_forward_vector(capacity, forward_window, count):
+    poses = _poses(count)
+    store = PoseFeatureStore(capacity, forward_window)
+    for i, pose in enumerate(poses):
+        store.append(pose, i / 30.0)
+        expected = average_forward_vector(list(poses[max(0, i + 1 - forward_window):i + 1]))
+        got = store.mean_forward()
+        if expected is None:
+            assert got is None
+        else:
+            np.testing.assert_allclose(got, expected, atol=1e-5)
+
+
+def test_windows_after_wraparound():
+    poses = _poses(25)
+    store = PoseFeatureStore(8, 4)
+    for i, pose in enumerate(poses):
+        store.append(pose, i / 30.0)
+    assert len(store) == 8
+    np.testing.assert_array_equal(store.landmarks.latest(), poses[-8:])
+    np.testing.assert_allclose(store.times.latest(), np.arange(17, 25) / 30.0)
+    np.testing.assert_allclose(store.angles.latest(3), compute_angles_for_seq(list(poses[-3:])))
+
+
+def test_clear():
+    poses = _poses(12)
+    store = PoseFeatureStore(5, 3)
+    for i, pose in enumerate(poses):
+        store.append(pose, i / 30.0)
+    store.clear()
+    assert len(store) == 0
+    assert store.mean_forward() is None
+    store.append(poses[0], 1.0)
+    np.testing.assert_allclose(store.mean_forward(), average_forward_vector([poses[0]]), atol=1e-5)
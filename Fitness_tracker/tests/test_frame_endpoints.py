@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import api_server
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No startup hook: frames run on the in-process Pose path
+    return TestClient(api_server.app)
+
+
+def _jpeg(width=640, height=480):
+    ok, buf = cv2.imencode(".jpg", np.full((height, width, 3), 90, np.uint8))
+    return buf.tobytes()
+
+
+@pytest.mark.parametrize("scale,size", [(1, "640x480"), (2, "320x240"), (4, "160x120"), (8, "80x60")])
+def test_raw_frame_reduced_decode(client, scale, size):
+    response = client.post("/analysis/frame", params={"scale": scale}, content=_jpeg(),
+                           headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 200
+    assert response.headers["X-Decoded-Size"] == size
+    assert response.headers["X-Upload-Bytes"] == str(len(_jpeg()))
+    assert {part.split(";")[0].strip() for part in response.headers["Server-Timing"].split(",")} == {
+        "queue", "decode", "pose"}
+    assert "landmarks" in response.json()
+
+
+def test_multipart_upload(client):
+    response = client.post("/analysis/frame_upload", files={"file": ("f.jpg", _jpeg(), "image/jpeg")},
+                           data={"scale": "2"})
+    assert response.status_code == 200
+    assert response.headers["X-Decoded-Size"] == "320x240"
+
+
+def test_bad_input(client):
+    headers = {"Content-Type": "image/jpeg"}
+    assert client.post("/analysis/frame", content=b"", headers=headers).status_code == 400
+    assert client.post("/analysis/frame", params={"scale": 3}, content=_jpeg(), headers=headers).status_code == 400
+    assert client.post("/analysis/frame", content=b"not an image", headers=headers).status_code == 400
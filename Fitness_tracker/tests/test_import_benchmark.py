@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+import import_benchmark
+
+TRACKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", ["scoring", "feedback_system", "api_server"])
+def test_server_path_loads_no_heavy_modules(module):
+    results = import_benchmark.run([module], repeat=1, cwd=TRACKER_DIR)
+    assert import_benchmark.check({module: results[module]}, 0.0, 0.0) == []
+
+
+def test_check_reports_heavy_modules_and_budgets():
+    results = {
+        "ok": {"seconds_median": 0.5, "rss_mb": 100.0, "heavy": [], "inherited": ["matplotlib"]},
+        "slow": {"seconds_median": 5.0, "rss_mb": 100.0, "heavy": [], "inherited": []},
+        "heavy": {"seconds_median": 0.5, "rss_mb": 900.0, "heavy": ["torch"], "inherited": []},
+        "broken": {"error": "ImportError: nope"},
+    }
+    failures = import_benchmark.check(results, max_seconds=2.0, max_rss_mb=500.0)
+    assert not any(f.startswith("ok:") for f in failures)
+    assert any(f.startswith("slow:") and "took" in f for f in failures)
+    assert any(f.startswith("heavy:") and "torch" in f for f in failures)
+    assert any(f.startswith("heavy:") and "RSS" in f for f in failures)
+    assert any(f.startswith("broken:") for f in failures)
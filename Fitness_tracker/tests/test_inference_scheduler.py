@@ -0,0 +1,120 @@
+import pytest
+
+from inference_scheduler import InferenceScheduler
+
+
+def _drive(sched, inference_by_level, seconds, start=0.0, overhead=0.01, display=1.0 / 30, dt=0.1):
+    """Feed per-level Pose latencies tick by tick; returns (times, levels) after each update()."""
+    times, levels = [], []
+    now = start
+    while now < start + seconds:
+        inference = inference_by_level[sched.complexity]
+        sched.record("inference", inference)
+        sched.record("e2e", inference + overhead)
+        if display is not None:
+            sched.record("display", display)
+        sched.update(now=now)
+        times.append(now)
+        levels.append(sched.complexity)
+        now += dt
+    return times, levels
+
+
+def _switch_count(levels, initial):
+    return sum(a != b for a, b in zip([initial] + levels, levels))
+
+
+def test_steps_down_when_over_budget_after_dwell():
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=2, dwell_seconds=3.0)
+    times, levels = _drive(sched, {0: 0.03, 1: 0.08, 2: 0.25}, seconds=20.0)
+    first_down = next(t for t, level in zip(times, levels) if level < 2)
+    assert first_down >= 3.0
+    assert levels[-1] == 1
+    # Level 1 fits, and level 2 was measured over budget: no way back up
+    assert _switch_count(levels, 2) == 1
+
+
+def test_keeps_stepping_down_until_within_budget():
+    sched = InferenceScheduler(latency_budget_ms=50.0, initial_complexity=2, dwell_seconds=1.0)
+    _, levels = _drive(sched, {0: 0.03, 1: 0.08, 2: 0.25}, seconds=20.0)
+    assert levels[-1] == 0
+    assert sched.switches == 2
+
+
+def test_steps_up_when_the_heavier_model_fits():
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=0, dwell_seconds=2.0)
+    _, levels = _drive(sched, {0: 0.02, 1: 0.03, 2: 0.08}, seconds=30.0)
+    assert levels[-1] == 2
+    assert _switch_count(levels, 0) == 2
+
+
+def test_does_not_flap_when_the_upper_level_is_underestimated():
+    # Level 2 is predicted to fit from level 1's cost, but is over budget once measured
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=1, dwell_seconds=3.0)
+    _, levels = _drive(sched, {0: 0.02, 1: 0.04, 2: 0.16}, seconds=300.0)
+    assert levels[-1] == 1
+    transitions = [(a, b) for a, b in zip([1] + levels, levels) if a != b]
+    assert transitions == [(1, 2), (2, 1)]
+
+
+@pytest.mark.parametrize("over", [0.149, 0.151])
+def test_no_flapping_around_the_budget(over):
+    # e2e of level 1 sits right at the budget; level 0 is comfortably under it
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=1, dwell_seconds=3.0)
+    _, levels = _drive(sched, {0: 0.08, 1: over - 0.01, 2: 0.4}, seconds=300.0)
+    assert _switch_count(levels, 1) <= 1
+
+
+def test_switches_are_at_least_dwell_apart():
+    sched = InferenceScheduler(latency_budget_ms=60.0, initial_complexity=2, dwell_seconds=3.0)
+    times, levels = _drive(sched, {0: 0.03, 1: 0.07, 2: 0.25}, seconds=30.0)
+    switch_times = [t for t, a, b in zip(times, [2] + levels, levels) if a != b]
+    assert len(switch_times) == 2
+    assert switch_times[1] - switch_times[0] >= 3.0
+
+
+def test_never_picks_a_rejected_level():
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=1, dwell_seconds=1.0)
+    sched.reject(2)
+    _, levels = _drive(sched, {0: 0.01, 1: 0.02, 2: 0.03}, seconds=60.0)
+    assert 2 not in levels
+    assert sched.snapshot()["unavailable_complexities"] == [2]
+
+
+def test_never_steps_down_to_a_rejected_level():
+    sched = InferenceScheduler(latency_budget_ms=50.0, initial_complexity=1, dwell_seconds=1.0)
+    sched.reject(0)
+    _, levels = _drive(sched, {0: 0.01, 1: 0.1, 2: 0.3}, seconds=30.0)
+    assert set(levels) == {1}
+
+
+def test_reject_current_level_goes_back():
+    sched = InferenceScheduler(latency_budget_ms=150.0, initial_complexity=1, dwell_seconds=1.0)
+    _, levels = _drive(sched, {0: 0.01, 1: 0.02, 2: 0.03}, seconds=10.0)
+    assert levels[-1] == 2
+    sched.reject(2)
+    assert sched.complexity == 1
+    _, levels = _drive(sched, {0: 0.01, 1: 0.02, 2: 0.03}, start=10.0, seconds=30.0)
+    assert 2 not in levels
+
+
+def test_rate_backs_off_multiplicatively_and_recovers_additively():
+    sched = InferenceScheduler(target_fps=30.0, max_inference_fps=30.0, min_inference_fps=10.0,
+                               model_complexity=1)
+    sched.record("display", 1.0 / 15)
+    sched.update(now=0.0)
+    assert sched.inference_fps == pytest.approx(30.0 * 0.85)
+    for i in range(50):
+        sched.update(now=0.1 * i)
+    assert sched.inference_fps == pytest.approx(10.0)
+    sched.stage_ema["display"] = 1.0 / 30
+    sched.update(now=10.0)
+    assert sched.inference_fps == pytest.approx(10.5)
+    assert sched.interval == pytest.approx(1.0 / 10.5)
+
+
+def test_pinned_complexity_never_switches():
+    sched = InferenceScheduler(latency_budget_ms=10.0, model_complexity=2, dwell_seconds=0.5)
+    _, levels = _drive(sched, {2: 0.3}, seconds=20.0)
+    assert set(levels) == {2}
+    assert sched.switches == 0
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from landmark_filter import OneEuroFilter, PoseEstimate, PoseUpsampler
+
+DT = 1.0 / 30.0
+
+
+def _pose(value):
+    return np.full((33, 3), value, np.float32)
+
+
+def test_first_pose_passes_through():
+    f = OneEuroFilter()
+    assert f.predict(0.0) is None and f.estimate() is None
+    out = f(_pose(0.3), 0.0)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, _pose(0.3))
+
+
+def test_converges_on_constant_input():
+    f = OneEuroFilter()
+    f(_pose(0.0), 0.0)
+    for i in range(1, 120):
+        out = f(_pose(0.5), i * DT)
+    np.testing.assert_allclose(out, 0.5, atol=1e-3)
+    np.testing.assert_allclose(f.estimate().velocity, 0.0, atol=1e-3)
+
+
+def test_jitter_at_rest_is_smoothed():
+    rng = np.random.default_rng(0)
+    f = OneEuroFilter()
+    noisy = 0.5 + 0.005 * rng.standard_normal((300, 33, 3))
+    out = np.stack([f(x, i * DT) for i, x in enumerate(noisy)])[60:]
+    assert out.std() < 0.7 * noisy[60:].std()
+
+
+def test_cutoff_rises_with_speed():
+    # Same ramp through both filters; speed-adaptive cutoff lags less
+    slow, adaptive = OneEuroFilter(beta=0.0), OneEuroFilter(beta=40.0)
+    for i in range(30):
+        x = _pose(i * DT * 1.0)  # 1 unit per second
+        a, b = slow(x, i * DT), adaptive(x, i * DT)
+    target = 29 * DT
+    assert abs(target - b[0, 0]) < 0.5 * abs(target - a[0, 0])
+
+
+def test_non_increasing_time_returns_previous():
+    f = OneEuroFilter()
+    f(_pose(0.1), 1.0)
+    np.testing.assert_array_equal(f(_pose(0.9), 1.0), _pose(0.1))
+    np.testing.assert_array_equal(f(_pose(0.9), 0.5), _pose(0.1))
+
+
+def test_predict_is_capped():
+    f = OneEuroFilter(max_predict=0.1)
+    for i in range(30):
+        f(_pose(i * DT), i * DT)
+    est = f.estimate()
+    v = est.velocity[0, 0]
+    assert v > 0
+    near = f.predict(est.t + 0.05)[0, 0]
+    far = f.predict(est.t + 10.0)[0, 0]
+    assert near == pytest.approx(est.pose[0, 0] + 0.05 * v, rel=1e-5)
+    assert far == pytest.approx(est.pose[0, 0] + 0.1 * v, rel=1e-5)
+    # Never extrapolates backwards
+    assert f.predict(est.t - 1.0)[0, 0] == pytest.approx(est.pose[0, 0], rel=1e-6)
+
+
+def test_estimate_is_a_copy():
+    f = OneEuroFilter()
+    f(_pose(0.2), 0.0)
+    est = f.estimate()
+    f(_pose(0.8), DT)
+    assert est.pose[0, 0] == pytest.approx(0.2)
+
+
+def test_pose_estimate_at():
+    est = PoseEstimate(1.0, np.zeros((33, 3)), np.ones((33, 3)))
+    assert est.at(1.05)[0, 0] == pytest.approx(0.05)
+    assert est.at(5.0, max_ahead=0.2)[0, 0] == pytest.approx(0.2)
+
+
+def test_upsampler_ticks_interpolate_within_bounds():
+    up = PoseUpsampler(rate=25.0)
+    assert [t for t, _ in up.push(_pose(0.0), 0.0)] == [0.0]
+    samples = up.push(_pose(1.0), 0.1)
+    times = [t for t, _ in samples]
+    np.testing.assert_allclose(times, [0.04, 0.08])
+    for t, pose in samples:
+        assert pose.dtype == np.float32
+        assert 0.0 <= pose.min() and pose.max() <= 1.0
+        np.testing.assert_allclose(pose, t / 0.1, rtol=1e-5)
+
+
+def test_upsampler_slower_than_clock_emits_each_tick_once():
+    up = PoseUpsampler(rate=10.0)
+    ticks = []
+    for i in range(1, 20):
+        ticks += [t for t, _ in up.push(_pose(i), i * 0.033)]
+    assert ticks == sorted(ticks)
+    np.testing.assert_allclose(np.diff(ticks), 0.1)
+
+
+def test_upsampler_restarts_after_gap_or_missing_pose():
+    up = PoseUpsampler(rate=25.0, max_gap=0.5)
+    up.push(_pose(0.0), 0.0)
+    # A one-second gap is not bridged: the clock restarts at the new pose
+    samples = up.push(_pose(1.0), 1.0)
+    assert [t for t, _ in samples] == [1.0]
+    np.testing.assert_array_equal(samples[0][1], _pose(1.0))
+    assert up.push(None, 1.02) == []
+    assert [t for t, _ in up.push(_pose(2.0), 1.1)] == [1.1]
+
+
+def test_upsampler_ignores_out_of_order_pose():
+    up = PoseUpsampler(rate=25.0)
+    up.push(_pose(0.0), 1.0)
+    assert up.push(_pose(1.0), 0.9) == []
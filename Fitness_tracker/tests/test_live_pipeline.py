@@ -0,0 +1,114 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from live_pipeline import CaptureThread, LatestSlot, SyntheticSource, VideoFileSource
+from live_stats import StageStats
+
+
+def test_slot_keeps_latest_value():
+    slot = LatestSlot()
+    assert slot.get() == (0, None)
+    slot.put("a")
+    assert slot.put("b") == 2
+    assert slot.get() == (2, "b")
+    # Nothing newer than 2 yet: times out and returns the same seq
+    assert slot.wait_newer(2, timeout=0.01) == (2, "b")
+
+
+def test_wait_newer_wakes_on_put_and_close():
+    slot = LatestSlot()
+    got = []
+    reader = threading.Thread(target=lambda: got.append(slot.wait_newer(0, timeout=10)))
+    reader.start()
+    slot.put("x")
+    reader.join(timeout=10)
+    assert got == [(1, "x")]
+
+    reader = threading.Thread(target=lambda: got.append(slot.wait_newer(1, timeout=10)))
+    reader.start()
+    slot.close()
+    reader.join(timeout=10)
+    assert got[-1] == (1, "x") and slot.closed
+
+
+def test_wait_acked_needs_every_reader():
+    slot = LatestSlot()
+    seq = slot.put(1)
+    assert not slot.wait_acked(("a", "b"), seq, timeout=0.01)
+    slot.ack("a", seq)
+    assert not slot.wait_acked(("a", "b"), seq, timeout=0.01)
+    slot.ack("b", seq)
+    assert slot.wait_acked(("a", "b"), seq, timeout=0.01)
+
+
+def _frame(i):
+    return np.full((48, 64, 3), i, np.uint8)
+
+
+def test_capture_lossless_replay_delivers_every_frame():
+    slot = LatestSlot()
+    stats = StageStats()
+    source = SyntheticSource(frame_fn=_frame, num_frames=20)
+    capture = CaptureThread(source, slot, size=(32, 24), mirror=True, stats=stats, readers=("reader",))
+    capture.start()
+    seen, seq = [], 0
+    while True:
+        newer, value = slot.wait_newer(seq, timeout=10)
+        if newer == seq:
+            break  # closed
+        seq = newer
+        _, frame, _ = value
+        assert frame.shape == (24, 32, 3)
+        seen.append(int(frame[0, 0, 0]))
+        slot.ack("reader", seq)
+    capture.join(timeout=10)
+    assert seen == list(range(20))
+    assert capture.failed  # ended because the source ran out
+    assert stats.summary()["capture"]["count"] == 20
+
+
+def test_capture_realtime_source_does_not_wait_for_readers():
+    slot = LatestSlot()
+    source = SyntheticSource(frame_fn=_frame, num_frames=5)
+    source.realtime = True
+    source.fps = 1000.0
+    capture = CaptureThread(source, slot, readers=("never-acks",))
+    assert capture.readers == ()
+    capture.start()
+    capture.join(timeout=10)
+    assert not capture.is_alive() and slot.closed
+    assert slot.get()[0] == 5
+
+
+def test_synthetic_source_stamps_media_time():
+    source = SyntheticSource(num_frames=3, fps=10.0, size=(64, 48))
+    reads = [source.read() for _ in range(4)]
+    assert [ok for ok, _, _ in reads] == [True, True, True, False]
+    assert reads[0][1].shape == (48, 64, 3)
+    times = [t for _, _, t in reads[:3]]
+    np.testing.assert_allclose(np.diff(times), 0.1, atol=1e-5)
+
+
+def test_video_file_source(tmp_path):
+    path = str(tmp_path / "user.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 15, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("MJPG writer unavailable")
+    for i in range(5):
+        writer.write(_frame(40 * i))
+    writer.release()
+    source = VideoFileSource(path)
+    assert source.isOpened() and not source.realtime and source.fps == pytest.approx(15.0)
+    reads = []
+    while True:
+        ok, frame, t = source.read()
+        if not ok:
+            break
+        reads.append((int(round(frame.mean() / 40.0)), t))
+    source.release()
+    assert [v for v, _ in reads] == list(range(5))
+    # Faster than real time, but stamped at the video's own rate
+    np.testing.assert_allclose(np.diff([t for _, t in reads]), 1.0 / 15.0, atol=1e-5)
@@ -0,0 +1,98 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from live_stats import EventLog, RateLimitedLog, StageStats
+
+
+def test_quantiles_within_bucket_resolution():
+    stats = StageStats()
+    samples = np.linspace(0.001, 0.1, 1000)
+    for s in samples:
+        stats.observe("inference", float(s))
+    # Buckets are ~12% wide
+    assert stats.quantile("inference", 0.5) == pytest.approx(np.quantile(samples, 0.5), rel=0.12)
+    assert stats.quantile("inference", 0.95) == pytest.approx(np.quantile(samples, 0.95), rel=0.12)
+    assert stats.quantile("inference", 1.0) <= 0.1
+    assert stats.quantile("missing", 0.5) is None
+
+
+def test_out_of_range_samples():
+    stats = StageStats()
+    stats.observe("slow", 60.0)
+    stats.observe("fast", 0.0)
+    assert stats.quantile("slow", 0.5) <= 60.0
+    assert stats.quantile("fast", 0.5) == 0.0
+
+
+def test_summary_counts_and_max():
+    stats = StageStats()
+    for s in (0.01, 0.02, 0.03):
+        stats.observe("dtw", s)
+    row = stats.summary()["dtw"]
+    assert row["count"] == 3
+    assert row["mean_ms"] == pytest.approx(20.0)
+    assert row["max_ms"] == pytest.approx(30.0)
+    assert row["p50_ms"] <= row["p95_ms"] <= row["max_ms"]
+
+
+def test_memory_does_not_grow_with_samples():
+    stats = StageStats()
+    for i in range(10000):
+        stats.observe("capture", 0.001 * (i % 50 + 1))
+    assert stats._counts["capture"].shape == (len(stats.edges) + 1,)
+    assert stats.summary()["capture"]["count"] == 10000
+
+
+def test_fps_and_frame_intervals():
+    stats = StageStats(fps_window=10)
+    assert stats.fps() == 0.0
+    for i in range(20):
+        stats.frame(now=i / 30.0)
+    assert stats.fps() == pytest.approx(30.0)
+    assert stats.summary()["frame"]["count"] == 19
+
+
+def test_time_context_manager_records_on_error():
+    stats = StageStats()
+    with pytest.raises(RuntimeError):
+        with stats.time("draw"):
+            raise RuntimeError
+    assert stats.summary()["draw"]["count"] == 1
+
+
+def test_dump_json_and_csv(tmp_path):
+    stats = StageStats()
+    stats.observe("inference", 0.02)
+    json_path = tmp_path / "stats.json"
+    stats.dump(str(json_path), extra={"session": "s1"})
+    doc = json.loads(json_path.read_text())
+    assert doc["session"] == "s1" and doc["stages"]["inference"]["count"] == 1
+    csv_path = tmp_path / "stats.csv"
+    stats.dump(str(csv_path))
+    rows = list(csv.reader(csv_path.open()))
+    assert rows[0][0] == "stage" and rows[1][:2] == ["inference", "1"]
+
+
+def test_rate_limited_log(capsys):
+    log = RateLimitedLog(interval=2.0)
+    assert log("rep", "first", now=0.0)
+    assert not log("rep", "second", now=1.0)
+    assert not log("rep", "third", now=1.5)
+    assert log("other", "independent", now=1.6)
+    assert log("rep", "fourth", now=2.1)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["first", "independent", "fourth (+2 suppressed)"]
+
+
+def test_event_log_writes_json_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = EventLog(str(path))
+    log("rep", t=1.5, score=np.float32(0.75))
+    log("feedback", t=2.0, text="Good form")
+    log.close()
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert events == [{"event": "rep", "t": 1.5, "score": 0.75},
+                      {"event": "feedback", "t": 2.0, "text": "Good form"}]
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from load_test import LatencyStats, is_sustainable, synthetic_jpeg, synthetic_landmarks
+
+
+def test_latency_stats_summary():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record("POST /analysis/pose", ms / 1000.0, ok=ms % 10 != 0)
+    stats.record("GET /health", 0.002, ok=True)
+    summary = stats.summary(elapsed=10.0)
+    pose = summary["POST /analysis/pose"]
+    assert pose["count"] == 100
+    assert pose["rps"] == pytest.approx(10.0)
+    assert pose["p50_ms"] == pytest.approx(50.5)
+    assert pose["p99_ms"] == pytest.approx(99.01)
+    assert pose["error_rate"] == pytest.approx(0.1)
+    total = summary["__total__"]
+    assert total["count"] == 101
+    assert total["error_rate"] == pytest.approx(10 / 101)
+
+
+def test_empty_summary():
+    total = LatencyStats().summary(elapsed=1.0)["__total__"]
+    assert total["count"] == 0
+    assert total["error_rate"] == 0.0
+
+
+def test_is_sustainable():
+    args = SimpleNamespace(p95_slo_ms=250.0, max_error_rate=0.01)
+    assert is_sustainable({"__total__": {"p95_ms": 200.0, "error_rate": 0.0}}, args)
+    assert not is_sustainable({"__total__": {"p95_ms": 300.0, "error_rate": 0.0}}, args)
+    assert not is_sustainable({"__total__": {"p95_ms": 200.0, "error_rate": 0.05}}, args)
+
+
+def test_synthetic_inputs():
+    lms = np.asarray(synthetic_landmarks(50))
+    assert lms.shape == (50, 33, 3)
+    # The wrists move, the hips hold still
+    assert np.ptp(lms[:, 15, 1]) > 0.1
+    assert np.ptp(lms[:, 23, 1]) < 0.05
+    img = cv2.imdecode(np.frombuffer(synthetic_jpeg(320, 240), np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (240, 320, 3)
@@ -0,0 +1,78 @@
+import pytest
+
+from metrics import MetricsRegistry
+
+
+def _lines(registry):
+    text = registry.render()
+    assert text.endswith("\n")
+    return text.splitlines()
+
+
+def test_counter_render():
+    reg = MetricsRegistry()
+    c = reg.counter("requests_total", "Requests", ("method", "status"))
+    c.inc(method="GET", status="200")
+    c.inc(2, method="GET", status="200")
+    c.inc(method="POST", status="429")
+    lines = _lines(reg)
+    assert lines[:2] == ["# HELP requests_total Requests", "# TYPE requests_total counter"]
+    assert 'requests_total{method="GET",status="200"} 3.0' in lines
+    assert 'requests_total{method="POST",status="429"} 1.0' in lines
+    assert c.value(method="GET", status="200") == 3.0
+
+
+def test_unlabelled_counter_renders_zero():
+    reg = MetricsRegistry()
+    reg.counter("extractions_total", "Extractions")
+    assert "extractions_total 0.0" in _lines(reg)
+
+
+def test_labels_must_match():
+    reg = MetricsRegistry()
+    c = reg.counter("x_total", "X", ("a",))
+    with pytest.raises(ValueError):
+        c.inc(b="1")
+    with pytest.raises(ValueError):
+        reg.counter("x_total", "again")
+
+
+def test_label_values_are_escaped():
+    reg = MetricsRegistry()
+    reg.counter("x_total", "X", ("path",)).inc(path='a"b\\c\nd')
+    assert 'x_total{path="a\\"b\\\\c\\nd"} 1.0' in _lines(reg)
+
+
+def test_gauge_set_inc_and_function():
+    reg = MetricsRegistry()
+    g = reg.gauge("queue_depth", "Depth", ("executor",))
+    g.set(3, executor="pose")
+    g.dec(executor="pose")
+    g.set_function(lambda: 7, executor="analysis")
+    g.set_function(lambda: 1 / 0, executor="broken")
+    lines = _lines(reg)
+    assert 'queue_depth{executor="pose"} 2.0' in lines
+    assert 'queue_depth{executor="analysis"} 7.0' in lines
+    assert not any("broken" in line for line in lines)
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = MetricsRegistry()
+    h = reg.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v, stage="dtw")
+    lines = _lines(reg)
+    assert 'latency_seconds_bucket{stage="dtw",le="0.1"} 2.0' in lines
+    assert 'latency_seconds_bucket{stage="dtw",le="1.0"} 3.0' in lines
+    assert 'latency_seconds_bucket{stage="dtw",le="+Inf"} 4.0' in lines
+    assert 'latency_seconds_sum{stage="dtw"} 3.65' in lines
+    assert 'latency_seconds_count{stage="dtw"} 4.0' in lines
+
+
+def test_histogram_time_records_on_error():
+    reg = MetricsRegistry()
+    h = reg.histogram("op_seconds", "Op")
+    with pytest.raises(RuntimeError):
+        with h.time():
+            raise RuntimeError
+    assert "op_seconds_count 1.0" in _lines(reg)
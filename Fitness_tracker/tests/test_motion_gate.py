@@ -0,0 +1,64 @@
+import numpy as np
+
+from motion_gate import MotionGate
+
+
+def _frame(level, bar_x=None):
+    frame = np.full((480, 640, 3), level, np.uint8)
+    if bar_x is not None:
+        frame[:, bar_x:bar_x + 80] = 255
+    return frame
+
+
+def test_first_frame_always_infers():
+    gate = MotionGate()
+    assert gate.should_infer(_frame(50), now=0.0)
+    assert gate.skip_ratio == 0.0
+
+
+def test_static_frames_reuse_last_result():
+    gate = MotionGate(threshold=1.0, max_skip_seconds=10.0)
+    assert gate.should_infer(_frame(50, 100), now=0.0)
+    gate.inferred("pose-0", now=0.0)
+    for i in range(1, 5):
+        assert not gate.should_infer(_frame(50, 100), now=0.1 * i)
+    assert gate.last_result == "pose-0"
+    assert gate.skipped == 4 and gate.checked == 5
+    assert gate.skip_ratio == 0.8
+
+
+def test_motion_triggers_inference():
+    gate = MotionGate(threshold=1.0, max_skip_seconds=10.0)
+    gate.should_infer(_frame(50, 100), now=0.0)
+    gate.inferred("pose-0", now=0.0)
+    assert gate.should_infer(_frame(50, 300), now=0.1)
+    assert gate.last_motion >= 1.0
+
+
+def test_max_skip_forces_inference():
+    gate = MotionGate(threshold=1.0, max_skip_seconds=0.5)
+    gate.should_infer(_frame(50), now=0.0)
+    gate.inferred("pose-0", now=0.0)
+    assert not gate.should_infer(_frame(50), now=0.4)
+    assert gate.should_infer(_frame(50), now=0.5)
+
+
+def test_slow_drift_accumulates_against_last_inferred_frame():
+    gate = MotionGate(threshold=1.0, max_skip_seconds=100.0)
+    gate.should_infer(_frame(50, 100), now=0.0)
+    gate.inferred("pose-0", now=0.0)
+    # A 1 px step stays under the threshold, but two of them add up past it
+    assert not gate.should_infer(_frame(50, 101), now=1.0)
+    assert gate.should_infer(_frame(50, 102), now=2.0)
+
+
+def test_reference_only_moves_on_inferred():
+    gate = MotionGate(threshold=1.0, max_skip_seconds=100.0)
+    gate.should_infer(_frame(50), now=0.0)
+    gate.inferred("pose-0", now=0.0)
+    assert gate.should_infer(_frame(120), now=1.0)
+    # Pose was asked for but never recorded: the old frame is still the reference
+    assert gate.should_infer(_frame(120), now=2.0)
+    gate.inferred("pose-1", now=2.0)
+    assert not gate.should_infer(_frame(120), now=3.0)
+    assert gate.last_result == "pose-1"
@@ -0,0 +1,64 @@
+import os
+import signal
+import time
+
+import numpy as np
+import pytest
+
+from pose_workers import PoseWorkerPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PoseWorkerPool(1, num_slots=2, max_height=120, max_width=160)
+    assert pool.wait_ready(120.0)
+    yield pool
+    pool.close()
+
+
+def test_fit_downscales_oversized_frames():
+    fit = PoseWorkerPool._fit
+    stub = type("P", (), {"max_height": 120, "max_width": 160})()
+    small = np.zeros((100, 100, 3), np.uint8)
+    assert fit(stub, small) is small
+    assert fit(stub, np.zeros((480, 640, 3), np.uint8)).shape == (120, 160, 3)
+    assert fit(stub, np.zeros((1000, 200, 3), np.uint8)).shape == (120, 24, 3)
+
+
+def test_more_frames_than_slots(pool):
+    frames = [np.full((240, 320, 3), v, np.uint8) for v in range(0, 250, 25)]
+    futures = [pool.submit(f, timeout=30.0) if i < 2 else None for i, f in enumerate(frames)]
+    results = [f.result(timeout=30.0) for f in futures[:2]]
+    # Later frames wait for a free slot
+    results += [pool.process(f, timeout=30.0) for f in frames[2:]]
+    assert all(r is None or r.shape == (33, 3) for r in results)
+    assert pool.in_flight == 0
+    assert pool._free_slots.qsize() == pool.num_slots
+
+
+def test_crashed_worker_fails_pending_and_restarts(pool):
+    # Keep the worker busy long enough to kill it with a frame in flight
+    future = pool.submit(np.zeros((120, 160, 3), np.uint8), timeout=30.0)
+    victim = pool._procs[0]
+    os.kill(victim.pid, signal.SIGKILL)
+    victim.join(timeout=30.0)
+    try:
+        future.result(timeout=30.0)
+    except RuntimeError as e:
+        assert "crashed" in str(e)
+    # The frame may have finished before the kill; wait for the replacement either way
+    deadline = time.time() + 60.0
+    while (pool._procs[0] is victim or not pool._procs[0].is_alive()) and time.time() < deadline:
+        time.sleep(0.1)
+    assert pool.process(np.zeros((120, 160, 3), np.uint8), timeout=60.0) is None
+    assert pool.in_flight == 0
+
+
+def test_close_fails_new_submits():
+    pool = PoseWorkerPool(1, num_slots=1, max_height=32, max_width=32)
+    name = pool._frames_shm.name
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.submit(np.zeros((32, 32, 3), np.uint8))
+    if os.path.isdir("/dev/shm"):
+        assert not os.path.exists(f"/dev/shm/{name}")
@@ -0,0 +1,112 @@
+import contextlib
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import progressive_extract
+from progressive_extract import ProgressivePoseExtractor
+
+W, H = 320, 240
+NUM_FRAMES = 90
+
+
+def _frame(i):
+    # Frame index as seven black/white bars, robust to lossy compression
+    a = np.zeros((H, W, 3), np.uint8)
+    for b in range(7):
+        if i >> b & 1:
+            a[:, 40 * b:40 * b + 40] = 255
+    return a
+
+
+def _index(frame):
+    bar = frame.shape[1] / 8.0
+    return sum(int(frame[:, int(bar * b):int(bar * (b + 1)), 0].mean() > 128) << b for b in range(7))
+
+
+class _FakePoseModule:
+    @staticmethod
+    def Pose():
+        return contextlib.nullcontext(object())
+
+
+@pytest.fixture
+def video_bytes(tmp_path):
+    src = str(tmp_path / "src.avi")
+    writer = cv2.VideoWriter(src, cv2.VideoWriter_fourcc(*"MJPG"), 30, (W, H))
+    if not writer.isOpened():
+        pytest.skip("MJPG writer unavailable")
+    for i in range(NUM_FRAMES):
+        writer.write(_frame(i))
+    writer.release()
+    with open(src, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def seen(monkeypatch):
+    seen = []
+
+    def fake_extract(frame, pose):
+        seen.append((_index(frame), frame.shape[:2]))
+        return None, np.full((33, 3), float(_index(frame)), np.float32)
+
+    monkeypatch.setattr(progressive_extract, "extract_landmarks", fake_extract)
+    monkeypatch.setattr(progressive_extract, "mp_pose", _FakePoseModule)
+    return seen
+
+
+def _run_growing(extractor, path, data, chunk):
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault("seq", extractor.run()))
+    worker.start()
+    with open(path, "wb") as f:
+        for off in range(0, len(data), chunk):
+            f.write(data[off:off + chunk])
+            f.flush()
+            extractor.notify(off + len(data[off:off + chunk]))
+    extractor.finish()
+    worker.join(timeout=30)
+    assert not worker.is_alive()
+    return result["seq"]
+
+
+def test_every_frame_processed_once_in_order(tmp_path, video_bytes, seen):
+    path = str(tmp_path / "upload.avi")
+    chunk = len(video_bytes) // 40
+    extractor = ProgressivePoseExtractor(path, min_bytes=chunk, retry_bytes=chunk, retry_growth=1.0)
+    seq = _run_growing(extractor, path, video_bytes, chunk)
+    assert [i for i, _ in seen] == list(range(NUM_FRAMES))
+    assert [int(a[0, 0]) for a in seq] == list(range(NUM_FRAMES))
+    assert extractor.frames_decoded == NUM_FRAMES
+
+
+def test_passes_grow_geometrically(tmp_path, video_bytes, seen):
+    path = str(tmp_path / "upload.avi")
+    chunk = max(1, len(video_bytes) // 400)
+    extractor = ProgressivePoseExtractor(path, min_bytes=chunk, retry_bytes=chunk, retry_growth=1.5)
+    _run_growing(extractor, path, video_bytes, chunk)
+    assert [i for i, _ in seen] == list(range(NUM_FRAMES))
+    # log1.5(400) is about 15; fixed steps would take up to 400 passes
+    assert 1 <= extractor.passes <= 20
+
+
+def test_frames_downscaled_to_max_size(tmp_path, video_bytes, seen):
+    path = str(tmp_path / "upload.avi")
+    with open(path, "wb") as f:
+        f.write(video_bytes)
+    extractor = ProgressivePoseExtractor(path, max_size=160)
+    extractor.notify(len(video_bytes))
+    extractor.finish()
+    seq = extractor.run()
+    assert len(seq) == NUM_FRAMES
+    assert {shape for _, shape in seen} == {(120, 160)}
+
+
+def test_cancel_returns_none(tmp_path, seen):
+    extractor = ProgressivePoseExtractor(str(tmp_path / "never.avi"))
+    extractor.cancel()
+    assert extractor.run() is None
+    assert seen == []
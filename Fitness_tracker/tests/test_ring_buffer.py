@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ring_buffer import RingBuffer
+
+
+def _filled(capacity, count):
+    buf = RingBuffer(capacity, shape=(2,))
+    for i in range(count):
+        buf.append(np.array([i, -i], dtype=np.float32))
+    return buf
+
+
+def test_latest_before_wraparound():
+    buf = _filled(5, 3)
+    assert len(buf) == 3
+    assert buf.latest()[:, 0].tolist() == [0, 1, 2]
+    assert buf.latest(2)[:, 0].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("count", [5, 6, 9, 10, 23])
+def test_latest_after_wraparound_is_oldest_first(count):
+    buf = _filled(5, count)
+    assert len(buf) == 5
+    assert buf.latest()[:, 0].tolist() == list(range(count - 5, count))
+    for k in range(6):
+        assert buf.latest(k)[:, 0].tolist() == list(range(count - k, count))
+    np.testing.assert_array_equal(buf.latest()[:, 1], -buf.latest()[:, 0])
+
+
+def test_latest_clamps_k():
+    buf = _filled(4, 2)
+    assert len(buf.latest(10)) == 2
+    assert len(buf.latest(0)) == 0
+    assert len(buf.latest(-3)) == 0
+
+
+def test_latest_is_a_read_only_view():
+    buf = _filled(4, 7)
+    view = buf.latest(3)
+    assert not view.flags.writeable
+    assert not view.flags.owndata
+    with pytest.raises(ValueError):
+        view[0, 0] = 99.0
+    # Writing through append still works afterwards
+    buf.append(np.array([7, -7], dtype=np.float32))
+    assert buf.latest(1)[0, 0] == 7
+
+
+def test_clear():
+    buf = _filled(3, 8)
+    buf.clear()
+    assert len(buf) == 0
+    assert buf.latest().shape == (0, 2)
+    buf.append(np.array([42, -42], dtype=np.float32))
+    assert buf.latest()[:, 0].tolist() == [42]
+
+
+def test_scalar_records():
+    buf = RingBuffer(3, shape=(), dtype=np.float64)
+    for t in (0.5, 1.5, 2.5, 3.5):
+        buf.append(t)
+    assert buf.latest().tolist() == [1.5, 2.5, 3.5]
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
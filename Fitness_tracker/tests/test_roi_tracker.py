@@ -0,0 +1,102 @@
+import types
+
+import numpy as np
+import pytest
+
+from exercise import extract_landmarks_roi
+from roi_tracker import RoiTracker
+
+W, H = 640, 480
+
+
+class _BlobPose:
+    """Fake Pose: the 'person' is the white blob; landmarks are its corners, normalized to the input."""
+    def __init__(self):
+        self.inputs = []
+
+    def process(self, rgb):
+        self.inputs.append(rgb.shape[:2])
+        ys, xs = np.nonzero(rgb[:, :, 0] > 128)
+        if len(xs) == 0:
+            return types.SimpleNamespace(pose_landmarks=None)
+        h, w = rgb.shape[:2]
+        corners = [(xs.min() / w, ys.min() / h), ((xs.max() + 1) / w, (ys.max() + 1) / h)]
+        lms = [types.SimpleNamespace(x=float(x), y=float(y), z=0.1) for x, y in (corners * 17)[:33]]
+        return types.SimpleNamespace(pose_landmarks=types.SimpleNamespace(landmark=lms))
+
+
+def _frame(x0, y0, x1, y1):
+    frame = np.zeros((H, W, 3), np.uint8)
+    frame[y0:y1, x0:x1] = 255
+    return frame
+
+
+def test_to_frame_maps_crop_coordinates_back():
+    lmk = np.array([[0.0, 0.0, 0.5], [1.0, 1.0, -0.5], [0.5, 0.25, 0.0]], np.float32)
+    out = RoiTracker.to_frame(lmk, (100, 50, 300, 250), (H, W, 3))
+    np.testing.assert_allclose(out[:, 0], [100 / W, 300 / W, 200 / W], rtol=1e-6)
+    np.testing.assert_allclose(out[:, 1], [50 / H, 250 / H, 100 / H], rtol=1e-6)
+    # z keeps the x scale of the crop
+    np.testing.assert_allclose(out[:, 2], [0.5 * 200 / W, -0.5 * 200 / W, 0.0], rtol=1e-6)
+
+
+def test_crop_landmarks_match_full_frame_landmarks():
+    frame = _frame(200, 120, 280, 360)
+    pose = _BlobPose()
+    tracker = RoiTracker()
+    _, full = extract_landmarks_roi(frame, pose, tracker)
+    assert pose.inputs[-1] == (H, W) and tracker.box is not None
+    obj, cropped = extract_landmarks_roi(frame, pose, tracker)
+    assert pose.inputs[-1] != (H, W) and tracker.cropped_frames == 1
+    np.testing.assert_allclose(cropped[:, :2], full[:, :2], atol=1e-6)
+    # The proto handed to mp_drawing is rewritten too
+    np.testing.assert_allclose([(lm.x, lm.y) for lm in obj.landmark], cropped[:, :2], atol=1e-6)
+
+
+def test_lost_track_falls_back_to_full_frame():
+    pose = _BlobPose()
+    tracker = RoiTracker()
+    extract_landmarks_roi(_frame(40, 40, 120, 240), pose, tracker)
+    box = tracker.box
+    assert box is not None
+    # The person jumps outside the crop
+    moved = _frame(500, 200, 600, 460)
+    _, lmk = extract_landmarks_roi(moved, pose, tracker)
+    assert tracker.losses == 1
+    assert pose.inputs[-2] == (box[3] - box[1], box[2] - box[0]) and pose.inputs[-1] == (H, W)
+    np.testing.assert_allclose(lmk[0, :2], [500 / W, 200 / H], atol=1e-6)
+    # Tracking restarts around the new position
+    assert tracker.box is not None and tracker.box[0] <= 500 and tracker.box[2] >= 600
+
+
+def test_no_person_stays_full_frame():
+    pose = _BlobPose()
+    tracker = RoiTracker()
+    obj, lmk = extract_landmarks_roi(np.zeros((H, W, 3), np.uint8), pose, tracker)
+    assert obj is None and lmk is None and tracker.box is None
+    assert tracker.full_frames == 1
+
+
+def test_box_is_sticky_and_skips_near_full_frame():
+    tracker = RoiTracker()
+    lmk = np.zeros((33, 3), np.float32)
+    lmk[:, 0] = np.linspace(0.3, 0.6, 33)
+    lmk[:, 1] = np.linspace(0.3, 0.7, 33)
+    tracker.update(lmk, (H, W))
+    box = tracker.box
+    lmk[:, 0] += 0.005  # small drift keeps the box
+    tracker.update(lmk, (H, W))
+    assert tracker.box == box
+    lmk[:, 0] = np.linspace(0.0, 1.0, 33)
+    lmk[:, 1] = np.linspace(0.0, 1.0, 33)
+    tracker.update(lmk, (H, W))
+    assert tracker.box is None
+    tracker.update(None, (H, W))
+    assert tracker.crop(np.zeros((H, W, 3), np.uint8))[1] is None
+
+
+@pytest.mark.parametrize("box", [(0, 0, 64, 48), (576, 432, 640, 480)])
+def test_to_frame_at_edges(box):
+    lmk = np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 0.0]], np.float32)
+    out = RoiTracker.to_frame(lmk, box, (H, W))
+    np.testing.assert_allclose(out[:, :2], [[box[0] / W, box[1] / H], [box[2] / W, box[3] / H]], rtol=1e-6)
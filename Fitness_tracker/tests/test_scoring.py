@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from scoring import (
+    REP_SCORE_DEFAULTS,
+    RepScoreParams,
+    build_priority_mask,
+    dtw_distance_l1,
+    masked_motion_amplitude,
+    rep_features,
+    rep_scores_from_features,
+    rep_window_angles,
+    resample_by_time,
+    resample_to_length,
+    smooth_angles,
+)
+
+
+def _baseline_score(A_us, trainer_angles, weights, priority_mask):
+    """exercise.score_user_angles as it was before the constants moved to RepScoreParams."""
+    A_tr = trainer_angles
+    A_us_sm = smooth_angles(A_us, window=5)
+    A_us_rs = resample_to_length(A_us_sm, len(A_tr))
+    dist_nom = dtw_distance_l1(A_us_rs, A_tr, weights=weights)
+    A_us_mir = A_us_rs.copy()
+    A_us_mir[:, [0, 1]] = A_us_rs[:, [1, 0]]
+    A_us_mir[:, [2, 3]] = A_us_rs[:, [3, 2]]
+    A_us_mir[:, [4, 5]] = A_us_rs[:, [5, 4]]
+    A_us_mir[:, [6, 7]] = A_us_rs[:, [7, 6]]
+    dist_mir = dtw_distance_l1(A_us_mir, A_tr, weights=weights)
+    dist = min(dist_nom, dist_mir)
+    sim_angle = np.exp(-0.03 * dist)
+    amp_user_pr = masked_motion_amplitude(A_us_rs, priority_mask)
+    amp_tr_pr = masked_motion_amplitude(A_tr, priority_mask) + 1e-6
+    amp_ratio = float(np.clip(amp_user_pr / amp_tr_pr, 0.0, 1.0))
+    base_score = float(sim_angle * amp_ratio)
+    if base_score >= 0.4:
+        non_mask = ~priority_mask if np.any(priority_mask) else np.zeros_like(priority_mask)
+        amp_user_np = masked_motion_amplitude(A_us_rs, non_mask)
+        amp_trainer_np = masked_motion_amplitude(A_tr, non_mask)
+        if amp_user_np / (amp_trainer_np + 1e-6) > 2.5:
+            return base_score * 0.3
+    return base_score
+
+
+def _curl(n, amplitude=60.0, phase=0.0, side_sway=2.0, seed=0):
+    """[n, 8] joint angles of a bicep curl: elbows swing, the other joints hold still."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 2.0 * np.pi, n) + phase
+    angles = np.tile(np.array([160.0, 160.0, 20.0, 20.0, 170.0, 170.0, 175.0, 175.0]), (n, 1))
+    angles[:, 0] -= amplitude * (1.0 - np.cos(t)) / 2.0
+    angles[:, 1] -= amplitude * (1.0 - np.cos(t)) / 2.0
+    angles[:, 2:] += side_sway * np.sin(2.0 * t)[:, None]
+    return (angles + rng.normal(0.0, 0.5, angles.shape)).astype(np.float32)
+
+
+TRAINER = _curl(48, amplitude=70.0, side_sway=1.0, seed=1)
+PRIORITY = build_priority_mask(["elbow"], 8)
+WEIGHTS = np.where(PRIORITY, 1.5, 0.5).astype(np.float32)
+
+
+def _users():
+    mirrored = _curl(40, amplitude=68.0, seed=2)
+    mirrored[:, 0] = 160.0
+    return {
+        "close": _curl(40, amplitude=68.0, seed=2),
+        "slow": _curl(90, amplitude=66.0, seed=3),
+        "one_arm": mirrored,
+        "swinging": _curl(40, amplitude=68.0, side_sway=12.0, seed=4),
+        "shallow": _curl(40, amplitude=15.0, seed=5),
+        "out_of_phase": _curl(40, amplitude=70.0, phase=np.pi, seed=6),
+        "still": _curl(40, amplitude=0.0, side_sway=0.0, seed=7),
+    }
+
+
+@pytest.mark.parametrize("weights", [None, WEIGHTS], ids=["unweighted", "weighted"])
+def test_rep_scores_from_features_match_baseline(weights):
+    users = _users()
+    baseline = np.array([_baseline_score(A, TRAINER, weights, PRIORITY) for A in users.values()])
+    features = np.stack([rep_features(A, TRAINER, weights, PRIORITY) for A in users.values()])
+    np.testing.assert_array_equal(rep_scores_from_features(features), baseline)
+    # One row at a time gives the same as the batch
+    for row, expected in zip(features, baseline):
+        assert rep_scores_from_features(row)[0] == expected
+
+
+def test_fixture_covers_every_branch():
+    features = np.stack([rep_features(A, TRAINER, WEIGHTS, PRIORITY) for A in _users().values()])
+    p = REP_SCORE_DEFAULTS
+    base = np.exp(-p.dist_scale * features[:, 0]) * np.clip(features[:, 1] / (features[:, 2] + 1e-6), 0, 1)
+    gated = base >= p.gate
+    excessive = features[:, 3] / (features[:, 4] + 1e-6) > p.np_ratio_limit
+    assert (~gated).any()
+    assert (gated & excessive).any()
+    assert (gated & ~excessive).any()
+
+
+def test_score_user_angles_uses_the_shared_scoring():
+    exercise = pytest.importorskip("exercise")
+    for A in _users().values():
+        assert exercise.score_user_angles(A, TRAINER, WEIGHTS, PRIORITY) == _baseline_score(A, TRAINER, WEIGHTS, PRIORITY)
+
+
+def test_params_change_scores():
+    features = np.stack([rep_features(A, TRAINER, WEIGHTS, PRIORITY) for A in _users().values()])
+    strict = rep_scores_from_features(features, RepScoreParams(dist_scale=0.1))
+    assert np.all(strict <= rep_scores_from_features(features))
+    no_penalty = rep_scores_from_features(features, REP_SCORE_DEFAULTS._replace(np_penalty=1.0))
+    assert np.all(no_penalty >= rep_scores_from_features(features))
+
+
+def test_resample_by_time_no_frames():
+    out = resample_by_time(np.zeros(0), np.zeros((0, 4), np.float32), rate=25.0)
+    assert out.shape == (0, 4) and out.dtype == np.float32
+
+
+def test_resample_by_time_one_frame():
+    values = np.array([[10.0, 20.0]], np.float32)
+    out = resample_by_time(np.array([3.0]), values, rate=25.0)
+    np.testing.assert_array_equal(out, values)
+    # A window reaching back before the only sample still yields that sample
+    out = resample_by_time(np.array([3.0]), values, rate=25.0, start=2.0)
+    np.testing.assert_array_equal(out, values)
+
+
+def test_resample_by_time_grid_anchored_at_end():
+    times = np.array([0.0, 0.1, 0.25, 0.3])
+    values = (times * 100.0)[:, None].astype(np.float32)
+    out = resample_by_time(times, values, rate=20.0)
+    # 0.3 s at 20 Hz: ticks at 0.0, 0.05, ..., 0.3, ending on the newest sample
+    np.testing.assert_allclose(out[:, 0], np.arange(7) * 5.0, atol=1e-4)
+    out = resample_by_time(times, values, rate=20.0, start=0.12)
+    np.testing.assert_allclose(out[:, 0], [15.0, 20.0, 25.0, 30.0], atol=1e-4)
+
+
+def test_resample_by_time_keeps_trailing_dims():
+    times = np.array([0.0, 1.0])
+    values = np.stack([np.zeros((33, 3)), np.ones((33, 3))]).astype(np.float32)
+    out = resample_by_time(times, values, rate=4.0)
+    assert out.shape == (5, 33, 3)
+    np.testing.assert_allclose(out[:, 0, 0], [0.0, 0.25, 0.5, 0.75, 1.0])
+
+
+def test_rep_window_angles():
+    times = np.arange(0, 60) / 30.0
+    angles = np.stack([times * 10.0, -times], axis=1).astype(np.float32)
+    # Without a rate: the last n samples
+    np.testing.assert_array_equal(rep_window_angles(times, angles, 5, None), angles[-5:])
+    # With one: n samples ending at the newest, spaced 1/rate apart
+    out = rep_window_angles(times, angles, 6, 10.0)
+    assert out.shape == (6, 2)
+    np.testing.assert_allclose(out[:, 0], (times[-1] - np.arange(5, -1, -1) / 10.0) * 10.0, atol=1e-4)
+    # Less history than the window: whatever is there
+    assert len(rep_window_angles(times[:3], angles[:3], 50, 10.0)) == 1
+    assert rep_window_angles(times[:1], angles[:1], 50, 10.0).shape == (1, 2)
+    assert rep_window_angles(times[:0], angles[:0], 50, 10.0).shape == (0, 2)
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from session_expiry import SessionExpiryIndex
+
+
+def test_pop_expired_in_deadline_order():
+    index = SessionExpiryIndex(ttl_seconds=10.0)
+    index.touch("a", now=0.0)
+    index.touch("b", now=2.0)
+    index.touch("c", now=5.0)
+    assert index.next_deadline() == 10.0
+    assert index.pop_expired(now=9.9) == []
+    assert index.pop_expired(now=12.0) == ["a", "b"]
+    assert "a" not in index and "c" in index
+    assert len(index) == 1
+    assert index.next_deadline() == 15.0
+
+
+def test_touch_extends_deadline():
+    index = SessionExpiryIndex(ttl_seconds=10.0)
+    index.touch("a", now=0.0)
+    index.touch("a", now=8.0)
+    # The stale entry surfaces at 10 and is skipped
+    assert index.pop_expired(now=11.0) == []
+    assert index.next_deadline() == 18.0
+    assert index.pop_expired(now=18.0) == ["a"]
+    assert index.next_deadline() is None
+
+
+def test_discard():
+    index = SessionExpiryIndex(ttl_seconds=1.0)
+    index.touch("a", now=0.0)
+    index.discard("a")
+    index.discard("never-touched")
+    assert "a" not in index
+    assert index.next_deadline() is None
+    assert index.pop_expired(now=5.0) == []
+
+
+def test_stale_entries_are_compacted():
+    index = SessionExpiryIndex(ttl_seconds=10.0)
+    for i in range(1000):
+        index.touch("a", now=float(i))
+        index.touch("b", now=float(i))
+    assert len(index._heap) <= 2 * len(index) + 64 + 1
+    assert index.pop_expired(now=1008.0) == []
+    assert sorted(index.pop_expired(now=1009.0)) == ["a", "b"]
+
+
+def test_release_session_drops_all_state():
+    import api_server
+    from inference_scheduler import InferenceScheduler
+    from motion_gate import MotionGate
+    from roi_tracker import RoiTracker
+
+    async def main():
+        session = {
+            "trainer_template": object(), "feedback_system": object(),
+            "inference_scheduler": InferenceScheduler(), "roi_tracker": RoiTracker(), "motion_gate": MotionGate(),
+        }
+        gate = api_server.frame_gate
+        assert await gate.acquire("sess-1") is True
+        waiting = asyncio.create_task(gate.acquire("sess-1"))
+        await asyncio.sleep(0)
+        api_server._release_session("sess-1", session)
+        assert all(v is None for v in session.values())
+        # The waiting frame is turned away and the key is gone
+        assert await waiting is False
+        assert len(gate) == 0
+        # A request finishing after release is harmless
+        gate.release("sess-1")
+
+    asyncio.run(main())
+
+
+def test_delete_session_releases_state(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api_server
+
+    session = {"trainer_template": object(), "feedback_system": object(), "inference_scheduler": object(),
+               "roi_tracker": object(), "motion_gate": object()}
+    monkeypatch.setitem(api_server.active_sessions, "sess-2", session)
+    api_server.session_expiry.touch("sess-2")
+    response = TestClient(api_server.app).delete("/sessions/sess-2")
+    assert response.status_code == 200
+    assert "sess-2" not in api_server.active_sessions
+    assert "sess-2" not in api_server.session_expiry
+    assert all(v is None for v in session.values())
+
+
+def test_expire_sessions_evicts_idle_sessions(monkeypatch):
+    import api_server
+
+    monkeypatch.setattr(api_server, "SESSION_TTL_SECONDS", 0.05)
+    monkeypatch.setattr(api_server, "session_expiry", SessionExpiryIndex(0.05))
+    idle = {"trainer_template": object(), "feedback_system": None, "inference_scheduler": None,
+            "roi_tracker": None, "motion_gate": object()}
+    monkeypatch.setitem(api_server.active_sessions, "idle", idle)
+    monkeypatch.setitem(api_server.active_sessions, "busy", dict(idle))
+
+    async def main():
+        api_server.session_expiry.touch("idle")
+        api_server.session_expiry.touch("busy")
+        task = asyncio.create_task(api_server.expire_sessions())
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            api_server.session_expiry.touch("busy")
+        task.cancel()
+
+    asyncio.run(main())
+    assert "idle" not in api_server.active_sessions
+    assert idle["trainer_template"] is None and idle["motion_gate"] is None
+    assert "busy" in api_server.active_sessions
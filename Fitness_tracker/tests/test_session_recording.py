@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pytest
+
+from session_recording import SessionReader, SessionRecorder
+
+SCALE = (1.0 / 512, 1.0 / 512, 1.0 / 128)
+
+
+def _record(path, n=700, missing=(3, 300, 301), chunk_frames=256, close=True):
+    rng = np.random.default_rng(0)
+    times = 1.7e9 + 0.123456 + np.arange(n) / 30.0
+    poses = rng.uniform(0.0, 1.0, (n, 33, 3)).astype(np.float32)
+    rec = SessionRecorder(str(path), meta={"exercise": "curl"}, scale=SCALE, chunk_frames=chunk_frames)
+    rec("phase", phase="workout", t=times[0])
+    for i in range(n):
+        rec.append(None if i in missing else poses[i], times[i])
+        if i == 400:
+            rec("rep", rep=1, score=0.75)
+    if close:
+        rec.close()
+    else:
+        rec.flush()
+    return times, poses, rec
+
+
+def test_round_trip_within_quantization_step(tmp_path):
+    path = tmp_path / "s.ftsr"
+    times, poses, _ = _record(path)
+    with SessionReader(str(path)) as reader:
+        assert reader.complete
+        assert reader.meta == {"exercise": "curl"}
+        assert len(reader) == len(times)
+        t, p = reader.frames()
+    # Microsecond resolution, plus float64 rounding at epoch-sized times
+    assert np.abs(t - times).max() < 6e-7
+    valid = ~np.isnan(p[:, 0, 0])
+    err = np.abs(p[valid] - poses[valid]).max(axis=(0, 1))
+    assert np.all(err <= np.asarray(SCALE) / 2 + 1e-6)
+
+
+def test_missing_poses_are_nan_rows(tmp_path):
+    path = tmp_path / "s.ftsr"
+    _record(path)
+    with SessionReader(str(path)) as reader:
+        _, p = reader.frames()
+    missing = np.nonzero(np.isnan(p).all(axis=(1, 2)))[0]
+    assert missing.tolist() == [3, 300, 301]
+    assert not np.isnan(np.delete(p, missing, axis=0)).any()
+
+
+def test_window_includes_frames_at_its_bounds(tmp_path):
+    path = tmp_path / "s.ftsr"
+    times, _, _ = _record(path)
+    with SessionReader(str(path)) as reader:
+        for k in (0, 255, 256, 511, 699):
+            t, _ = reader.window(times[k], times[k] + 1.0)
+            assert len(t) and abs(t[0] - times[k]) < 1e-6
+            t, _ = reader.window(times[k] - 1.0, times[k])
+            assert len(t) and abs(t[-1] - times[k]) < 1e-6
+
+
+def test_long_gap_inside_a_chunk(tmp_path):
+    path = tmp_path / "s.ftsr"
+    times = 1.7e9 + np.array([0.0, 1.0 / 30, 3 * 3600.0, 3 * 3600.0 + 1.0 / 30])
+    with SessionRecorder(str(path)) as rec:
+        for t in times:
+            rec.append(np.zeros((33, 3), np.float32), t)
+    with SessionReader(str(path)) as reader:
+        t, _ = reader.frames()
+    assert np.abs(t - times).max() < 1e-6
+
+
+def test_events(tmp_path):
+    path = tmp_path / "s.ftsr"
+    times, _, _ = _record(path)
+    with SessionReader(str(path)) as reader:
+        assert [e["event"] for e in reader.events()] == ["phase", "rep"]
+        rep, = reader.events("rep")
+    assert rep["score"] == 0.75
+    assert rep["rep"] == 1
+
+
+def test_event_frame_index_counts_buffered_poses(tmp_path):
+    path = tmp_path / "s.ftsr"
+    _record(path)
+    with SessionReader(str(path)) as reader:
+        phase, rep = reader.events()
+        # rep was recorded after pose 400, while poses 256-400 were still buffered
+        assert phase["frame"] == 0 and rep["frame"] == 401
+        assert reader._events["first_frame"].tolist() == [0, 401]
+        # Its time defaults to the last pose's
+        t, _ = reader.frames()
+        assert abs(reader._events["t_first"][1] - t[400]) < 1e-6
+
+
+def test_truncated_file_rebuilds_index(tmp_path):
+    path = tmp_path / "s.ftsr"
+    times, poses, rec = _record(path, close=False)
+    size = os.path.getsize(path)
+    rec._file.close()
+    # Cut into the last landmark chunk: everything before it is still readable
+    with open(path, "r+b") as fh:
+        fh.truncate(size - 10)
+    with SessionReader(str(path)) as reader:
+        assert not reader.complete
+        assert len(reader) == 512
+        t, p = reader.frames()
+        assert [e["event"] for e in reader.events()] == ["phase", "rep"]
+    assert np.abs(t - times[:512]).max() < 1e-6
+    assert np.isnan(p[3]).all() and not np.isnan(p[4]).any()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "x.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        SessionReader(str(path))
@@ -0,0 +1,56 @@
+import numpy as np
+
+from template_cache import TrainerTemplateCache, derive_trainer_features, hash_landmarks
+
+
+def _seq(seed, n=20):
+    return np.random.default_rng(seed).uniform(0.0, 1.0, (n, 33, 3)).astype(np.float32)
+
+
+def test_hash_is_content_based():
+    a = _seq(0)
+    assert hash_landmarks(a) == hash_landmarks(a.astype(np.float64))
+    assert hash_landmarks(a) == hash_landmarks(list(a))
+    assert hash_landmarks(a) != hash_landmarks(_seq(1))
+    # Same bytes, different shape
+    assert hash_landmarks(a) != hash_landmarks(a.reshape(10, 66, 3))
+
+
+def test_get_or_compute_caches_by_content():
+    cache = TrainerTemplateCache(max_entries=4)
+    seq = _seq(0)
+    tid, features = cache.get_or_compute(seq)
+    assert (cache.hits, cache.misses) == (0, 1)
+    tid2, features2 = cache.get_or_compute(seq.copy())
+    assert tid2 == tid and features2 is features
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert features["num_frames"] == len(seq)
+    assert features["angles"].shape == (len(seq), 8)
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TrainerTemplateCache(max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a is now most recent
+    cache.put("c", {"v": 3})
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+
+
+def test_put_existing_refreshes_without_growing():
+    cache = TrainerTemplateCache(max_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.put("a", {"v": 10})
+    cache.put("c", {"v": 3})
+    assert cache.get("a") == {"v": 10}
+    assert cache.get("b") is None
+
+
+def test_empty_sequence_features():
+    features = derive_trainer_features(np.zeros((0, 33, 3), np.float32))
+    assert features["num_frames"] == 0
+    assert features["envelope_lo"].shape == (0,)
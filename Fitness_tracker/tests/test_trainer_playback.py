@@ -0,0 +1,73 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from trainer_playback import TrainerFrameCache
+
+W, H = 160, 120
+NUM_FRAMES = 12
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "trainer.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (W, H))
+    if not writer.isOpened():
+        pytest.skip("MJPG writer unavailable")
+    for i in range(NUM_FRAMES):
+        writer.write(np.full((H, W, 3), 20 * i, np.uint8))
+    writer.release()
+    return path
+
+
+def _levels(cache):
+    return [int(round(cache[i].mean() / 20.0)) for i in range(len(cache))]
+
+
+def test_in_memory_resized_and_read_only(video):
+    cache = TrainerFrameCache.build(video, size=(80, 60))
+    assert len(cache) == NUM_FRAMES
+    assert cache[0].shape == (60, 80, 3) and cache.nbytes == NUM_FRAMES * 60 * 80 * 3
+    assert _levels(cache) == list(range(NUM_FRAMES))
+    assert cache.backing_path is None
+    with pytest.raises(ValueError):
+        cache[0][0, 0, 0] = 1
+
+
+def test_overlay_drawn_on_matching_frames(video):
+    drawn = []
+
+    def draw(frame, mark):
+        drawn.append(mark)
+        frame[:] = 255
+
+    cache = TrainerFrameCache.build(video, size=(W, H), overlay={2: "a", 5: "b"}, draw_fn=draw)
+    assert drawn == ["a", "b"]
+    assert cache[2].min() == 255 and cache[5].min() == 255 and cache[3].max() < 255
+
+
+def test_spills_to_temp_file_and_close_removes_it(video):
+    cache = TrainerFrameCache.build(video, size=(W, H), max_memory_bytes=1)
+    assert isinstance(cache.frames, np.memmap)
+    assert _levels(cache) == list(range(NUM_FRAMES))
+    path = cache.backing_path
+    assert os.path.exists(path)
+    cache.close()
+    assert not os.path.exists(path) and len(cache) == 0
+
+
+def test_cache_dir_reused(video, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "frames")
+    first = TrainerFrameCache.build(video, size=(W, H), cache_dir=cache_dir)
+    first.close()
+    assert os.path.exists(first.backing_path)
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("cached video decoded again")
+
+    monkeypatch.setattr(cv2, "VideoCapture", no_decode)
+    second = TrainerFrameCache.build(video, size=(W, H), cache_dir=cache_dir)
+    assert second.backing_path == first.backing_path
+    assert _levels(second) == list(range(NUM_FRAMES))
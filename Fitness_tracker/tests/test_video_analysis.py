@@ -0,0 +1,111 @@
+import contextlib
+
+import cv2
+import numpy as np
+import pytest
+
+import video_analysis
+from video_analysis import extract_segment, plan_segments, seek_to_frame
+
+
+class _FakeCapture:
+    """Frames are their own index; seeks land `overshoot` frames past the target."""
+    def __init__(self, num_frames, overshoot=0, keyframe_every=None):
+        self.num_frames = num_frames
+        self.overshoot = overshoot
+        self.keyframe_every = keyframe_every
+        self.pos = 0
+        self.seeks = []
+
+    def set(self, prop, value):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        self.seeks.append(int(value))
+        if self.keyframe_every:
+            value = value // self.keyframe_every * self.keyframe_every
+        self.pos = min(self.num_frames, int(value) + self.overshoot)
+        return True
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        return float(self.pos)
+
+    def grab(self):
+        if self.pos >= self.num_frames:
+            return False
+        self.pos += 1
+        return True
+
+    def read(self):
+        if self.pos >= self.num_frames:
+            return False, None
+        frame = np.full((4, 4, 3), self.pos % 256, np.uint8)
+        self.pos += 1
+        return True, frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class _FakePoseModule:
+    @staticmethod
+    def Pose():
+        return contextlib.nullcontext(object())
+
+
+@pytest.fixture
+def fake_pose(monkeypatch):
+    def fake_extract(frame, pose):
+        return None, np.full((33, 3), float(frame[0, 0, 0]), np.float32)
+
+    monkeypatch.setattr(video_analysis, "extract_landmarks", fake_extract)
+    monkeypatch.setattr(video_analysis, "mp_pose", _FakePoseModule)
+
+
+def test_seek_exact():
+    cap = _FakeCapture(100)
+    assert seek_to_frame(cap, 40) == 40
+    assert cap.read()[1][0, 0, 0] == 40
+
+
+def test_seek_to_earlier_keyframe_skips_forward():
+    cap = _FakeCapture(100, keyframe_every=25)
+    assert seek_to_frame(cap, 40) == 40
+    assert cap.read()[1][0, 0, 0] == 40
+
+
+def test_seek_overshoot_backs_off():
+    cap = _FakeCapture(200, overshoot=5)
+    assert seek_to_frame(cap, 100, backoff=30) == 100
+    assert cap.seeks == [100, 70]
+    assert cap.read()[1][0, 0, 0] == 100
+
+
+def test_seek_past_end():
+    cap = _FakeCapture(10, keyframe_every=5)
+    assert seek_to_frame(cap, 50) == 10
+
+
+def test_extract_segment_indices_match_frames(monkeypatch, fake_pose):
+    monkeypatch.setattr(cv2, "VideoCapture", lambda path: _FakeCapture(120, keyframe_every=25))
+    indices, landmarks = extract_segment("unused.avi", 40, 60)
+    assert indices.tolist() == list(range(40, 60))
+    assert landmarks[:, 0, 0].astype(int).tolist() == list(range(40, 60))
+
+
+def test_segments_cover_all_frames_once(monkeypatch, fake_pose):
+    monkeypatch.setattr(cv2, "VideoCapture", lambda path: _FakeCapture(1000, keyframe_every=48))
+    covered = []
+    for start, end in plan_segments(1000, num_workers=3):
+        indices, _ = extract_segment("unused.avi", start, end)
+        covered.extend(indices.tolist())
+    assert covered == list(range(1000))
+
+
+def test_plan_segments_unknown_length():
+    assert plan_segments(0, 4) == [(0, None)]
+    segments = plan_segments(1000, 2, min_segment_frames=100)
+    assert segments[0][0] == 0 and segments[-1][1] is None
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
@@ -0,0 +1,128 @@
+"""
+Pre-decoded trainer video for looped playback.
+
+The trainer clip is decoded once, resized to the display size and (optionally)
+has its skeleton drawn in; frames then live in one contiguous uint8 array of
+shape [N, H, W, 3]. Short clips stay in memory, longer ones go to a
+memory-mapped file, optionally kept in a cache directory so the next session
+with the same video skips decoding entirely. Playback is an index lookup.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def _cache_key(video_path: str, size: Tuple[int, int], with_overlay: bool) -> str:
+    st = os.stat(video_path)
+    raw = f"{os.path.abspath(video_path)}|{st.st_size}|{st.st_mtime_ns}|{size[0]}x{size[1]}|{int(with_overlay)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class TrainerFrameCache:
+    """Indexable [N, H, W, 3] uint8 trainer frames; frames[i] is a read-only view."""
+    def __init__(self, frames: np.ndarray, backing_path: Optional[str] = None, owns_backing: bool = False):
+        self.frames = frames
+        self.backing_path = backing_path
+        self._owns_backing = owns_backing
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self.frames[idx]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.frames.nbytes)
+
+    def close(self):
+        """Drop the frames; removes the backing file if it was a private temp file."""
+        self.frames = np.zeros((0, 1, 1, 3), dtype=np.uint8)
+        if self._owns_backing and self.backing_path:
+            try:
+                os.remove(self.backing_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def build(cls, video_path: str, size: Tuple[int, int] = (640, 480), overlay: Optional[Dict[int, object]] = None,
+              draw_fn=None, max_memory_bytes: int = 256 * 1024 * 1024,
+              cache_dir: Optional[str] = None) -> "TrainerFrameCache":
+        """
+        Decode video_path once into display-ready frames.
+          overlay/draw_fn: draw_fn(frame, overlay[frame_index]) is applied to frames
+                           that have an overlay entry (e.g. the trainer skeleton)
+          max_memory_bytes: larger clips are written to a memory-mapped file instead
+          cache_dir: keep the memory-mapped file there and reuse it next time
+        """
+        width, height = size
+        frame_bytes = width * height * 3
+        with_overlay = bool(overlay) and draw_fn is not None
+        meta_path = data_path = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            key = _cache_key(video_path, size, with_overlay)
+            data_path = os.path.join(cache_dir, key + ".u8")
+            meta_path = os.path.join(cache_dir, key + ".json")
+            try:
+                with open(meta_path, "r") as f:
+                    n = int(json.load(f)["frames"])
+                frames = np.memmap(data_path, dtype=np.uint8, mode="r", shape=(n, height, width, 3))
+                return cls(frames, data_path)
+            except (OSError, ValueError, KeyError):
+                pass
+
+        cap = cv2.VideoCapture(video_path)
+        est = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        to_disk = cache_dir is not None or est * frame_bytes > max_memory_bytes
+        sink = None
+        if to_disk:
+            if data_path is None:
+                fd, data_path = tempfile.mkstemp(suffix=".u8", prefix="trainer_frames_")
+                sink = os.fdopen(fd, "wb")
+            else:
+                sink = open(data_path + ".tmp", "wb")
+            buf = None
+        else:
+            buf = np.empty((max(est, 1), height, width, 3), dtype=np.uint8)
+
+        n = 0
+        try:
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if frame.shape[1] != width or frame.shape[0] != height:
+                    frame = cv2.resize(frame, (width, height))
+                if with_overlay and n in overlay:
+                    draw_fn(frame, overlay[n])
+                if sink is not None:
+                    sink.write(np.ascontiguousarray(frame).tobytes())
+                else:
+                    if n == len(buf):
+                        buf = np.concatenate([buf, np.empty_like(buf)])
+                    buf[n] = frame
+                n += 1
+        finally:
+            cap.release()
+            if sink is not None:
+                sink.close()
+
+        if sink is None:
+            frames = buf[:n] if n == len(buf) else buf[:n].copy()
+            frames.flags.writeable = False
+            return cls(frames)
+        if cache_dir:
+            os.replace(data_path + ".tmp", data_path)
+            with open(meta_path, "w") as f:
+                json.dump({"frames": n, "width": width, "height": height, "video_path": video_path}, f)
+        if n == 0:
+            return cls(np.zeros((0, height, width, 3), dtype=np.uint8), data_path, owns_backing=not cache_dir)
+        frames = np.memmap(data_path, dtype=np.uint8, mode="r", shape=(n, height, width, 3))
+        return cls(frames, data_path, owns_backing=not cache_dir)
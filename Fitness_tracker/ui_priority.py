@@ -1,6 +1,4 @@
 import numpy as np
-import tkinter as tk
-from tkinter import ttk
 
 
 def build_weights_from_priority(priority_tokens, priority_weight, nonpriority_weight, D):
@@ -40,6 +38,9 @@ def build_weights_from_priority(priority_tokens, priority_weight, nonpriority_we
 
 def show_priority_ui() -> list:
     """Blocking UI to select per-joint priorities. Returns list of tokens."""
+    import tkinter as tk
+    from tkinter import ttk
+
     root = tk.Tk()
     root.title("Select Joint Priorities")
     root.geometry("360x360")
@@ -79,6 +80,9 @@ def show_priority_ui() -> list:
 
 def show_setup_ui() -> tuple:
     """Return (selected_priority_tokens, weights_mode) where weights_mode is 'with' or 'without'."""
+    import tkinter as tk
+    from tkinter import ttk
+
     root = tk.Tk()
     root.title("Workout Setup")
     root.geometry("420x420")
@@ -0,0 +1,254 @@
+"""
+Offline analysis of a recorded user workout video.
+
+The video is split into contiguous frame ranges that are decoded and run
+through Pose in parallel worker processes (each seeks to its start frame with
+cv2.VideoCapture, checking where the seek actually landed). Results are consumed in order, stitched into one landmark
+sequence and fed to RepDetector; every rep it closes is scored and given
+feedback immediately, so results stream out while later segments are still
+being extracted.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from exercise import (
+    RepDetector, extract_landmarks, extract_pose_sequence, mp_pose, prepare_trainer_reference,
+    rep_channel_series, score_user_angles
+)
+from feedback_system import create_feedback_system
+from scoring import compute_angles_for_seq, masked_motion_amplitude
+
+
+def probe_video(path: str) -> Tuple[int, float]:
+    """Return (frame count, fps). Frame count is 0 when the container doesn't report it."""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("Could not open video")
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        return max(frames, 0), (fps if fps > 0 else 30.0)
+    finally:
+        cap.release()
+
+
+def plan_segments(total_frames: int, num_workers: int, min_segment_frames: int = 150) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split [0, total_frames) into contiguous (start, end) ranges: about two per
+    worker so a slow segment doesn't idle the pool, but never shorter than
+    min_segment_frames since each one pays for a seek and a Pose graph.
+    """
+    if total_frames <= 0:
+        return [(0, None)]  # unknown length: one sequential pass to the end
+    n = max(1, min(2 * num_workers, total_frames // max(1, min_segment_frames)))
+    bounds = np.linspace(0, total_frames, n + 1).astype(int)
+    segments = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    # Frame counts from the container header can be short; let the last range read to the end
+    segments[-1] = (segments[-1][0], None)
+    return segments
+
+
+# How far to back off when a seek overshoots its target frame
+SEEK_BACKOFF_FRAMES = 30
+
+
+def seek_to_frame(cap, start: int, backoff: int = SEEK_BACKOFF_FRAMES) -> int:
+    """
+    Position `cap` so the next read() returns frame `start` and return that index.
+    CAP_PROP_POS_FRAMES seeks are only keyframe-accurate for some codecs, so the
+    position is read back: an overshoot retries further back, and the frames
+    between where the seek landed and `start` are skipped with grab(). Returns
+    a smaller index if the video ends first.
+    """
+    pos = 0
+    if start > 0:
+        target = start
+        while True:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            pos = max(0, int(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+            if pos <= start or target == 0:
+                break
+            target = max(0, target - backoff)
+    while pos < start and cap.grab():
+        pos += 1
+    return pos
+
+
+def extract_segment(path: str, start: int, end: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pose-extract frames [start, end) of a video (end=None reads to the end).
+    Runs in a worker process. Returns (frame indices [N] int32, landmarks [N, 33, 3]
+    float32) for the frames where a pose was found.
+    """
+    cap = cv2.VideoCapture(path)
+    indices: List[int] = []
+    landmarks: List[np.ndarray] = []
+    try:
+        idx = seek_to_frame(cap, start)
+        with mp_pose.Pose() as pose:
+            while end is None or idx < end:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                _, lmk_arr = extract_landmarks(frame, pose)
+                if lmk_arr is not None and lmk_arr.shape == (33, 3):
+                    indices.append(idx)
+                    landmarks.append(lmk_arr)
+                idx += 1
+    finally:
+        cap.release()
+    if not landmarks:
+        return np.zeros((0,), dtype=np.int32), np.zeros((0, 33, 3), dtype=np.float32)
+    return np.asarray(indices, dtype=np.int32), np.stack(landmarks).astype(np.float32)
+
+
+class VideoAnalysisJob:
+    """
+    One offline analysis run. run() blocks (call it on a thread); reps, status and
+    progress can be read concurrently while it works.
+    """
+    def __init__(self, job_id: str, video_path: str, trainer_seq: Optional[List[np.ndarray]] = None,
+                 trainer_video_path: Optional[str] = None, priority: Optional[List[str]] = None,
+                 priority_weight: float = 1.8, nonpriority_weight: float = 0.2, delete_video: bool = True):
+        self.job_id = job_id
+        self.video_path = video_path
+        # Either landmarks from the template store or a server-side video to extract
+        self.trainer_seq = trainer_seq
+        self.trainer_video_path = trainer_video_path
+        self.priority = priority or []
+        self.priority_weight = priority_weight
+        self.nonpriority_weight = nonpriority_weight
+        self.delete_video = delete_video
+
+        self.status = "queued"  # queued, running, completed, error
+        self.error: Optional[str] = None
+        self.total_frames = 0
+        self.fps = 30.0
+        self.frames_done = 0
+        self.num_segments = 0
+        self.reps: List[Dict[str, Any]] = []
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "error")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+            video_seconds = self.total_frames / self.fps if self.fps else 0.0
+            scores = [r["score"] for r in self.reps]
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "error": self.error,
+                "frames_done": self.frames_done,
+                "total_frames": self.total_frames,
+                "segments": self.num_segments,
+                "reps_detected": len(self.reps),
+                "average_score": float(np.mean(scores)) if scores else 0.0,
+                "video_seconds": round(video_seconds, 3),
+                "processing_seconds": round(elapsed, 3),
+                # > 1 means faster than real time
+                "realtime_factor": round(video_seconds / elapsed, 2) if elapsed > 0 and self.status == "completed" else None,
+            }
+
+    def _set(self, **fields):
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+
+    def run(self, pool: Executor, num_workers: int):
+        """Extract segments on `pool` (a process pool) and score reps as segments complete in order."""
+        self._set(status="running", started=time.time())
+        try:
+            total_frames, fps = probe_video(self.video_path)
+            segments = plan_segments(total_frames, num_workers)
+            self._set(total_frames=total_frames, fps=fps, num_segments=len(segments))
+            futures = [pool.submit(extract_segment, self.video_path, s, e) for s, e in segments]
+
+            if not self.trainer_seq:
+                # Overlaps with the user segments already running in the pool
+                self.trainer_seq = extract_pose_sequence(self.trainer_video_path, max_size=640)
+                if not self.trainer_seq:
+                    for fut in futures:
+                        fut.cancel()
+                    raise ValueError("Could not extract trainer landmarks")
+            reference = prepare_trainer_reference(
+                self.trainer_seq, self.priority, self.priority_weight, self.nonpriority_weight
+            )
+            low_t, high_t, amp, hyst = reference["thresholds"]
+            trainer_angles = reference["angles"]
+            priority_mask = reference["priority_mask"]
+            trainer_motion_amp = masked_motion_amplitude(trainer_angles, priority_mask)
+            feedback_system = create_feedback_system(self.priority, reference["weights"])
+            feedback_system.voice_enabled = False
+            repdet = RepDetector(window=5, min_amp=amp, hysteresis=hyst)
+
+            # Stitched sequence of frames with a detected pose, in video order
+            frame_idx: List[int] = []
+            seq: List[np.ndarray] = []
+            for (seg_start, seg_end), fut in zip(segments, futures):
+                indices, landmarks = fut.result()
+                channel = rep_channel_series(landmarks, reference["chosen_name"])
+                for k in range(len(landmarks)):
+                    if frame_idx and int(indices[k]) <= frame_idx[-1]:
+                        continue  # a segment that started early overlaps the previous one
+                    t_idx = len(seq)
+                    frame_idx.append(int(indices[k]))
+                    seq.append(landmarks[k])
+                    closed = repdet.update(t_idx, float(channel[k]), low_t, high_t)
+                    if closed is not None:
+                        self._score_rep(closed, seq, frame_idx, fps, trainer_angles, reference,
+                                        trainer_motion_amp, feedback_system)
+                if seg_end is None:
+                    frames_done = max(total_frames, frame_idx[-1] + 1 if frame_idx else 0)
+                else:
+                    frames_done = seg_end
+                self._set(frames_done=frames_done)
+            if total_frames <= 0:
+                self._set(total_frames=self.frames_done)
+            self._set(status="completed", finished=time.time())
+        except Exception as e:
+            self._set(status="error", error=str(e), finished=time.time())
+        finally:
+            if self.delete_video:
+                try:
+                    os.remove(self.video_path)
+                except OSError:
+                    pass
+
+    def _score_rep(self, segment, seq, frame_idx, fps, trainer_angles, reference,
+                   trainer_motion_amp, feedback_system):
+        start, end = segment
+        if end <= start + 2:
+            return  # too short to be a real rep
+        user_angles = compute_angles_for_seq(seq[start:end + 1])
+        score = float(score_user_angles(user_angles, trainer_angles, reference["weights"],
+                                        reference["priority_mask"]))
+        user_motion_amp = masked_motion_amplitude(user_angles, reference["priority_mask"])
+        feedback = feedback_system.analyze_rep_performance(
+            user_angles, trainer_angles, user_motion_amp, trainer_motion_amp, score,
+            reference["priority_mask"]
+        )
+        rep = {
+            "rep_number": len(self.reps) + 1,
+            "score": score,
+            "feedback": feedback,
+            "start_frame": frame_idx[start],
+            "end_frame": frame_idx[end],
+            "start_time": round(frame_idx[start] / fps, 3),
+            "end_time": round(frame_idx[end] / fps, 3),
+        }
+        with self._lock:
+            self.reps.append(rep)